@@ -0,0 +1,257 @@
+"""
+Async views for ASGI deployments (see expensetracker/asgi.py).
+
+With settings.ASYNC_VIEWS on, these serve the agent and transaction endpoints
+in place of the DRF views in views.py, with the same request and response
+formats. LLM and agent calls await `ainvoke`/`astream`; mongoengine calls run in
+worker threads. A uvicorn worker therefore keeps serving other requests while one
+request waits on Gemini.
+"""
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from django_ratelimit.core import is_ratelimited
+
+from . import bulk_import, data_version, repository
+from .views import (
+    firebase_authenticated, log_small_talk_hit, parse_summary_range,
+    remember_agent_reply, transaction_list_payload,
+)
+from api.langchainAgent.agent import get_agent, agent_config, arecord_cached_turn, get_response_cache, get_thread_lock
+from api.langchainAgent.response_cache import turn_tool_names
+from api.langchainAgent.context import set_user_info
+from api.langchainAgent.thread_lock import ThreadBusy
+from api.langchainAgent.streaming import (
+    acanned_events, astream_agent_events, error_message, is_quota_error, message_text,
+)
+from api.utils.filter import small_talk_reply
+from api.utils.sse import event_stream_response, wants_event_stream
+
+logger = logging.getLogger(__name__)
+
+
+def run_in_thread(func, *args, **kwargs):
+    """Await a blocking (mongoengine / serializer) call without holding the event loop."""
+    return sync_to_async(func, thread_sensitive=False)(*args, **kwargs)
+
+
+def json_body(request):
+    """The request's JSON object, or None if the body is not one."""
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def invalid_body_response():
+    return JsonResponse({"error": "Request body must be a JSON object."}, status=400)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncAPIView(View):
+    # Token-authenticated JSON API, CSRF exempt like DRF's APIView
+    http_method_names = ["get", "post", "put", "delete", "options"]
+
+
+class AsyncTransactionListView(AsyncAPIView):
+    kind = None  # "expenses" | "incomes", set in the URLconf
+
+    @method_decorator(firebase_authenticated)
+    async def get(self, request):
+        try:
+            payload = await run_in_thread(transaction_list_payload, request.GET, self.kind)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        return JsonResponse(payload)
+
+    @method_decorator(firebase_authenticated)
+    async def post(self, request):
+        data = json_body(request)
+        if data is None:
+            return invalid_body_response()
+        try:
+            saved = await run_in_thread(repository.create_transaction, self.kind, data)
+        except repository.TransactionValidationError as ve:
+            return JsonResponse(ve.errors, status=400)
+        return JsonResponse(saved, status=201)
+
+
+class AsyncTransactionDetailView(AsyncAPIView):
+    kind = None
+    label = None  # "Expense" | "Income", for the 404 message
+
+    @method_decorator(firebase_authenticated)
+    async def get(self, request, pk):
+        try:
+            payload = await run_in_thread(transaction_list_payload, request.GET, self.kind, pk)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        return JsonResponse(payload, safe=False)
+
+    @method_decorator(firebase_authenticated)
+    async def put(self, request, pk):
+        data = json_body(request)
+        if data is None:
+            return invalid_body_response()
+        try:
+            saved = await run_in_thread(repository.update_transaction, self.kind, pk, data)
+        except repository.TransactionValidationError as ve:
+            return JsonResponse(ve.errors, status=400)
+        if saved is None:
+            return JsonResponse({"error": f"{self.label} not found"}, status=404)
+        return JsonResponse(saved)
+
+    @method_decorator(firebase_authenticated)
+    async def delete(self, request, pk):
+        if not await run_in_thread(repository.delete_transaction, self.kind, pk):
+            return JsonResponse({"error": f"{self.label} not found"}, status=404)
+        return HttpResponse(status=204)
+
+
+class AsyncTransactionCreateViewLlm(AsyncAPIView):
+    # HTTP fallback of the agent's add_transaction tool (see ExpenseListCreateViewLlm)
+    kind = None
+
+    @method_decorator(firebase_authenticated)
+    async def post(self, request):
+        data = json_body(request)
+        if data is None:
+            return invalid_body_response()
+        try:
+            repository.validate_llm_payload(self.kind, data)
+            saved = await run_in_thread(repository.create_transaction, self.kind, data)
+        except repository.TransactionValidationError as ve:
+            logger.warning("AsyncTransactionCreateViewLlm: Validation failed: %s. Data: %s", ve.errors, data)
+            return JsonResponse(ve.errors, status=400)
+        except Exception as e:
+            logger.exception("AsyncTransactionCreateViewLlm: Error saving %s for data: %s", self.kind, data)
+            return JsonResponse({"error": f"Failed to save transaction: {str(e)}"}, status=500)
+
+        logger.info("AsyncTransactionCreateViewLlm: %s added. ID: %s by User: %s", self.kind, data.get("Id"), data.get("User"))
+        return JsonResponse(saved, status=201)
+
+
+class AsyncTransactionImportView(AsyncAPIView):
+    # See TransactionImportView; parsing and inserts run in a worker thread
+    kind = None
+
+    @method_decorator(firebase_authenticated)
+    async def post(self, request):
+        if is_ratelimited(request, group="bulk-import", key="ip", rate="10/m", method="POST", increment=True):
+            return JsonResponse({"error": "Rate limit exceeded. Please wait a minute before making more requests."}, status=429)
+
+        def run_import():
+            stream, filename, content_type = bulk_import.read_upload(request)
+            fmt = bulk_import.detect_format(request.GET.get("filetype"), content_type, filename)
+            return bulk_import.import_transactions(self.kind, request.uid, stream, fmt)
+
+        try:
+            result = await run_in_thread(run_import)
+        except bulk_import.ImportFormatError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        return JsonResponse(result, status=201 if result["inserted"] else 400)
+
+
+class AsyncResetAllTransactionsView(AsyncAPIView):
+    @method_decorator(firebase_authenticated)
+    async def delete(self, request):
+        await run_in_thread(repository.delete_user_transactions, request.uid)
+        return JsonResponse({"message": "All income and expenses deleted successfully."})
+
+
+class AsyncTransactionSummaryView(AsyncAPIView):
+    @method_decorator(firebase_authenticated)
+    async def get(self, request, pk):
+        try:
+            start, end = parse_summary_range(request.GET)
+        except ValueError:
+            return JsonResponse({"error": "start and end must be in YYYY-MM-DD format."}, status=400)
+        return JsonResponse(await run_in_thread(repository.summarize_transactions, pk, start, end))
+
+
+class AsyncLangChainAgentView(AsyncAPIView):
+    # Same contract as LangChainAgentView, including ?stream=1 Server-Sent Events
+
+    @method_decorator(firebase_authenticated)
+    async def post(self, request):
+        if is_ratelimited(request, group="ai-agent", key="ip", rate="5/m", method="POST", increment=True):
+            logger.warning(f"AsyncLangChainAgentView: Rate limit exceeded for IP: {request.META.get('REMOTE_ADDR')}")
+            return JsonResponse(
+                {"error": "Rate limit exceeded. Please wait a minute before making more requests."},
+                status=429
+            )
+
+        data = json_body(request) or {}
+        user_input = data.get("query")
+        user_id = request.uid
+        id_token = request.headers.get("Authorization")
+
+        if not id_token or not user_id or not user_input:
+            return JsonResponse({"error": "Missing query, user_id, or token"}, status=400)
+
+        # Context variables are per asyncio task, so concurrent requests keep their own user
+        set_user_info(user_id, id_token.split(" ")[1])
+
+        try:
+            logger.info("AsyncLangChainAgentView: Invoking agent for user_id: %s with query: '%s'", user_id, user_input)
+
+            stream = wants_event_stream(request)
+
+            canned_reply = small_talk_reply(user_input)
+            if canned_reply is not None:
+                log_small_talk_hit("AsyncLangChainAgentView")
+                if stream:
+                    return event_stream_response(acanned_events(canned_reply))
+                return JsonResponse({"response": canned_reply})
+
+            # The first call compiles the shared graph; keep that off the event loop
+            agent = await run_in_thread(get_agent)
+            config = agent_config(user_id)
+
+            # The lookup may embed the query and read Mongo, so it runs in a thread too
+            version = await run_in_thread(data_version.current, user_id)
+            response_cache = await run_in_thread(get_response_cache)
+            cached = await run_in_thread(response_cache.lookup, user_id, user_input, version)
+            if cached.response is not None:
+                logger.info("AsyncLangChainAgentView: Answered from the response cache for user_id: %s", user_id)
+                await arecord_cached_turn(agent, config, user_input, cached.response)
+                if stream:
+                    return event_stream_response(acanned_events(cached.response))
+                return JsonResponse({"response": cached.response})
+
+            async def remember(response, tool_names):
+                await run_in_thread(remember_agent_reply, user_id, user_input, version, cached, response, tool_names)
+
+            thread_lock = await run_in_thread(get_thread_lock)
+            if stream:
+                return event_stream_response(
+                    astream_agent_events(agent, user_input, config, on_complete=remember, thread_lock=thread_lock)
+                )
+
+            async with thread_lock.ahold(config["configurable"]["thread_id"]):
+                response_from_agent = await agent.ainvoke(
+                    {"messages": [{"role": "user", "content": user_input}]},
+                    config=config
+                )
+            messages = response_from_agent.get("messages", [])
+            final_ai_message = messages[-1]
+            logger.info("AsyncLangChainAgentView: Agent responded: %s", final_ai_message)
+            await remember(message_text(final_ai_message), turn_tool_names(messages))
+
+            return JsonResponse({"response": final_ai_message.content})
+
+        except ThreadBusy as e:
+            logger.warning("AsyncLangChainAgentView: Thread busy for user_id: %s", user_id)
+            return JsonResponse({"error": error_message(e)}, status=409)
+        except Exception as e:
+            if is_quota_error(e):
+                logger.error(f"AsyncLangChainAgentView: Gemini quota exceeded: {e}")
+                return JsonResponse({"error": error_message(e)}, status=503)
+            logger.exception("AsyncLangChainAgentView: Agent crashed for input: '%s'", user_input)
+            return JsonResponse({"error": error_message(e)}, status=500)
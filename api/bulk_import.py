@@ -0,0 +1,206 @@
+"""
+Bulk import of expense/income rows from CSV or NDJSON uploads.
+
+The upload is parsed as a stream, validated `chunk_size` rows at a time with the
+same serializer as POST /expenses/ and /incomes/, and every chunk is written with
+one `insert_many(ordered=False)`. A bank statement with thousands of rows is
+therefore a handful of round-trips, and bad rows are reported per line instead of
+failing the whole file.
+"""
+import codecs
+import csv
+import io
+import json
+import logging
+import os
+
+from mongoengine import ValidationError
+from pymongo.errors import BulkWriteError
+from rest_framework import serializers
+
+from . import repository, rollups
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_IMPORT_ROWS = int(os.getenv("BULK_IMPORT_MAX_ROWS", "100000"))
+# Per-row errors returned in the response; the counts always cover every row
+MAX_REPORTED_ERRORS = 500
+
+FORMATS = ("csv", "ndjson")
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonlines": "ndjson",
+}
+
+
+class ImportFormatError(Exception):
+    """Raised when the upload cannot be parsed at all (unknown format, no CSV header, bad encoding)."""
+
+
+def detect_format(requested=None, content_type=None, filename=None):
+    """csv / ndjson from ?filetype=, then the file name, then the Content-Type."""
+    if requested:
+        if requested not in FORMATS:
+            raise ImportFormatError(f"Unsupported format '{requested}'. Use one of: {', '.join(FORMATS)}.")
+        return requested
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".ndjson", ".jsonl"):
+        return "ndjson"
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in CONTENT_TYPES:
+        return CONTENT_TYPES[content_type]
+    raise ImportFormatError("Could not detect the upload format. Pass ?filetype=csv or ?filetype=ndjson.")
+
+
+def read_upload(request):
+    """
+    (binary stream, filename, content type) of the upload: the `file` field of a
+    multipart form, or else the raw request body (DRF or plain Django request).
+    """
+    content_type = request.content_type or ""
+    if content_type.startswith("multipart/form-data"):
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ImportFormatError("Attach the upload as the 'file' field of the form.")
+        return upload, upload.name, upload.content_type
+    stream = request.stream if hasattr(request, "stream") else request
+    return stream or io.BytesIO(), None, content_type
+
+
+def _text_lines(stream):
+    # Decode incrementally so the upload is never held in memory as one string
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    try:
+        for block in iter(lambda: stream.read(64 * 1024), b""):
+            pending += decoder.decode(block)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line + "\n"
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise ImportFormatError("The upload is not valid UTF-8.")
+    if pending:
+        yield pending
+
+
+def iter_csv_rows(stream):
+    """(line number, row dict) for each CSV record; the first line is the header."""
+    reader = csv.DictReader(_text_lines(stream))
+    if not reader.fieldnames:
+        raise ImportFormatError("The CSV upload has no header row.")
+    reader.fieldnames = [name.strip() for name in reader.fieldnames]
+    for row in reader:
+        # Columns beyond the header land under None; they are not transaction fields
+        row.pop(None, None)
+        yield reader.line_num, row
+
+
+def iter_ndjson_rows(stream):
+    """(line number, row dict) for each non-blank NDJSON line; bad lines yield an error string."""
+    for line_number, line in enumerate(_text_lines(stream), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, f"Invalid JSON: {e}"
+            continue
+        yield line_number, row if isinstance(row, dict) else "Each line must be a JSON object."
+
+
+def _validate_chunk(kind, user_id, chunk):
+    """Documents (line, mongo dict) ready for insert_many, plus per-line errors."""
+    model = repository.get_model(kind)
+    # One serializer for the whole chunk: building its fields is the costly part per row
+    serializer = repository.get_serializer_class(kind)()
+    default_type = "Expense" if kind == "expenses" else "Income"
+    documents, errors = [], []
+    for line, row in chunk:
+        if isinstance(row, str):
+            errors.append({"line": line, "errors": {"error": row}})
+            continue
+        row = {key: value for key, value in row.items() if value is not None}
+        row["User"] = user_id  # rows always belong to the authenticated user
+        if not row.get("Type"):
+            row["Type"] = default_type
+        try:
+            validated = serializer.run_validation(row)
+            document = model(**validated)
+            document.validate()
+        except serializers.ValidationError as e:
+            errors.append({"line": line, "errors": e.detail})
+            continue
+        except ValidationError as e:
+            errors.append({"line": line, "errors": {field: [str(error)] for field, error in (e.errors or {"error": e.message}).items()}})
+            continue
+        documents.append((line, document.to_mongo().to_dict()))
+    return documents, errors
+
+
+def _insert_chunk(kind, documents):
+    """insert_many(ordered=False); returns (inserted count, per-line write errors)."""
+    if not documents:
+        return 0, []
+    collection = repository.get_model(kind)._get_collection()
+    write_errors = []
+    try:
+        collection.insert_many([document for _, document in documents], ordered=False)
+    except BulkWriteError as e:
+        write_errors = e.details.get("writeErrors", [])
+    failed = {error["index"] for error in write_errors}
+    inserted = [document for index, (_, document) in enumerate(documents) if index not in failed]
+    rollups.add_many(kind, inserted)
+    errors = [
+        {"line": documents[error["index"]][0], "errors": {"error": error.get("errmsg", "Write failed")}}
+        for error in write_errors
+    ]
+    return len(inserted), errors
+
+
+def import_transactions(kind, user_id, stream, fmt, chunk_size=IMPORT_CHUNK_SIZE, max_rows=MAX_IMPORT_ROWS):
+    """
+    Import every row of `stream` (a binary file-like object) as `kind` for `user_id`.
+    Returns {"inserted", "failed", "errors": [{"line", "errors"}], "errors_truncated"}.
+    Raises ImportFormatError if the upload cannot be parsed.
+    """
+    repository.get_model(kind)  # unknown kinds fail before reading the upload
+    rows = iter_csv_rows(stream) if fmt == "csv" else iter_ndjson_rows(stream)
+    inserted, failed, errors = 0, 0, []
+
+    def flush(chunk):
+        nonlocal inserted, failed
+        documents, chunk_errors = _validate_chunk(kind, user_id, chunk)
+        count, write_errors = _insert_chunk(kind, documents)
+        inserted += count
+        chunk_errors = sorted(chunk_errors + write_errors, key=lambda error: error["line"])
+        failed += len(chunk_errors)
+        errors.extend(chunk_errors[:max(0, MAX_REPORTED_ERRORS - len(errors))])
+
+    chunk = []
+    for seen, (line, row) in enumerate(rows, start=1):
+        if seen > max_rows:
+            failed += 1
+            errors.append({"line": line, "errors": {"error": f"Uploads are limited to {max_rows} rows; the rest was not imported."}})
+            break
+        chunk.append((line, row))
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+    errors.sort(key=lambda error: error["line"])
+
+    logger.info("Bulk import of %s for user %s: %s inserted, %s failed", kind, user_id, inserted, failed)
+    return {
+        "inserted": inserted,
+        "failed": failed,
+        "errors": errors,
+        "errors_truncated": failed > len(errors),
+    }
@@ -0,0 +1,19 @@
+"""
+Per-user data version: a counter bumped whenever a user's transactions (or agent
+memories) change. Caches of derived answers key on it, so one atomic `$inc` per
+write invalidates every cached answer for that user at once.
+"""
+from .models import UserDataVersion
+
+
+def _versions():
+    return UserDataVersion._get_collection()
+
+
+def current(user_id: str) -> int:
+    document = _versions().find_one({"_id": user_id}, {"Version": 1})
+    return document["Version"] if document else 0
+
+
+def bump(user_id: str) -> None:
+    _versions().update_one({"_id": user_id}, {"$inc": {"Version": 1}}, upsert=True)
@@ -1,15 +1,11 @@
-import os
 import uuid
-import requests
 import json
 import re
 from datetime import datetime, timedelta, date
 from langchain_core.tools import tool
 from api.langchainAgent.context import get_current_user_info
-from rapidfuzz import fuzz
-import psutil
-
-BASE_URL = os.getenv("BACKEND_API_BASE_URL", "http://localhost:8000/")
+from api.langchainAgent.data_access import DataAccessError, create_transaction
+from api.utils.categorize import CATEGORIES, auto_categorize
 
 VALID_TAGS = [
     "Salary", "Business", "Investment", "Other",
@@ -17,56 +13,15 @@ VALID_TAGS = [
     "Medical", "Food", "Others"
 ]
 
-CATEGORIES = {
-    "Food": ["food", "grocery", "supermarket", "bigbazaar", "reliance"],
-    "Entertainment": ["movie", "cinema", "netflix", "hotstar", "game", "theater"],
-    "Transportation": ["bus", "taxi", "uber", "ola", "train", "fuel", "petrol"],
-    "Utilities": ["electricity", "water bill", "gas", "internet", "wifi"],
-    "Medical": ["hospital", "doctor", "medicine", "pharmacy"],
-    "Salary": ["salary", "paycheck", "monthly pay"],
-    "Business": ["business", "client", "deal", "sale"],
-    "Investment": ["investment", "dividend", "stock", "mutual fund", "sip"],
-    "Other": ["freelance", "consulting", "misc"],
-    "Others": ["other", "random", "unknown", "misc"]
-}
-
-def log_memory(stage=""):
-    process = psutil.Process(os.getpid())
-    mem = process.memory_info().rss / 1024 / 1024
-    print(f"🔍 Memory {stage}: {mem:.2f} MB")
-
 def generate_unique_id():
     return str(uuid.uuid4())
 
-def auto_categorize(text: str, threshold: int = 85) -> tuple[str, int]:
-    text_lower = text.lower()
-
-    for category, keywords in CATEGORIES.items():
-        for keyword in keywords:
-            if keyword in text_lower:
-                return category, 100
-
-    best_category = "Others"
-    best_score = 0
-    for category, keywords in CATEGORIES.items():
-        for keyword in keywords:
-            score = fuzz.partial_ratio(text_lower, keyword)
-            if score > best_score:
-                best_score = score
-                best_category = category
-                if best_score >= threshold:
-                    return best_category, best_score
-
-    return best_category, best_score
-
 @tool
 def add_transaction(input: str) -> str:
     """
     Adds a transaction (income or expense) for the authenticated user.
     Accepts either JSON input or natural language.
     """
-    log_memory("before")
-
     user_id, auth_token = get_current_user_info()
     if not user_id or not auth_token:
         return "❌ Cannot fetch insights. Missing user context or auth token."
@@ -178,16 +133,12 @@ def add_transaction(input: str) -> str:
             "Description": data.get("description", "")
         }
 
-        headers = {"Authorization": f"Bearer {auth_token}"}
-        endpoint = "expenses/add/" if transaction_type == "expenses" else "income/add/"
-
-        response = requests.post(f"{BASE_URL}/{endpoint}", headers=headers, json=payload, timeout=15)
-        response.raise_for_status()
+        kind = "expenses" if transaction_type == "expenses" else "incomes"
+        create_transaction(kind, payload, auth_token)
 
-        log_memory("after")
         return f"✅ {transaction_type.capitalize()} added successfully."
 
-    except requests.exceptions.RequestException as e:
+    except DataAccessError as e:
         if "429" in str(e) or "resource" in str(e).lower():
             return "❌ Server overloaded or resource exhausted. Please try again later."
         return f"❌ Failed to add {transaction_type}: {str(e)}"
@@ -1,15 +1,11 @@
-import requests
 import re
-import os
 import logging
-from datetime import datetime, timedelta
-from calendar import month_name
+from datetime import date, datetime, timedelta
+from calendar import month_name, monthrange
 from collections import defaultdict
 from langchain_core.tools import tool
 from api.langchainAgent.context import get_current_user_info
-
-
-BASE_URL = os.getenv("BACKEND_API_BASE_URL", "http://localhost:8000/")
+from api.langchainAgent.data_access import DataAccessError, fetch_summary
 
 @tool
 def financial_insight(query: str) -> str:
@@ -28,51 +24,27 @@ def financial_insight(query: str) -> str:
     if not user_id or not auth_token:
         return "❌ Cannot fetch insights. Missing user context or auth token."
 
-    headers = {"Authorization": f"Bearer {auth_token}"}
-
-    def fetch(endpoint):
+    def fetch(start=None, end=None):
         try:
-            res = requests.get(f"{BASE_URL}/{endpoint}/{user_id}/", headers=headers, timeout=120)
-            if res.status_code == 401:
+            return fetch_summary(user_id, auth_token, start, end)
+        except DataAccessError as e:
+            if e.status_code == 401:
                 return {"error": "unauthorized"}
-            if res.status_code != 200:
-                logger.error(f"API call failed: {res.status_code} - {res.text}")
-                return {"error": f"API error: {res.status_code}"}
-            return res.json()
-        except Exception as e:
             return {"error": str(e)}
 
-    expenses = fetch("expenses")
-    incomes = fetch("incomes")
+    summary = fetch()
 
-    if "error" in expenses:
+    if "error" in summary:
         return "❌ Unable to fetch expenses. Ensure you're logged in."
-    if "error" in incomes:
-        return "❌ Unable to fetch incomes. Ensure you're logged in."
-    if not expenses and not incomes:
+    if not summary["expenses"]["count"] and not summary["incomes"]["count"]:
         return "📭 No financial records found."
 
     try:
         monthly_data = defaultdict(lambda: {"income": 0, "expense": 0})
-        category_data = defaultdict(float)
-
-        for item in incomes:
-            try:
-                date = datetime.strptime(item["Date"], "%Y-%m-%d").strftime("%Y-%m")
-                monthly_data[date]["income"] += float(item["Amount"])
-            except (KeyError, Exception) as e:
-                logger.warning(f"Skipping income entry due to error: {e}")
-                continue
-
-        for item in expenses:
-            try:
-                date = datetime.strptime(item["Date"], "%Y-%m-%d").strftime("%Y-%m")
-                amt = float(item["Amount"])
-                monthly_data[date]["expense"] += amt
-                category_data[item["Tag"]] += amt
-            except (KeyError, Exception) as e:
-                logger.warning(f"Skipping expense entry due to error: {e}")
-                continue
+        for month, amt in summary["incomes"]["monthly"].items():
+            monthly_data[month]["income"] += float(amt)
+        for month, amt in summary["expenses"]["monthly"].items():
+            monthly_data[month]["expense"] += float(amt)
 
         query_lower = query.lower()
         current_date = datetime.now()
@@ -82,13 +54,13 @@ def financial_insight(query: str) -> str:
         year_match = re.search(r"(20\d{2})", query_lower)
         if year_match and ("year" in query_lower or "overall" in query_lower or "summary" in query_lower):
             target_year = year_match.group(1)
-            yearly_income = sum(float(i["Amount"]) for i in incomes if i["Date"].startswith(target_year))
-            yearly_expense = sum(float(e["Amount"]) for e in expenses if e["Date"].startswith(target_year))
+            yearly = fetch(date(int(target_year), 1, 1), date(int(target_year), 12, 31))
+            if "error" in yearly:
+                return "❌ Unable to fetch expenses. Ensure you're logged in."
+            yearly_income = float(yearly["incomes"]["total"])
+            yearly_expense = float(yearly["expenses"]["total"])
             yearly_savings = yearly_income - yearly_expense
-            category_totals = defaultdict(float)
-            for e in expenses:
-                if e["Date"].startswith(target_year):
-                    category_totals[e["Tag"]] += float(e["Amount"])
+            category_totals = yearly["expenses"]["tags"]
             top_categories = sorted(category_totals.items(), key=lambda x: x[1], reverse=True)[:5]
 
             savings_rate = (yearly_savings / yearly_income * 100) if yearly_income != 0 else 0
@@ -154,11 +126,10 @@ def financial_insight(query: str) -> str:
         prev_savings = prev_month["income"] - prev_month["expense"]
         savings_delta = this_savings - prev_savings
 
-        # Filter top categories for this month only
-        category_totals = defaultdict(float)
-        for item in expenses:
-            if item["Date"].startswith(target_month):
-                category_totals[item["Tag"]] += float(item["Amount"])
+        # Top categories for this month only
+        year, month = map(int, target_month.split("-"))
+        month_summary = fetch(date(year, month, 1), date(year, month, monthrange(year, month)[1]))
+        category_totals = month_summary["expenses"]["tags"] if "error" not in month_summary else {}
         top_categories = sorted(category_totals.items(), key=lambda x: x[1], reverse=True)[:3]
 
         response = f"""
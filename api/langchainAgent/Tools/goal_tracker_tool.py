@@ -1,20 +1,13 @@
 import uuid
-import requests
 from datetime import datetime, timedelta # Import timedelta for 'yesterday'
 from langchain_core.tools import tool
 from django.conf import settings
 from api.langchainAgent.context import get_current_user_info
+from api.langchainAgent.data_access import DataAccessError, fetch_summary
 from langchain.tools import tool
-import os
 import logging
 
 
-# IMPORTANT: Ensure BASE_URL is correctly defined, preferably from settings.
-# It should include '/api' if your root URLConf prefixes your app's URLs with 'api/'.
-# e.g., settings.API_BASE_URL = 'http://localhost:8000/api'
-BASE_URL = os.getenv("BACKEND_API_BASE_URL", "http://localhost:8000/")
-
-
 def generate_unique_id():
     return str(uuid.uuid4())
 
@@ -36,8 +29,6 @@ def goal_tracker(goal_amount_and_duration: str) -> str:
     if not user_id or not auth_token:
         return "❌ Missing user session info. Please log in."
 
-    headers = {"Authorization": f"Bearer {auth_token}"}
-
     # Extract goal_amount and months from input string
     import re
     goal_match = re.search(r"₹?(\d+(?:,\d{3})*(?:\.\d{1,2})?)", goal_amount_and_duration)
@@ -53,20 +44,14 @@ def goal_tracker(goal_amount_and_duration: str) -> str:
         required_monthly_saving = goal_amount / months
 
         # Get user data
-        expenses_res = requests.get(f"{BASE_URL}/expenses/{user_id}/", headers=headers, timeout=120)
-        if expenses_res.status_code != 200:
-            logger.error(f"Failed to fetch expenses: {expenses_res.status_code} - {expenses_res.text}")
-            return f"❌ Error fetching expenses: {expenses_res.status_code}"
-        expenses = expenses_res.json()
-
-        incomes_res = requests.get(f"{BASE_URL}/incomes/{user_id}/", headers=headers, timeout=30)
-        if incomes_res.status_code != 200:
-            logger.error(f"Failed to fetch incomes: {incomes_res.status_code} - {incomes_res.text}")
-            return f"❌ Error fetching incomes: {incomes_res.status_code}"
-        incomes = incomes_res.json()
-
-        total_income = sum(float(i["Amount"]) for i in incomes)
-        total_expense = sum(float(e["Amount"]) for e in expenses)
+        try:
+            summary = fetch_summary(user_id, auth_token)
+        except DataAccessError as e:
+            logger.error(f"Failed to fetch transaction summary: {e}")
+            return f"❌ Error fetching expenses: {e.status_code or e}"
+
+        total_income = float(summary["incomes"]["total"])
+        total_expense = float(summary["expenses"]["total"])
         current_savings = total_income - total_expense
 
         savings_status = "✅ On track!" if current_savings >= required_monthly_saving else "⚠️ Behind schedule!"
@@ -1,15 +1,9 @@
 import uuid
-import requests
 from datetime import datetime, timedelta # Import timedelta for 'yesterday'
 from langchain_core.tools import tool
 from django.conf import settings
 from api.langchainAgent.context import get_current_user_info
-import os
-
-
-# IMPORTANT: Ensure BASE_URL is correctly defined, preferably from settings.
-# e.g., settings.API_BASE_URL = 'http://localhost:8000/api'
-BASE_URL = os.getenv("BACKEND_API_BASE_URL", "http://localhost:8000/")
+from api.langchainAgent.data_access import DataAccessError, fetch_summary
 
 
 def generate_unique_id():
@@ -30,56 +24,28 @@ def optimize_budgets(query: str) -> str:
     if not user_id or not auth_token:
         return "❌ Missing user authentication. Please log in."
 
-    # Format token as per your Django/Firebase auth middleware
-    headers = {"Authorization": f"Bearer {auth_token}"}
-
-    def safe_get(url):
-        try:
-            response = requests.get(url, headers=headers, timeout=120)
-            if response.status_code == 401:
-                return {"error": "unauthorized"}
-            if response.status_code >= 400:
-                return {"error": f"API error {response.status_code}"}
-            try:
-                return response.json()
-            except Exception as e:
-                return {"error": f"Failed to parse JSON response: {str(e)}"}
-        except Exception as e:
-            return {"error": str(e)}
-
-    # Fetch data
-    expenses = safe_get(f"{BASE_URL}/expenses/{user_id}/")
-    income = safe_get(f"{BASE_URL}/incomes/{user_id}/")
-
-    # Handle unauthorized
-    if "error" in expenses:
-        return "❌ Unauthorized access to expenses. Please check your login/token."
-    if "error" in income:
-        return "❌ Unauthorized access to income. Please check your login/token."
-
-    if not income:
-        return "⚠️ No income records found. Please add income data first."
+    try:
+        summary = fetch_summary(user_id, auth_token)
+    except DataAccessError as e:
+        if e.status_code == 401:
+            return "❌ Unauthorized access to expenses. Please check your login/token."
+        return f"❌ Unable to fetch budget summary: {str(e)}"
 
     # Calculate totals
     try:
-        total_income = sum(float(item["Amount"]) for item in income)
+        income = summary["incomes"]
+        if not income["count"]:
+            return "⚠️ No income records found. Please add income data first."
+        total_income = float(income["total"])
     except (KeyError, ValueError, TypeError) as e:
         return f"❌ Error parsing income data: {str(e)}"
     try:
-        total_expense = sum(float(item["Amount"]) for item in expenses)
+        total_expense = float(summary["expenses"]["total"])
+        category_totals = {tag: float(amt) for tag, amt in summary["expenses"].get("tags", {}).items()}
     except (KeyError, ValueError, TypeError) as e:
         return f"❌ Error parsing expense data: {str(e)}"
     savings = total_income - total_expense
 
-    # Categorize expenses
-    category_totals = {}
-    for exp in expenses:
-        try:
-            tag = exp.get("Tag", "Other")
-            category_totals[tag] = category_totals.get(tag, 0) + float(exp.get("Amount", 0))
-        except (KeyError, ValueError, TypeError) as e:
-            continue
-
     # Format response
     response = f"""
 📊 **Budget Summary**:
@@ -1,19 +1,14 @@
 import os
+import re
 import logging
 import traceback
 from dotenv import load_dotenv
-from pymongo import MongoClient
 
-from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
-from langchain_mongodb.vectorstores import MongoDBAtlasVectorSearch
-from langgraph.checkpoint.memory import MemorySaver
-from langmem import create_manage_memory_tool, create_search_memory_tool
-from langgraph.prebuilt import create_react_agent
+from api.utils.lazy import lazy
 
-from api.langchainAgent.Tools.add_transaction_tool import add_transaction
-from api.langchainAgent.Tools.optimize_budget import optimize_budgets
-from api.langchainAgent.Tools.goal_tracker_tool import goal_tracker
-from api.langchainAgent.Tools.financial_insight_tool import financial_insight
+# Heavy clients (Gemini, MongoClient, embeddings, vector store, the compiled graph) are
+# lazy singletons: built, and their libraries imported, on first use. Importing this
+# module stays cheap for workers and commands that never run the agent.
 
 # ✅ Load environment variables
 load_dotenv()
@@ -45,96 +40,218 @@ You have access to tools for adding transactions, budgeting, insights, memory se
 📌 Keep responses friendly, helpful, and financially aware.
 """
 
-# ✅ Google API keys setup
+# ✅ Google API keys setup: GOOGLE_API_KEY_1, GOOGLE_API_KEY_2, ... (any number)
 google_api_keys = [
-    os.getenv("GOOGLE_API_KEY_1"),
-    os.getenv("GOOGLE_API_KEY_2"),
-    os.getenv("GOOGLE_API_KEY_3"),
+    os.environ[name]
+    for name in sorted(
+        (name for name in os.environ if re.fullmatch(r"GOOGLE_API_KEY_\d+", name)),
+        key=lambda name: int(name.rsplit("_", 1)[1]),
+    )
+    if os.environ[name]
 ]
-google_api_keys = [key for key in google_api_keys if key]
 if not google_api_keys:
     logging.error("Missing GOOGLE_API_KEY environment variables.")
     raise ValueError("Missing GOOGLE_API_KEY environment variables.")
 
-# ✅ LLM failover
-def get_gemini_llm_with_failover():
-    last_exception = None
-    for api_key in google_api_keys:
-        try:
-            llm = ChatGoogleGenerativeAI(
-                model="gemini-2.0-flash",
-                google_api_key=api_key,
-                temperature=0.2,
-                verbose=True,
-            )
-            logging.info(f"✅ Gemini model loaded with key ending in {api_key[-4:]}")
-            return llm
-        except Exception as e:
-            if "quota" in str(e).lower() or "resource exhausted" in str(e).lower():
-                logging.warning(f"⚠️ Quota issue with API key ending in {api_key[-4:]}, trying next...")
-                continue
-            last_exception = e
-    raise Exception("❌ All Gemini API keys exhausted.") if last_exception is None else last_exception
-
-# ✅ Load LLM
-llm = get_gemini_llm_with_failover()
+# ✅ LLM calls spread over every key; a throttled key cools down while the call moves on
+@lazy("gemini-llm")
+def get_llm():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from api.langchainAgent.instrumentation import metrics_callbacks, tracing_callbacks
+    from api.langchainAgent.key_pool import GeminiKeyPool, pooled_chat_model, single_attempt_gemini_calls
+
+    # The pool does the retrying: a client that retried a 429 would keep hitting the same exhausted key
+    single_attempt_gemini_calls()
+    pool = GeminiKeyPool(
+        google_api_keys,
+        cooldown=float(os.getenv("GEMINI_KEY_COOLDOWN_SECONDS", "30")),
+        max_cooldown=float(os.getenv("GEMINI_KEY_MAX_COOLDOWN_SECONDS", "600")),
+        strategy=os.getenv("GEMINI_KEY_STRATEGY", "round_robin"),
+    )
+    llm = pooled_chat_model(pool, lambda api_key: ChatGoogleGenerativeAI(
+        model="gemini-2.0-flash",
+        google_api_key=api_key,
+        temperature=0.2,
+        max_retries=0,
+        verbose=True,
+    ), callbacks=[metrics_callbacks, tracing_callbacks])
+    logging.info(f"✅ Gemini model loaded with {len(pool.states)} API key(s), {pool.strategy}")
+    return llm
+
 
 # ✅ MongoDB connection
 MONGO_URI = os.getenv("MONGO_URI")
 if not MONGO_URI:
     raise ValueError("Missing MONGO_URI environment variable.")
 
-mongo_client = MongoClient(MONGO_URI)
-mongo_collection = mongo_client["expensestracker"]["UserMemory"]
 
-# ✅ Embeddings
-embedding_fn = GoogleGenerativeAIEmbeddings(
-    model="models/embedding-001",
-    google_api_key=google_api_keys[0]
-)
+def get_mongo_client():
+    """The process-wide pooled client (mongoengine's connection when running under Django)."""
+    from api.utils.mongo import get_client
+
+    return get_client()
+
+
+# ✅ Embeddings, cached by content hash so repeated texts are embedded once
+@lazy("gemini-embeddings")
+def get_embeddings():
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    from api.langchainAgent.embedding_cache import CachedEmbeddings
+
+    return CachedEmbeddings(
+        GoogleGenerativeAIEmbeddings(
+            model="models/embedding-001",
+            google_api_key=google_api_keys[0]
+        ),
+        get_mongo_client()["expensestracker"]["EmbeddingCache"],
+        maxsize=int(os.getenv("EMBEDDING_CACHE_SIZE", "4096")),
+        ttl_seconds=int(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", str(30 * 24 * 3600))),
+    )
+
 
 # ✅ Vector memory store
-vectorstore = MongoDBAtlasVectorSearch(
-    collection=mongo_collection,
-    embedding=embedding_fn,
-    index_name="default"
-)
-
-store = vectorstore
-checkpointer = MemorySaver()
-
-# ✅ Per-user memory tools
-def get_user_tools(user_id):
-    namespace = (user_id,)
-    return [
-        create_manage_memory_tool(namespace=namespace),
-        create_search_memory_tool(namespace=namespace)
-    ]
+@lazy("vector-store")
+def get_vectorstore():
+    from langchain_mongodb.vectorstores import MongoDBAtlasVectorSearch
+
+    return MongoDBAtlasVectorSearch(
+        collection=get_mongo_client()["expensestracker"]["UserMemory"],
+        embedding=get_embeddings(),
+        index_name="default"
+    )
+
+
+# ✅ Conversation state in MongoDB: capped per thread, idle threads expire via a TTL index
+@lazy("agent-checkpointer")
+def get_checkpointer():
+    from api.langchainAgent.checkpointer import MongoCheckpointSaver
+
+    return MongoCheckpointSaver(
+        get_mongo_client()["expensestracker"],
+        max_checkpoints_per_thread=int(os.getenv("AGENT_CHECKPOINTS_PER_THREAD", "20")),
+        ttl_seconds=int(os.getenv("AGENT_THREAD_TTL_SECONDS", str(7 * 24 * 3600))),
+    )
+
+
+# ✅ One run at a time per conversation thread: a second request waits, then gets a 409
+@lazy("agent-thread-lock")
+def get_thread_lock():
+    from api.langchainAgent.thread_lock import ThreadRunLock
+
+    return ThreadRunLock(
+        get_mongo_client()["expensestracker"]["AgentThreadLocks"],
+        lease_seconds=int(os.getenv("AGENT_THREAD_LEASE_SECONDS", "300")),
+        wait_seconds=float(os.getenv("AGENT_THREAD_WAIT_SECONDS", "30")),
+    )
+
+
+MAX_HISTORY_MESSAGES = int(os.getenv("AGENT_MAX_HISTORY_MESSAGES", "40"))
+
+
+# ✅ Replies to repeated questions, reused while the user's data is unchanged
+@lazy("agent-response-cache")
+def get_response_cache():
+    from api.langchainAgent.response_cache import SemanticResponseCache
 
+    # Embeddings are only built when a lookup first needs a vector
+    return SemanticResponseCache(
+        lambda text: get_embeddings().embed_query(text),
+        get_mongo_client()["expensestracker"]["AgentResponseCache"],
+        threshold=float(os.getenv("AGENT_CACHE_THRESHOLD", "0.95")),
+        ttl_seconds=int(os.getenv("AGENT_CACHE_TTL_SECONDS", "3600")),
+        maxsize=int(os.getenv("AGENT_CACHE_SIZE", "2048")),
+    )
+
+
+# ✅ Keep each thread's stored history bounded (starts on a human turn so tool calls stay paired)
+def trim_history(state):
+    from langchain_core.messages import RemoveMessage, trim_messages
+    from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+    messages = state["messages"]
+    if len(messages) <= MAX_HISTORY_MESSAGES:
+        return {}
+    trimmed = trim_messages(
+        messages,
+        strategy="last",
+        token_counter=len,
+        max_tokens=MAX_HISTORY_MESSAGES,
+        start_on="human",
+    )
+    return {"messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), *trimmed]}
+
+# ✅ Memory tools, scoped per user at run time: "{user_id}" is filled from config["configurable"]
+MEMORY_NAMESPACE = ("{user_id}",)
+
+
+def get_agent_tools():
+    from langmem import create_manage_memory_tool, create_search_memory_tool
+    from api.langchainAgent.Tools.add_transaction_tool import add_transaction
+    from api.langchainAgent.Tools.optimize_budget import optimize_budgets
+    from api.langchainAgent.Tools.goal_tracker_tool import goal_tracker
+    from api.langchainAgent.Tools.financial_insight_tool import financial_insight
+    from api.langchainAgent.instrumentation import metrics_callbacks, tracing_callbacks
 
-# ✅ Create agent
-def create_user_agent(user_id: str):
     tools = [
         add_transaction,
         optimize_budgets,
         goal_tracker,
         financial_insight,
-        *get_user_tools(user_id)
+        create_manage_memory_tool(namespace=MEMORY_NAMESPACE),
+        create_search_memory_tool(namespace=MEMORY_NAMESPACE),
     ]
+    # Per-tool durations for /metrics and spans for /traces; the handlers are local to
+    # each tool, so they fire once per run
+    for agent_tool in tools:
+        agent_tool.callbacks = [metrics_callbacks, tracing_callbacks]
+    return tools
+
+
+# ✅ Compile the agent graph once per worker; users are separated by agent_config()
+@lazy("agent-graph")
+def get_agent():
+    from langgraph.prebuilt import create_react_agent
 
     try:
         agent = create_react_agent(
-            model=llm,
-            tools=tools,
+            model=get_llm(),
+            tools=get_agent_tools(),
             prompt=AGENT_PROMPT,
-            store=store,
-            checkpointer=checkpointer
+            store=get_vectorstore(),
+            checkpointer=get_checkpointer(),
+            pre_model_hook=trim_history,
         )
-        logging.info(f"✅ Agent created for user {user_id}")
+        logging.info("✅ Agent graph compiled")
         return agent
     except Exception as e:
-        logging.error(f"[Agent Creation Error] user_id={user_id} | {e}")
+        logging.error(f"[Agent Creation Error] {e}")
         traceback.print_exc()
         raise RuntimeError("🚨 Agent creation failed. Please try again later.")
 
 
+def agent_config(user_id: str) -> dict:
+    """Runnable config carrying the per-user parts: conversation thread and memory namespace."""
+    return {"configurable": {"thread_id": user_id, "user_id": user_id}}
+
+
+def _cached_turn(user_input: str, response: str) -> dict:
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    return {"messages": [HumanMessage(content=user_input), AIMessage(content=response)]}
+
+
+# ✅ A reply served from the response cache still goes into the thread, so follow-ups see it
+def record_cached_turn(agent, config, user_input: str, response: str):
+    try:
+        with get_thread_lock().hold(config["configurable"]["thread_id"]):
+            agent.update_state(config, _cached_turn(user_input, response), as_node="agent")
+    except Exception as e:
+        logging.warning(f"Could not record cached reply in the conversation: {e}")
+
+
+async def arecord_cached_turn(agent, config, user_input: str, response: str):
+    try:
+        async with get_thread_lock().ahold(config["configurable"]["thread_id"]):
+            await agent.aupdate_state(config, _cached_turn(user_input, response), as_node="agent")
+    except Exception as e:
+        logging.warning(f"Could not record cached reply in the conversation: {e}")
@@ -0,0 +1,230 @@
+"""
+MongoDB-backed LangGraph checkpointer.
+
+Replaces MemorySaver so conversation state survives restarts and worker RSS
+does not grow with every user that chats:
+- only the newest `max_checkpoints_per_thread` checkpoints of a thread are kept;
+- every document carries `updated_at` with a TTL index, so threads idle for
+  longer than `ttl_seconds` are evicted by MongoDB itself;
+- checkpoints and writes are stored with LangGraph's msgpack (ormsgpack) serde.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Iterator, Optional, Sequence
+
+from bson.binary import Binary
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+
+class MongoCheckpointSaver(BaseCheckpointSaver):
+
+    def __init__(
+        self,
+        database,
+        *,
+        checkpoint_collection: str = "AgentCheckpoints",
+        writes_collection: str = "AgentCheckpointWrites",
+        max_checkpoints_per_thread: int = 20,
+        ttl_seconds: int = 7 * 24 * 3600,
+        serde=None,
+    ):
+        super().__init__(serde=serde)
+        self.checkpoints = database[checkpoint_collection]
+        self.writes = database[writes_collection]
+        self.max_checkpoints_per_thread = max_checkpoints_per_thread
+        self.ttl_seconds = ttl_seconds
+        self._indexes_ready = False
+
+    def setup(self):
+        """Create the lookup and TTL indexes (idempotent; runs on first use)."""
+        if self._indexes_ready:
+            return
+        for collection in (self.checkpoints, self.writes):
+            collection.create_index([("thread_id", ASCENDING), ("checkpoint_ns", ASCENDING), ("checkpoint_id", DESCENDING)])
+            collection.create_index("updated_at", expireAfterSeconds=self.ttl_seconds)
+        self._indexes_ready = True
+
+    # -- helpers -----------------------------------------------------------
+
+    def _dump(self, obj):
+        type_, data = self.serde.dumps_typed(obj)
+        return {"type": type_, "data": Binary(data)}
+
+    def _load(self, stored):
+        return self.serde.loads_typed((stored["type"], bytes(stored["data"])))
+
+    @staticmethod
+    def _config(thread_id, checkpoint_ns, checkpoint_id):
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}}
+
+    def _to_tuple(self, doc) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id = doc["thread_id"], doc["checkpoint_ns"], doc["checkpoint_id"]
+        writes = self.writes.find(
+            {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}
+        ).sort([("task_id", ASCENDING), ("idx", ASCENDING)])
+        return CheckpointTuple(
+            config=self._config(thread_id, checkpoint_ns, checkpoint_id),
+            checkpoint=self._load(doc["checkpoint"]),
+            metadata=self._load(doc["metadata"]),
+            parent_config=(
+                self._config(thread_id, checkpoint_ns, doc["parent_checkpoint_id"])
+                if doc.get("parent_checkpoint_id") else None
+            ),
+            pending_writes=[(w["task_id"], w["channel"], self._load(w["value"])) for w in writes],
+        )
+
+    def _prune(self, thread_id, checkpoint_ns):
+        stale = [
+            doc["checkpoint_id"]
+            for doc in self.checkpoints.find(
+                {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns}, {"checkpoint_id": 1}
+            ).sort("checkpoint_id", DESCENDING).skip(self.max_checkpoints_per_thread)
+        ]
+        if stale:
+            query = {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": {"$in": stale}}
+            self.checkpoints.delete_many(query)
+            self.writes.delete_many(query)
+
+    # -- BaseCheckpointSaver -----------------------------------------------
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        self.setup()
+        query = {
+            "thread_id": config["configurable"]["thread_id"],
+            "checkpoint_ns": config["configurable"].get("checkpoint_ns", ""),
+        }
+        if checkpoint_id := get_checkpoint_id(config):
+            query["checkpoint_id"] = checkpoint_id
+        doc = self.checkpoints.find_one(query, sort=[("checkpoint_id", DESCENDING)])
+        return self._to_tuple(doc) if doc else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        self.setup()
+        query = {}
+        if config:
+            query["thread_id"] = config["configurable"]["thread_id"]
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                query["checkpoint_ns"] = checkpoint_ns
+            if checkpoint_id := get_checkpoint_id(config):
+                query["checkpoint_id"] = checkpoint_id
+        if before and (before_id := get_checkpoint_id(before)):
+            query.setdefault("checkpoint_id", {})
+            if isinstance(query["checkpoint_id"], dict):
+                query["checkpoint_id"]["$lt"] = before_id
+
+        for doc in self.checkpoints.find(query).sort("checkpoint_id", DESCENDING):
+            if limit is not None and limit <= 0:
+                break
+            checkpoint_tuple = self._to_tuple(doc)
+            if filter and not all(checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            yield checkpoint_tuple
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        self.setup()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = checkpoint["id"]
+        self.checkpoints.replace_one(
+            {"_id": f"{thread_id}|{checkpoint_ns}|{checkpoint_id}"},
+            {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+                "parent_checkpoint_id": config["configurable"].get("checkpoint_id"),
+                "checkpoint": self._dump(checkpoint),
+                "metadata": self._dump(get_checkpoint_metadata(config, metadata)),
+                "updated_at": datetime.now(timezone.utc),
+            },
+            upsert=True,
+        )
+        self._prune(thread_id, checkpoint_ns)
+        return self._config(thread_id, checkpoint_ns, checkpoint_id)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.setup()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        now = datetime.now(timezone.utc)
+        operations = []
+        for idx, (channel, value) in enumerate(writes):
+            write_idx = WRITES_IDX_MAP.get(channel, idx)
+            doc = {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+                "task_id": task_id,
+                "task_path": task_path,
+                "idx": write_idx,
+                "channel": channel,
+                "value": self._dump(value),
+                "updated_at": now,
+            }
+            # Special channels (errors, interrupts) overwrite; regular writes are only set once.
+            operator = "$set" if write_idx < 0 else "$setOnInsert"
+            operations.append(UpdateOne(
+                {"_id": f"{thread_id}|{checkpoint_ns}|{checkpoint_id}|{task_id}|{write_idx}"},
+                {operator: doc},
+                upsert=True,
+            ))
+        if operations:
+            self.writes.bulk_write(operations, ordered=False)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.checkpoints.delete_many({"thread_id": thread_id})
+        self.writes.delete_many({"thread_id": thread_id})
+
+    # -- async: the sync driver runs in a worker thread ----------------------
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        tuples = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for checkpoint_tuple in tuples:
+            yield checkpoint_tuple
+
+    async def aput(self, config, checkpoint, metadata, new_versions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
@@ -1,9 +1,67 @@
 # context.py
-_current_user_info = {}
+"""
+Request-scoped user context for the agent tools.
+
+The current user and auth token live in a ContextVar, so concurrent requests on one
+worker (gthread threads, ASGI tasks) never see each other's identity:
+- each thread has its own context, and `user_context` resets the value when the
+  request ends, so a reused thread does not carry the last user into the next request;
+- asyncio tasks copy the context when they are created (an ASGI request is one task),
+  as do `asyncio.to_thread`, asgiref's sync_to_async and LangChain/LangGraph's executors,
+  so tool calls inherit it;
+- plain `threading.Thread`, `executor.submit` and `loop.run_in_executor` do not
+  copy it: wrap the callable with `bind_context`;
+- a streamed response is iterated after the view has returned: wrap the generator
+  with `iterate_in_context`.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from functools import wraps
+
+_current_user_info = ContextVar("current_user_info", default={})
 
 def set_user_info(user_id: str, token: str):
-    _current_user_info["user_id"] = user_id
-    _current_user_info["auth_token"] = token
+    """Set the user for the rest of the current context (an ASGI request's task)."""
+    return _current_user_info.set({"user_id": user_id, "auth_token": token})
 
 def get_current_user_info():
-    return _current_user_info.get("user_id"), _current_user_info.get("auth_token")
+    user_info = _current_user_info.get()
+    return user_info.get("user_id"), user_info.get("auth_token")
+
+@contextmanager
+def user_context(user_id: str, token: str):
+    """The user for the duration of the block; the previous value comes back afterwards."""
+    reset_token = set_user_info(user_id, token)
+    try:
+        yield
+    finally:
+        _current_user_info.reset(reset_token)
+
+def bind_context(func):
+    """
+    `func` bound to the caller's current context, for threads and executors that do
+    not copy it. Every call runs in its own copy, so concurrent calls are safe.
+    """
+    context = copy_context()
+
+    @wraps(func)
+    def run(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+
+    return run
+
+def iterate_in_context(iterable):
+    """Iterate `iterable` (e.g. an SSE generator) in the context current at this call."""
+    # Captured now, not on the first next(): that may come after the view has returned
+    context = copy_context()
+    iterator = iter(iterable)
+
+    def steps():
+        while True:
+            try:
+                item = context.run(next, iterator)
+            except StopIteration:
+                return
+            yield item
+
+    return steps()
@@ -0,0 +1,112 @@
+"""
+Data access for the agent tools.
+
+Inside the Django process the tools call api.repository directly, so a tool
+runs inside the request that was already authenticated instead of holding a
+second worker and verifying the Firebase token again. The HTTP loopback to
+BACKEND_API_BASE_URL is kept as a fallback for reads, and is used for everything
+outside Django or with AGENT_DATA_ACCESS=http.
+"""
+import os
+import logging
+import requests
+
+from api import repository
+from api.utils import tracing
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = os.getenv("BACKEND_API_BASE_URL", "http://localhost:8000/")
+DATA_ACCESS_MODE = os.getenv("AGENT_DATA_ACCESS", "direct").lower()
+
+# kind -> endpoint used to create agent transactions over HTTP
+CREATE_ENDPOINTS = {
+    "expenses": "expenses/add/",
+    "incomes": "income/add/",
+}
+
+
+class DataAccessError(Exception):
+    """Raised when transactions cannot be read or written. status_code is set for HTTP failures."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def use_direct_access() -> bool:
+    return DATA_ACCESS_MODE != "http" and repository.is_available()
+
+
+def _headers(auth_token):
+    return {"Authorization": f"Bearer {auth_token}"}
+
+
+def _http_get_json(url, auth_token, timeout):
+    try:
+        with tracing.span("http", f"GET {url.split('?')[0]}"):
+            res = requests.get(url, headers=_headers(auth_token), timeout=timeout)
+    except requests.exceptions.RequestException as e:
+        raise DataAccessError(str(e))
+    if res.status_code != 200:
+        logger.error(f"API call failed: {res.status_code} - {res.text}")
+        raise DataAccessError(f"API error {res.status_code}", status_code=res.status_code)
+    try:
+        return res.json()
+    except Exception as e:
+        raise DataAccessError(f"Failed to parse JSON response: {str(e)}")
+
+
+def fetch_transactions(kind: str, user_id: str, auth_token: str, fields=None, timeout: int = 120) -> list:
+    """All transactions of `kind` ("expenses" or "incomes") for the user, optionally only `fields`."""
+    if use_direct_access():
+        try:
+            return repository.list_user_transactions(kind, user_id, fields=fields)
+        except Exception as e:
+            logger.warning(f"Direct {kind} lookup failed, falling back to HTTP: {e}")
+    # all=true: the whole history as one array rather than the default first page
+    query = f"?all=true&fields={','.join(fields)}" if fields else "?all=true"
+    return _http_get_json(f"{BASE_URL}/{kind}/{user_id}/{query}", auth_token, timeout)
+
+
+def fetch_summary(user_id: str, auth_token: str, start=None, end=None, timeout: int = 120) -> dict:
+    """Aggregated totals (see repository.summarize_transactions) for an optional inclusive date range."""
+    if use_direct_access():
+        try:
+            return repository.summarize_transactions(user_id, start, end)
+        except Exception as e:
+            logger.warning(f"Direct summary lookup failed, falling back to HTTP: {e}")
+
+    params = []
+    if start:
+        params.append(f"start={start:%Y-%m-%d}")
+    if end:
+        params.append(f"end={end:%Y-%m-%d}")
+    query = f"?{'&'.join(params)}" if params else ""
+    return _http_get_json(f"{BASE_URL}/summary/{user_id}/{query}", auth_token, timeout)
+
+
+def create_transaction(kind: str, payload: dict, auth_token: str, timeout: int = 15) -> dict:
+    """Create an agent transaction, validated the same way as the /expenses/add/ and /income/add/ views."""
+    if use_direct_access():
+        # No HTTP fallback for writes: the insert may already be saved when a later
+        # step (rollups, serialization) fails, and a retry would store it twice
+        try:
+            return repository.create_llm_transaction(kind, dict(payload))
+        except repository.TransactionValidationError as e:
+            raise DataAccessError(f"{e} {e.errors}", status_code=400)
+        except Exception as e:
+            logger.error(f"Direct {kind} insert failed: {e}")
+            raise DataAccessError(f"Could not save the {kind[:-1]}: {e}")
+
+    try:
+        with tracing.span("http", f"POST {BASE_URL}/{CREATE_ENDPOINTS[kind]}"):
+            response = requests.post(f"{BASE_URL}/{CREATE_ENDPOINTS[kind]}", headers=_headers(auth_token), json=payload, timeout=timeout)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        status_code = getattr(e.response, "status_code", None)
+        raise DataAccessError(str(e), status_code=status_code)
+    try:
+        return response.json()
+    except ValueError:
+        return {}
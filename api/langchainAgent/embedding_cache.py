@@ -0,0 +1,151 @@
+"""
+Content-hash cache in front of an Embeddings model.
+
+The langmem memory tools and the response cache embed the same strings over and
+over: repeated queries, re-saved facts. Vectors are keyed on an xxhash of
+(model, task, text). Queries and documents are embedded with different task types,
+so the task is part of the key. Lookups go through an in-process LRU first, then a
+Mongo collection shared by all workers. The misses of an embed_documents call go
+to the model in one batched request.
+
+Stored vectors expire `ttl_seconds` after they were written (30 days by default), via
+a TTL index on CreatedAt created on first use, so the collection does not keep every
+string ever embedded. ttl_seconds=None keeps them forever.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import xxhash
+from langchain_core.embeddings import Embeddings
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+
+def embedding_key(model: str, task: str, text: str) -> str:
+    return xxhash.xxh3_128_hexdigest(f"{model}\0{task}\0{text}".encode("utf-8"))
+
+
+class CachedEmbeddings(Embeddings):
+
+    def __init__(self, embeddings: Embeddings, collection=None, maxsize=4096, model=None, ttl_seconds=30 * 24 * 3600):
+        self.embeddings = embeddings
+        self.collection = collection
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.model = model or getattr(embeddings, "model", type(embeddings).__name__)
+        self._vectors = OrderedDict()  # key -> vector, least recently used first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stored_hits = 0
+        self.misses = 0
+        self._indexes_ready = False
+
+    # -- tiers ---------------------------------------------------------------
+
+    def _from_memory(self, keys):
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._vectors.get(key)
+                if vector is not None:
+                    self._vectors.move_to_end(key)
+                    found[key] = vector
+            self.hits += len(found)
+        return found
+
+    def _remember(self, vectors: dict):
+        with self._lock:
+            for key, vector in vectors.items():
+                self._vectors[key] = vector
+                self._vectors.move_to_end(key)
+            while len(self._vectors) > self.maxsize:
+                self._vectors.popitem(last=False)
+
+    def _setup(self):
+        if self._indexes_ready or self.ttl_seconds is None:
+            return
+        self.collection.create_index("CreatedAt", expireAfterSeconds=int(self.ttl_seconds))
+        self._indexes_ready = True
+
+    def _from_store(self, keys):
+        if self.collection is None or not keys:
+            return {}
+        try:
+            self._setup()
+            found = {document["_id"]: document["Vector"] for document in self.collection.find({"_id": {"$in": list(keys)}})}
+        except Exception as e:
+            logger.warning("Embedding cache: backing store unavailable: %s", e)
+            return {}
+        with self._lock:
+            self.stored_hits += len(found)
+        return found
+
+    def _store(self, vectors: dict):
+        if self.collection is None or not vectors:
+            return
+        now = datetime.now(timezone.utc)
+        try:
+            self._setup()
+            self.collection.insert_many(
+                [{"_id": key, "Model": self.model, "Vector": vector, "CreatedAt": now} for key, vector in vectors.items()],
+                ordered=False,
+            )
+        except BulkWriteError:
+            pass  # another worker stored some of them first
+        except Exception as e:
+            logger.warning("Embedding cache: could not persist vectors: %s", e)
+
+    def _lookup(self, keys):
+        found = self._from_memory(keys)
+        stored = self._from_store([key for key in keys if key not in found])
+        self._remember(stored)
+        found.update(stored)
+        return found
+
+    # -- Embeddings ----------------------------------------------------------
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [embedding_key(self.model, "document", text) for text in texts]
+        found = self._lookup(set(keys))
+
+        missing = {}  # key -> text, one entry per distinct text
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        if missing:
+            with self._lock:
+                self.misses += len(missing)
+            computed = dict(zip(missing, self.embeddings.embed_documents(list(missing.values()))))
+            self._remember(computed)
+            self._store(computed)
+            found.update(computed)
+
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        key = embedding_key(self.model, "query", text)
+        found = self._lookup([key])
+        if key in found:
+            return found[key]
+
+        with self._lock:
+            self.misses += 1
+        vector = self.embeddings.embed_query(text)
+        self._remember({key: vector})
+        self._store({key: vector})
+        return vector
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.stored_hits + self.misses
+            return {
+                "size": len(self._vectors),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "stored_hits": self.stored_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.stored_hits) / lookups if lookups else 0.0,
+            }
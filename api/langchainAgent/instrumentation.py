@@ -0,0 +1,138 @@
+# instrumentation.py
+"""
+LangChain callbacks for observability:
+- MetricsCallbackHandler feeds the /metrics registry: LLM call latency and token
+  counts, and the duration of each tool run;
+- TracingCallbackHandler adds LLM and tool spans to the traced request's span tree
+  (api.utils.tracing).
+The handlers are attached to the chat model and to the agent's tools (not to a run's
+config), so casual replies are covered too and nothing is recorded twice.
+"""
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from api.utils import tracing
+from api.utils.metrics import registry
+
+LLM_LATENCY = registry.histogram(
+    "llm_call_duration_seconds", "Chat model call latency (all key retries included).", ("outcome",),
+)
+LLM_TOKENS = registry.counter("llm_tokens_total", "Tokens reported by the chat model.", ("type",))
+TOOL_DURATION = registry.histogram("agent_tool_duration_seconds", "Agent tool run time by tool.", ("tool", "outcome"))
+
+
+def usage_tokens(response) -> dict:
+    """input/output token totals of an LLMResult, from each generation's usage_metadata."""
+    totals = {"input": 0, "output": 0}
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            totals["input"] += usage.get("input_tokens", 0)
+            totals["output"] += usage.get("output_tokens", 0)
+    return totals
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    # Only timestamps and counters: cheap enough to run on the event loop
+    run_inline = True
+
+    def __init__(self):
+        self._started = {}  # run_id -> (perf_counter, tool name or None)
+
+    def _finish(self, run_id):
+        start, name = self._started.pop(run_id, (None, None))
+        return (time.perf_counter() - start if start is not None else None), name
+
+    # -- LLM ---------------------------------------------------------------------
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = (time.perf_counter(), None)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._started[run_id] = (time.perf_counter(), None)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        seconds, _ = self._finish(run_id)
+        if seconds is not None:
+            LLM_LATENCY.observe(seconds, "ok")
+        for kind, count in usage_tokens(response).items():
+            if count:
+                LLM_TOKENS.inc(kind, amount=count)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        seconds, _ = self._finish(run_id)
+        if seconds is not None:
+            LLM_LATENCY.observe(seconds, "error")
+
+    # -- tools -------------------------------------------------------------------
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._started[run_id] = (time.perf_counter(), (serialized or {}).get("name") or kwargs.get("name") or "unknown")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        seconds, name = self._finish(run_id)
+        if seconds is not None:
+            TOOL_DURATION.observe(seconds, name, "ok")
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        seconds, name = self._finish(run_id)
+        if seconds is not None:
+            TOOL_DURATION.observe(seconds, name, "error")
+
+
+metrics_callbacks = MetricsCallbackHandler()
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    # Inline so a tool span becomes the current span in the tool's own context, where
+    # its Mongo commands and HTTP calls look for their parent
+    run_inline = True
+
+    def __init__(self):
+        self._spans = {}  # run_id -> (span, span that was current before it)
+
+    def _start(self, run_id, kind, name, attributes, current=False):
+        parent = tracing.current_span()
+        if parent is None:
+            return
+        span = parent.child(kind, name, attributes)
+        self._spans[run_id] = (span, parent)
+        if current:
+            tracing.set_current_span(span)
+
+    def _end(self, run_id, error=None, restore=False, **attributes):
+        span, parent = self._spans.pop(run_id, (None, None))
+        if span is None:
+            return
+        span.attributes.update(attributes)
+        span.finish(error)
+        if restore:
+            tracing.set_current_span(parent)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, "llm", "chat_model", {"messages": len(messages[0]) if messages else 0})
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, "llm", "llm", {"prompts": len(prompts)})
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        tokens = usage_tokens(response)
+        self._end(run_id, input_tokens=tokens["input"], output_tokens=tokens["output"])
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        # Only the input's size: traces are kept in memory and must not hold user data
+        self._start(run_id, "tool", name, {"input_chars": len(input_str or "")}, current=True)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id, restore=True)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error, restore=True)
+
+
+tracing_callbacks = TracingCallbackHandler()
@@ -0,0 +1,227 @@
+"""
+Gemini API keys as a pool, with health tracking and circuit breaking.
+
+Building a ChatGoogleGenerativeAI client never touches quota, so trying keys at
+construction time always settled on the first one. Here every call picks a key:
+round-robin over the healthy keys, or the one throttled least recently. A 429 /
+resource-exhausted answer opens that key's circuit for a cooldown that doubles with
+each consecutive throttle (up to a cap), and the same call is retried on the next
+healthy key. Once the cooldown has passed the key gets traffic again; a success
+closes the circuit. Only when every key is cooling down does the call fail.
+"""
+import itertools
+import logging
+import threading
+import time
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from pydantic import ConfigDict
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("round_robin", "least_throttled")
+
+
+class KeysExhausted(Exception):
+    """Every key's circuit is open. The message reads as a quota error to the views."""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"Resource exhausted: all Gemini API keys are rate limited, retry in {retry_after:.0f}s")
+
+
+def is_throttled(e: Exception) -> bool:
+    """A 429 / resource-exhausted error from Gemini (google.api_core's ResourceExhausted has code 429)."""
+    if getattr(e, "code", None) == 429:
+        return True
+    message = str(e).lower()
+    return "quota" in message or "resource exhausted" in message
+
+
+class KeyState:
+    """Health of one API key. Only the last four characters are ever logged."""
+
+    def __init__(self, key: str, position: int):
+        self.key = key
+        self.label = f"#{position} ...{key[-4:]}"
+        self.calls = 0
+        self.throttles = 0
+        self.consecutive_throttles = 0
+        self.last_throttled = float("-inf")
+        self.open_until = float("-inf")
+
+
+class GeminiKeyPool:
+
+    def __init__(self, keys, cooldown=30.0, max_cooldown=600.0, strategy="round_robin", clock=time.monotonic):
+        if not keys:
+            raise ValueError("GeminiKeyPool needs at least one API key.")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown key strategy {strategy!r}; expected one of {', '.join(STRATEGIES)}.")
+        self.states = [KeyState(key, position) for position, key in enumerate(dict.fromkeys(keys), start=1)]
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.strategy = strategy
+        self._clock = clock
+        self._turns = itertools.count()
+        self._lock = threading.Lock()
+
+    def acquire(self, exclude=()) -> KeyState:
+        """A healthy key not in `exclude` (keys already tried for this call); KeysExhausted if there is none."""
+        with self._lock:
+            now = self._clock()
+            healthy = [state for state in self.states if state.open_until <= now and state.key not in exclude]
+            if not healthy:
+                waiting = [state.open_until - now for state in self.states if state.open_until > now]
+                raise KeysExhausted(min(waiting, default=0.0))
+            if self.strategy == "least_throttled":
+                state = min(healthy, key=lambda state: (state.last_throttled, state.calls))
+            else:
+                state = healthy[next(self._turns) % len(healthy)]
+            state.calls += 1
+            return state
+
+    def record_success(self, state: KeyState):
+        with self._lock:
+            if state.consecutive_throttles:
+                logger.info("Gemini key %s is healthy again", state.label)
+            state.consecutive_throttles = 0
+
+    def record_throttle(self, state: KeyState):
+        with self._lock:
+            now = self._clock()
+            state.throttles += 1
+            state.consecutive_throttles += 1
+            state.last_throttled = now
+            cooldown = min(self.cooldown * 2 ** (state.consecutive_throttles - 1), self.max_cooldown)
+            state.open_until = now + cooldown
+        logger.warning("Gemini key %s throttled; circuit open for %.0fs", state.label, cooldown)
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = self._clock()
+            return {
+                state.label: {
+                    "calls": state.calls,
+                    "throttles": state.throttles,
+                    "open": state.open_until > now,
+                    "retry_in": round(max(state.open_until - now, 0.0), 1),
+                }
+                for state in self.states
+            }
+
+
+class PooledChatModel(BaseChatModel):
+    """
+    A chat model that sends each call through one client per key, chosen by the pool.
+
+    Tools are formatted once by the first client and passed through as call kwargs,
+    so `bind_tools` (create_react_agent) works the same as on a single client. A
+    stream is only retried on another key if it fails before its first chunk. The
+    clients get no run manager: callbacks (tokens included) are raised by this model.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    pool: Any
+    clients: dict  # API key -> chat model using it
+
+    @property
+    def _llm_type(self) -> str:
+        return "gemini-key-pool"
+
+    def bind_tools(self, tools, **kwargs):
+        binding = next(iter(self.clients.values())).bind_tools(tools, **kwargs)
+        return self.bind(**binding.kwargs)
+
+    def _next(self, tried: set):
+        state = self.pool.acquire(exclude=tried)
+        tried.add(state.key)
+        return state, self.clients[state.key]
+
+    def _failed(self, state, e: Exception) -> bool:
+        """True when the call should move on to the next key."""
+        if not is_throttled(e):
+            return False
+        self.pool.record_throttle(state)
+        return True
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        tried = set()
+        while True:
+            state, client = self._next(tried)
+            try:
+                result = client._generate(messages, stop=stop, **kwargs)
+            except Exception as e:
+                if self._failed(state, e):
+                    continue
+                raise
+            self.pool.record_success(state)
+            return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        tried = set()
+        while True:
+            state, client = self._next(tried)
+            try:
+                result = await client._agenerate(messages, stop=stop, **kwargs)
+            except Exception as e:
+                if self._failed(state, e):
+                    continue
+                raise
+            self.pool.record_success(state)
+            return result
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        tried = set()
+        while True:
+            state, client = self._next(tried)
+            chunks = client._stream(messages, stop=stop, **kwargs)
+            try:
+                first = next(chunks, None)
+            except Exception as e:
+                if self._failed(state, e):
+                    continue
+                raise
+            self.pool.record_success(state)
+            if first is not None:
+                yield first
+                yield from chunks
+            return
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        tried = set()
+        while True:
+            state, client = self._next(tried)
+            chunks = client._astream(messages, stop=stop, **kwargs)
+            try:
+                first = await anext(chunks, None)
+            except Exception as e:
+                if self._failed(state, e):
+                    continue
+                raise
+            self.pool.record_success(state)
+            if first is not None:
+                yield first
+                async for chunk in chunks:
+                    yield chunk
+            return
+
+
+def single_attempt_gemini_calls():
+    """
+    Make every ChatGoogleGenerativeAI call a single attempt, so a 429 reaches the pool
+    at once and the call moves to the next key. langchain_google_genai 2.1 wraps calls
+    in a tenacity retry (two attempts, ResourceExhausted included) that ignores the
+    client's max_retries, so max_retries=0 alone does not turn it off.
+    """
+    import tenacity
+    from langchain_google_genai import chat_models
+
+    chat_models._create_retry_decorator = lambda: tenacity.retry(reraise=True, stop=tenacity.stop_after_attempt(1))
+
+
+def pooled_chat_model(pool: GeminiKeyPool, client_factory, **kwargs) -> PooledChatModel:
+    """`client_factory(api_key)` builds the per-key client; clients are created once, up front."""
+    return PooledChatModel(pool=pool, clients={state.key: client_factory(state.key) for state in pool.states}, **kwargs)
@@ -0,0 +1,290 @@
+"""
+Semantic cache of agent replies.
+
+Entries are keyed on (user_id, user data version, current date, query slots,
+normalized query embedding). The date is the server's local day, the one the
+tools resolve "this month", "last week" and goal deadlines against, so an answer
+cached before midnight is not served after it. The slots are the query's amounts, months, periods and durations
+(query_slots): "save ₹5000 in 3 months" and "save ₹8000 in 6 months" embed almost
+identically but need different answers, so slots must match exactly. A new query
+on the same day at the user's current data version (api/data_version.py) with the
+same slots is a hit when:
+- the user asked the same normalized text before, which needs no embedding call; or
+- the cosine similarity of its embedding to a cached query reaches the threshold.
+
+Follow-ups that lean on the conversation ("and last month?", "what about food?")
+are never stored or served: the same text means something else after another turn.
+
+Entries expire after a TTL. The in-process tier evicts least recently used entries,
+and a Mongo collection with a TTL index lets every worker share what any one of
+them computed.
+
+Only runs that stayed read-only are stored (see is_cacheable): replaying "add ₹200
+for lunch" from the cache would silently skip the write.
+"""
+import logging
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from pymongo import ASCENDING, DESCENDING
+
+logger = logging.getLogger(__name__)
+
+# Tools that only read; a run that called anything else is never cached
+READ_ONLY_TOOLS = {"financial_insight", "optimize_budgets", "goal_tracker", "search_memory"}
+
+CacheLookup = namedtuple("CacheLookup", ["response", "vector"])
+
+
+# Amounts, month names, relative periods and duration units: the parts of a query
+# that change its answer while barely moving its embedding
+_SLOT = re.compile(
+    r"(?P<number>\d[\d,]*(?:\.\d+)?)\s*(?P<scale>k|lakhs?|lacs?|crores?|cr|thousand|million)?\b"
+    r"|\b(?P<word>(?:jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*|may"
+    r"|today|yesterday|tomorrow|tonight|this|last|next|previous|past|current|ago"
+    r"|day|days|week|weeks|weekend|fortnight|month|months|quarter|quarters|year|years"
+    r"|daily|weekly|monthly|quarterly|yearly|annual|annually"
+    r"|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|half|double)\b"
+)
+# A short message, one that continues the previous turn, or one that points back at it
+MIN_STANDALONE_WORDS = 3
+_FOLLOW_UP_START = re.compile(r"^(?:and|also|but|or|so|then|plus|same|what about|how about|what if)\b")
+_BACK_REFERENCE = re.compile(r"\b(?:(?<!is )it|that|those|these|them|they|same|again|above|else|instead)\b")
+
+
+def normalize_query(query: str) -> str:
+    query = re.sub(r"(?<=\d),(?=\d)", "", query.lower())  # "₹5,000" -> "₹5000"
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s₹$%.-]", " ", query)).strip(" .")
+
+
+def query_slots(query: str) -> tuple:
+    """The query's amounts, months, periods and durations, in order; cached answers must match them exactly."""
+    slots = []
+    for match in _SLOT.finditer(query.lower()):
+        if match.group("number"):
+            slots.append(match.group("number").replace(",", "") + (match.group("scale") or ""))
+        else:
+            word = match.group("word")
+            if word[:3] in ("jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "oct", "nov", "dec"):
+                word = word[:3]  # "march", "mar" -> "mar"
+            slots.append(word.rstrip("s") if word.endswith(("days", "weeks", "months", "quarters", "years")) else word)
+    return tuple(slots)
+
+
+def is_follow_up(text: str) -> bool:
+    """True for a normalized query whose meaning depends on the previous turns."""
+    return (
+        len(text.split()) < MIN_STANDALONE_WORDS
+        or _FOLLOW_UP_START.match(text) is not None
+        or _BACK_REFERENCE.search(text) is not None
+    )
+
+
+def turn_tool_names(messages) -> list:
+    """Names of the tools the agent called since the last human message."""
+    names = []
+    for message in reversed(messages):
+        if message.type == "human":
+            break
+        for call in getattr(message, "tool_calls", None) or []:
+            names.append(call["name"])
+    return names
+
+
+def is_cacheable(tool_names) -> bool:
+    return all(name in READ_ONLY_TOOLS for name in tool_names)
+
+
+class SemanticResponseCache:
+
+    def __init__(self, embed_query, collection=None, threshold=0.95, ttl_seconds=3600,
+                 maxsize=2048, max_per_user=50, clock=time.time):
+        self.embed_query = embed_query
+        self.collection = collection
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self.max_per_user = max_per_user
+        self._clock = clock
+        self._entries = OrderedDict()  # entry id -> entry dict, least recently used first
+        self._lock = threading.Lock()
+        self._indexes_ready = False
+        self.hits = 0
+        self.misses = 0
+
+    # -- helpers -----------------------------------------------------------
+
+    def _setup(self):
+        if self.collection is None or self._indexes_ready:
+            return
+        self.collection.create_index([("User", ASCENDING), ("Version", ASCENDING), ("CreatedAt", DESCENDING)])
+        self.collection.create_index("ExpiresAt", expireAfterSeconds=0)
+        self._indexes_ready = True
+
+    def _today(self) -> str:
+        # Local, like the tools' date.today()
+        return datetime.fromtimestamp(self._clock()).strftime("%Y-%m-%d")
+
+    def _embed(self, text):
+        vector = np.asarray(self.embed_query(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remember(self, entry):
+        # caller holds the lock
+        self._entries[entry["id"]] = entry
+        self._entries.move_to_end(entry["id"])
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _local_candidates(self, user_id, version, day, slots):
+        now = self._clock()
+        with self._lock:
+            for entry_id in [key for key, entry in self._entries.items() if entry["expires_at"] <= now]:
+                del self._entries[entry_id]
+            return [
+                entry for entry in self._entries.values()
+                if entry["user"] == user_id and entry["version"] == version
+                and entry["day"] == day and entry["slots"] == slots
+            ]
+
+    def _stored_candidates(self, user_id, version, day, slots):
+        if self.collection is None:
+            return []
+        try:
+            self._setup()
+            now = datetime.fromtimestamp(self._clock(), timezone.utc)
+            documents = self.collection.find(
+                {"User": user_id, "Version": version, "Day": day, "Slots": list(slots), "ExpiresAt": {"$gt": now}}
+            ).sort("CreatedAt", DESCENDING).limit(self.max_per_user)
+            return [
+                {
+                    "id": document["_id"],
+                    "user": user_id,
+                    "version": version,
+                    "day": day,
+                    "slots": slots,
+                    "query": document["Query"],
+                    "vector": np.asarray(document["Vector"], dtype=np.float32),
+                    "response": document["Response"],
+                    "expires_at": document["ExpiresAt"].replace(tzinfo=timezone.utc).timestamp(),
+                }
+                for document in documents
+            ]
+        except Exception as e:
+            logger.warning("Response cache: backing store unavailable: %s", e)
+            return []
+
+    def _best_match(self, candidates, text, vector):
+        """(best entry above the threshold or None, query vector if it had to be computed)."""
+        for entry in candidates:
+            if entry["query"] == text:
+                return entry, vector
+        if not candidates:
+            return None, vector
+        if vector is None:
+            vector = self._embed(text)
+        scores = np.stack([entry["vector"] for entry in candidates]) @ vector
+        best = int(np.argmax(scores))
+        return (candidates[best] if scores[best] >= self.threshold else None), vector
+
+    def _hit(self, entry):
+        with self._lock:
+            self.hits += 1
+            self._remember(entry)
+        return entry["response"]
+
+    # -- public --------------------------------------------------------------
+
+    def lookup(self, user_id: str, query: str, version: int) -> CacheLookup:
+        """
+        The cached response for a near-identical query with the same slots, asked today at
+        this data version (or None), plus the query embedding if one was computed, for store() to reuse.
+        """
+        text = normalize_query(query)
+        entry, vector = None, None
+        if is_follow_up(text):
+            with self._lock:
+                self.misses += 1
+            return CacheLookup(None, None)
+        day, slots = self._today(), query_slots(query)
+        try:
+            entry, vector = self._best_match(self._local_candidates(user_id, version, day, slots), text, vector)
+            if entry is None:
+                entry, vector = self._best_match(self._stored_candidates(user_id, version, day, slots), text, vector)
+        except Exception as e:
+            # An embedding outage costs the cache, not the request
+            logger.warning("Response cache: lookup failed: %s", e)
+        if entry is not None:
+            return CacheLookup(self._hit(entry), vector)
+
+        with self._lock:
+            self.misses += 1
+        return CacheLookup(None, vector)
+
+    def store(self, user_id: str, query: str, version: int, response: str, vector=None):
+        text = normalize_query(query)
+        if is_follow_up(text):
+            return
+        slots = query_slots(query)
+        if vector is None:
+            try:
+                vector = self._embed(text)
+            except Exception as e:
+                logger.warning("Response cache: could not embed query: %s", e)
+                return
+        entry = {
+            "id": uuid.uuid4().hex,
+            "user": user_id,
+            "version": version,
+            "day": self._today(),
+            "slots": slots,
+            "query": text,
+            "vector": vector,
+            "response": response,
+            "expires_at": self._clock() + self.ttl_seconds,
+        }
+        with self._lock:
+            self._remember(entry)
+
+        if self.collection is None:
+            return
+        try:
+            self._setup()
+            created_at = datetime.fromtimestamp(self._clock(), timezone.utc)
+            self.collection.insert_one({
+                "_id": entry["id"],
+                "User": user_id,
+                "Version": version,
+                "Day": entry["day"],
+                "Slots": list(slots),
+                "Query": text,
+                "Vector": [float(value) for value in vector],
+                "Response": response,
+                "CreatedAt": created_at,
+                "ExpiresAt": created_at + timedelta(seconds=self.ttl_seconds),
+            })
+        except Exception as e:
+            logger.warning("Response cache: could not persist entry: %s", e)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
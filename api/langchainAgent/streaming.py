@@ -0,0 +1,136 @@
+"""
+Server-Sent Events generators for LangChainAgentView streaming mode.
+Each yields ready-to-send SSE frames (see api.utils.sse.sse_event).
+"""
+import logging
+from contextlib import asynccontextmanager, nullcontext
+
+from api.langchainAgent.thread_lock import ThreadBusy
+from api.utils.sse import sse_event
+
+logger = logging.getLogger(__name__)
+
+
+def message_text(message) -> str:
+    content = message.content
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content or ""
+
+
+def is_quota_error(e: Exception) -> bool:
+    return "quota" in str(e).lower() or "resource exhausted" in str(e).lower()
+
+
+def error_message(e: Exception) -> str:
+    if isinstance(e, ThreadBusy):
+        return "Your previous message is still being answered. Please try again in a moment."
+    if is_quota_error(e):
+        return "Our AI service has reached its usage limit for now. Please try again later."
+    return f"Agent error: {str(e)}"
+
+
+def _agent_input(user_input):
+    return {"messages": [{"role": "user", "content": user_input}]}
+
+
+def _agent_chunk_events(mode, chunk, result):
+    """
+    SSE frames for one (mode, chunk) of agent.stream; the last AI answer goes to
+    result["response"] and the names of the tools called to result["tools"].
+    """
+    if mode == "messages":
+        message, metadata = chunk
+        if metadata.get("langgraph_node") == "agent" and message.type == "AIMessageChunk":
+            piece = message_text(message)
+            if piece:
+                yield sse_event("token", {"text": piece})
+        return
+
+    for node, update in chunk.items():
+        for message in (update or {}).get("messages", []):
+            if message.type == "ai" and message.tool_calls:
+                for call in message.tool_calls:
+                    result["tools"].append(call["name"])
+                    yield sse_event("tool_start", {"name": call["name"], "args": call["args"]})
+            elif message.type == "ai":
+                result["response"] = message_text(message)
+            elif message.type == "tool":
+                yield sse_event("tool_end", {"name": message.name})
+
+
+def canned_events(text):
+    """SSE frames for a reply that needs no model call (see api.utils.filter.small_talk_reply)."""
+    yield sse_event("token", {"text": text})
+    yield sse_event("done", {"response": text})
+
+
+def _complete(on_complete, result):
+    if on_complete is None:
+        return
+    try:
+        on_complete(result["response"], result["tools"])
+    except Exception:
+        logger.exception("LangChainAgentView: on_complete callback failed")
+
+
+def _thread_hold(thread_lock, config):
+    return thread_lock.hold(config["configurable"]["thread_id"]) if thread_lock else nullcontext()
+
+
+@asynccontextmanager
+async def _athread_hold(thread_lock, config):
+    if thread_lock is None:
+        yield
+        return
+    async with thread_lock.ahold(config["configurable"]["thread_id"]):
+        yield
+
+
+def stream_agent_events(agent, user_input, config, on_complete=None, thread_lock=None):
+    """
+    SSE frames for one agent run: `token` for LLM output, `tool_start`/`tool_end`
+    around tool calls, then `done` with the final answer (or `error`).
+    on_complete(response, tool_names) runs after a successful run, before `done`.
+    With a thread_lock (api.langchainAgent.thread_lock) the run holds the thread
+    until the stream ends.
+    """
+    result = {"response": "", "tools": []}
+    try:
+        with _thread_hold(thread_lock, config):
+            for mode, chunk in agent.stream(_agent_input(user_input), config=config, stream_mode=["updates", "messages"]):
+                yield from _agent_chunk_events(mode, chunk, result)
+
+        logger.info("LangChainAgentView: Agent streamed response: %s", result["response"])
+        _complete(on_complete, result)
+        yield sse_event("done", {"response": result["response"]})
+    except Exception as e:
+        logger.exception("LangChainAgentView: Agent stream crashed for input: '%s'", user_input)
+        yield sse_event("error", {"error": error_message(e)})
+
+
+async def acanned_events(text):
+    """Async canned_events, for the ASGI views."""
+    for frame in canned_events(text):
+        yield frame
+
+
+async def astream_agent_events(agent, user_input, config, on_complete=None, thread_lock=None):
+    """Async stream_agent_events, for the ASGI views; on_complete is a coroutine function here."""
+    result = {"response": "", "tools": []}
+    try:
+        async with _athread_hold(thread_lock, config):
+            async for mode, chunk in agent.astream(_agent_input(user_input), config=config, stream_mode=["updates", "messages"]):
+                for event in _agent_chunk_events(mode, chunk, result):
+                    yield event
+
+        logger.info("AsyncLangChainAgentView: Agent streamed response: %s", result["response"])
+        if on_complete is not None:
+            try:
+                await on_complete(result["response"], result["tools"])
+            except Exception:
+                logger.exception("AsyncLangChainAgentView: on_complete callback failed")
+        yield sse_event("done", {"response": result["response"]})
+    except Exception as e:
+        logger.exception("AsyncLangChainAgentView: Agent stream crashed for input: '%s'", user_input)
+        yield sse_event("error", {"error": error_message(e)})
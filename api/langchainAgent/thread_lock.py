@@ -0,0 +1,85 @@
+"""
+One agent run at a time per conversation thread, across workers.
+
+The checkpointer keys a conversation by thread_id (the user id). Two runs of one
+thread that interleave their checkpoints leave an AI tool call without its
+ToolMessage, and every later turn of that thread then fails. ThreadRunLock keeps a
+lease per thread_id in MongoDB: a document inserted by the run that takes it and
+deleted when that run ends. A second run for the same thread waits up to
+`wait_seconds`, so a user's quick follow-up is queued behind the answer in
+progress, and then raises ThreadBusy. A lease left behind by a crashed worker
+stops counting after `lease_seconds`.
+
+No LangChain imports here: the views import ThreadBusy at startup.
+"""
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timedelta, timezone
+
+from pymongo.errors import DuplicateKeyError
+
+
+class ThreadBusy(Exception):
+    """Another agent run still held the thread after the wait."""
+
+
+class ThreadRunLock:
+
+    def __init__(self, collection, *, lease_seconds: int = 300, wait_seconds: float = 30, poll_seconds: float = 0.1):
+        self.collection = collection
+        self.lease_seconds = lease_seconds
+        self.wait_seconds = wait_seconds
+        self.poll_seconds = poll_seconds
+        self._indexes_ready = False
+
+    def setup(self):
+        """TTL index so expired leases are removed (idempotent; runs on first use)."""
+        if self._indexes_ready:
+            return
+        self.collection.create_index("expires_at", expireAfterSeconds=0)
+        self._indexes_ready = True
+
+    def try_acquire(self, thread_id: str):
+        """The lease's owner token, or None while another run holds the thread."""
+        self.setup()
+        now = datetime.now(timezone.utc)
+        owner = uuid.uuid4().hex
+        try:
+            # Matches only an expired lease; a live one makes the upsert collide on _id
+            self.collection.update_one(
+                {"_id": thread_id, "expires_at": {"$lte": now}},
+                {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=self.lease_seconds)}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return None
+        return owner
+
+    def release(self, thread_id: str, owner: str):
+        self.collection.delete_one({"_id": thread_id, "owner": owner})
+
+    @contextmanager
+    def hold(self, thread_id: str):
+        deadline = time.monotonic() + self.wait_seconds
+        while (owner := self.try_acquire(thread_id)) is None:
+            if time.monotonic() >= deadline:
+                raise ThreadBusy(thread_id)
+            time.sleep(self.poll_seconds)
+        try:
+            yield
+        finally:
+            self.release(thread_id, owner)
+
+    @asynccontextmanager
+    async def ahold(self, thread_id: str):
+        deadline = time.monotonic() + self.wait_seconds
+        while (owner := await asyncio.to_thread(self.try_acquire, thread_id)) is None:
+            if time.monotonic() >= deadline:
+                raise ThreadBusy(thread_id)
+            await asyncio.sleep(self.poll_seconds)
+        try:
+            yield
+        finally:
+            await asyncio.to_thread(self.release, thread_id, owner)
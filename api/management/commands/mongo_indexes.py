@@ -0,0 +1,111 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from pymongo.errors import OperationFailure
+
+from api import repository
+
+
+def _plan_stages(plan):
+    stages = [plan.get("stage")]
+    for child in [plan.get("inputStage")] + plan.get("inputStages", []):
+        if child:
+            stages += _plan_stages(child)
+    return [stage for stage in stages if stage]
+
+
+def _index_problem(stages):
+    """What keeps a plan from being served by an index: a collection scan or an in-memory sort."""
+    if "COLLSCAN" in stages:
+        return "COLLSCAN"
+    if "SORT" in stages:
+        return "in-memory SORT"
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or sync the indexes declared on Expense/Income, report their sizes "
+        "and flag view queries that would not use an index for their filter and sort."
+    )
+    # System checks import the URLconf (and with it Firebase and the agent stack); not needed here.
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--drop-extra", action="store_true", help="Drop indexes that are not declared in the model meta.")
+        parser.add_argument("--user", default="__index_probe__", help="User id used when explaining the view queries.")
+        parser.add_argument("--strict", action="store_true", help="Exit with an error if any view query would scan the collection or sort in memory.")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        report = {}
+        unindexed = []
+
+        for kind in repository.TRANSACTION_KINDS:
+            model = repository.get_model(kind)
+            collection = model._get_collection()
+
+            model.ensure_indexes()
+            diff = model.compare_indexes()
+            dropped = []
+            if options["drop_extra"] and diff["extra"]:
+                existing = {tuple(info["key"]): name for name, info in collection.index_information().items()}
+                for spec in diff["extra"]:
+                    name = existing.get(tuple(tuple(key) for key in spec))
+                    if name and name != "_id_":
+                        collection.drop_index(name)
+                        dropped.append(name)
+
+            try:
+                index_sizes = collection.database.command("collStats", collection.name).get("indexSizes", {})
+            except OperationFailure as e:
+                self.stderr.write(f"collStats unavailable for {collection.name}: {e}")
+                index_sizes = {}
+
+            queries = []
+            for label, query, sort, limit in repository.view_query_shapes(options["user"]):
+                cursor = collection.find(query)
+                if sort:
+                    cursor = cursor.sort(sort)
+                if limit:
+                    cursor = cursor.limit(limit)
+                try:
+                    plan = cursor.explain()["queryPlanner"]["winningPlan"]
+                    stages = _plan_stages(plan.get("queryPlan", plan))
+                except (OperationFailure, KeyError, NotImplementedError) as e:
+                    queries.append({"query": label, "error": str(e)})
+                    continue
+                problem = _index_problem(stages)
+                queries.append({"query": label, "stages": stages, "uses_index": problem is None, "problem": problem})
+                if problem:
+                    unindexed.append(f"{collection.name}: {label} ({problem})")
+
+            report[collection.name] = {
+                "missing": diff["missing"],
+                "extra": [] if dropped else diff["extra"],
+                "dropped": dropped,
+                "index_sizes": index_sizes,
+                "queries": queries,
+            }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2, default=str))
+        else:
+            for name, info in report.items():
+                self.stdout.write(self.style.MIGRATE_HEADING(f"{name}"))
+                for index_name, size in sorted(info["index_sizes"].items()):
+                    self.stdout.write(f"  {index_name:<30} {size / 1024:>10.1f} KB")
+                if info["extra"]:
+                    self.stdout.write(self.style.WARNING(f"  undeclared indexes: {info['extra']} (use --drop-extra)"))
+                for index_name in info["dropped"]:
+                    self.stdout.write(f"  dropped {index_name}")
+                for query in info["queries"]:
+                    if "error" in query:
+                        self.stdout.write(self.style.WARNING(f"  ? {query['query']}: explain failed ({query['error']})"))
+                    elif query["uses_index"]:
+                        self.stdout.write(f"  ok {query['query']} ({' <- '.join(query['stages'])})")
+                    else:
+                        self.stdout.write(self.style.ERROR(f"  {query['problem']} {query['query']} ({' <- '.join(query['stages'])})"))
+
+        if unindexed and options["strict"]:
+            raise CommandError(f"Queries without index support: {', '.join(unindexed)}")
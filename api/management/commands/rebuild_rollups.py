@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from api import rollups
+from api.models import MonthlyRollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the MonthlyRollup documents from the Expense/Income collections, "
+        "for every user or only the given ones. Safe to run while the app takes writes."
+    )
+    # System checks import the URLconf (and with it Firebase and the agent stack); not needed here.
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", action="append", dest="users", help="Only rebuild this user (repeatable).")
+        parser.add_argument("--missing", action="store_true", help="Skip users whose rollups are already built.")
+
+    def handle(self, *args, **options):
+        MonthlyRollup.ensure_indexes()
+        users = options["users"] or rollups.rollup_users()
+        if options["missing"]:
+            users = [user_id for user_id in users if not rollups.is_built(user_id)]
+        documents, skipped = 0, []
+        for user_id in users:
+            count = rollups.rebuild_user(user_id)
+            if count is None:
+                skipped.append(user_id)
+                continue
+            documents += count
+            if options["verbosity"] > 1:
+                self.stdout.write(f"  {user_id}: {count} rollups")
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {documents} monthly rollups for {len(users) - len(skipped)} users."
+        ))
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f"Not rebuilt (busy or written to throughout; run again): {', '.join(skipped)}"
+            ))
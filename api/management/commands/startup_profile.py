@@ -0,0 +1,138 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter under -X importtime, so nothing is imported yet: each
+# phase's wall time and the RSS after it are measured, and the per-module import
+# times come from the interpreter's own report on stderr.
+PHASES_SCRIPT = """
+import json, sys, time
+import psutil
+
+process = psutil.Process()
+phases = []
+
+def phase(name, func):
+    start = time.perf_counter()
+    entry = {"phase": name}
+    try:
+        func()
+    except Exception as e:
+        entry["error"] = f"{type(e).__name__}: {e}"
+    entry["ms"] = round((time.perf_counter() - start) * 1000, 1)
+    entry["rss_mb"] = round(process.memory_info().rss / 1048576, 1)
+    phases.append(entry)
+
+phase("interpreter", lambda: None)
+import django
+phase("django.setup", django.setup)
+from django.urls import get_resolver
+phase("urlconf (views, agent module)", lambda: get_resolver().url_patterns)
+
+from api.utils.lazy import initializers
+registered = initializers()
+requested = json.loads(sys.argv[1])
+for name in registered if requested is None else requested:
+    if name in registered:
+        phase(f"init {name}", registered[name])
+    else:
+        phases.append({"phase": f"init {name}", "error": "no such initializer", "ms": 0.0, "rss_mb": phases[-1]["rss_mb"]})
+
+print("STARTUP_PROFILE " + json.dumps(phases))
+"""
+
+
+def parse_importtime(stderr: str) -> list:
+    """[{"module", "self_ms", "cumulative_ms", "depth"}] from `python -X importtime` output."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        imports.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "depth": (len(name) - len(name.lstrip())) // 2,
+        })
+    return imports
+
+
+def summarize_imports(imports: list, top: int) -> dict:
+    packages = defaultdict(float)
+    for item in imports:
+        packages[item["module"].split(".")[0]] += item["self_ms"]
+    return {
+        "total_ms": round(sum(item["self_ms"] for item in imports), 1),
+        "modules": len(imports),
+        "slowest": sorted(imports, key=lambda item: item["cumulative_ms"], reverse=True)[:top],
+        "packages": {
+            name: round(ms, 1)
+            for name, ms in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile worker startup in a fresh interpreter: per-module import times "
+        "(-X importtime), the wall time of each lazy initializer (Firebase, Gemini, "
+        "Mongo, vector store, agent graph) and RSS after each phase."
+    )
+    # The profile runs in a subprocess; this process does not need the URLconf.
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--json", action="store_true", help="Print the full report as JSON.")
+        parser.add_argument("--top", type=int, default=25, help="Number of modules/packages to list (default 25).")
+        parser.add_argument(
+            "--initializer", action="append", dest="initializers",
+            help="Only time this lazy initializer (repeatable; default: all of them).",
+        )
+        parser.add_argument(
+            "--skip-initializers", action="store_true",
+            help="Stop after importing the URLconf; no client is built (no network access).",
+        )
+
+    def handle(self, *args, **options):
+        requested = [] if options["skip_initializers"] else options["initializers"]
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PHASES_SCRIPT, json.dumps(requested)],
+            cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True, text=True,
+        )
+        marker = next((line for line in result.stdout.splitlines() if line.startswith("STARTUP_PROFILE ")), None)
+        if result.returncode != 0 or marker is None:
+            raise CommandError(f"Startup profile failed:\n{result.stderr[-2000:]}")
+
+        phases = json.loads(marker[len("STARTUP_PROFILE "):])
+        report = {"phases": phases, "imports": summarize_imports(parse_importtime(result.stderr), options["top"])}
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Phases"))
+        previous_rss = phases[0]["rss_mb"]
+        for phase in phases:
+            line = (
+                f"  {phase['phase']:<40} {phase['ms']:>9.1f} ms   "
+                f"RSS {phase['rss_mb']:>7.1f} MB ({phase['rss_mb'] - previous_rss:+.1f})"
+            )
+            self.stdout.write(self.style.ERROR(f"{line}  {phase['error']}") if "error" in phase else line)
+            previous_rss = phase["rss_mb"]
+
+        imports = report["imports"]
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Slowest imports (cumulative; {imports['total_ms']:.0f} ms over {imports['modules']} modules)"
+        ))
+        for item in imports["slowest"]:
+            self.stdout.write(f"  {item['module']:<55} {item['cumulative_ms']:>9.1f} ms  (self {item['self_ms']:.1f})")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Import time by top-level package (self)"))
+        for name, ms in imports["packages"].items():
+            self.stdout.write(f"  {name:<40} {ms:>9.1f} ms")
@@ -0,0 +1,134 @@
+import time
+from functools import cache
+
+import psutil
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.urls import reverse
+
+from api.utils import tracing
+from api.utils.metrics import registry
+
+# URL names whose requests get a span tree (api.utils.tracing)
+TRACED_URL_NAMES = ("langchain-agent",)
+
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds",
+    "Time to produce the response (headers, for streamed replies) by URL name.",
+    ("view", "method", "status"),
+)
+
+
+def view_label(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"  # 404s and anything rejected before URL resolution
+    return match.url_name or match.route or "unnamed"
+
+
+class RequestMetricsMiddleware:
+    """Records every request's latency under the name of the URL pattern it matched."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, start)
+        return response
+
+    @staticmethod
+    def record(request, response, start):
+        REQUEST_LATENCY.observe(time.perf_counter() - start, view_label(request), request.method, str(response.status_code))
+
+
+@cache
+def traced_paths() -> frozenset:
+    return frozenset(reverse(name) for name in TRACED_URL_NAMES)
+
+
+class AgentTraceMiddleware:
+    """
+    Opens a trace for each agent request and exports it when the response is done:
+    for a streamed reply, after the last frame, since the agent runs while it streams.
+    The response carries the trace id in X-Trace-Id.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if request.path_info not in traced_paths():
+            return self.get_response(request)
+        root = tracing.start_trace(f"{request.method} {request.path_info}")
+        try:
+            response = self.get_response(request)
+        except BaseException as e:
+            self.finish(root, error=e)
+            raise
+        return self.attach(root, response)
+
+    async def __acall__(self, request):
+        if request.path_info not in traced_paths():
+            return await self.get_response(request)
+        root = tracing.start_trace(f"{request.method} {request.path_info}")
+        try:
+            response = await self.get_response(request)
+        except BaseException as e:
+            self.finish(root, error=e)
+            raise
+        return self.attach(root, response)
+
+    def attach(self, root, response):
+        response["X-Trace-Id"] = root.trace_id
+        if not response.streaming:
+            self.finish(root, response)
+            return response
+
+        content = response.streaming_content
+        if response.is_async:
+            async def finish_after_stream():
+                try:
+                    async for chunk in content:
+                        yield chunk
+                finally:
+                    self.finish(root, response)
+        else:
+            def finish_after_stream():
+                try:
+                    yield from content
+                finally:
+                    self.finish(root, response)
+        response.streaming_content = finish_after_stream()
+        return response
+
+    @staticmethod
+    def finish(root, response=None, error=None):
+        if response is not None:
+            root.attributes["status"] = response.status_code
+        root.attributes["rss_mb"] = round(psutil.Process().memory_info().rss / 1048576, 1)
+        tracing.finish_trace(root, error)
+        if not response or not response.streaming:
+            tracing.set_current_span(None)
@@ -1,10 +1,22 @@
-from mongoengine import Document, StringField, DecimalField, DateTimeField, DateField,ReferenceField
+from mongoengine import Document, StringField, DecimalField, DateTimeField, DateField,ReferenceField, FloatField, IntField
 import datetime
 import uuid
 
 def generate_unique_id():
     return str(uuid.uuid4())
 
+# Compound indexes shared by Expense and Income. Every per-user query filters on User first:
+# history/summary queries add a Date range, tag drill-downs add Tag, and (User, Type) serves type filters.
+# The list pages sort newest first by (Date, Id), so (User, Date, Id) serves both Date ranges and the
+# per-user pages, and (Date, Id) the pages over every user.
+# Run `python manage.py mongo_indexes` to create/sync them and check the views' queries use them.
+TRANSACTION_INDEXES = [
+    ('User', 'Date', 'Id'),
+    ('User', 'Tag', 'Date'),
+    ('User', 'Type'),
+    ('Date', 'Id'),
+]
+
 class User(Document):
     Id = StringField(primary_key=True, max_length=200)
     Displayname = StringField(required=True)
@@ -26,6 +38,10 @@ class Expense(Document):
     Paymentmethod = StringField(max_length=200, required=False,blank=True,null=True)
     Date = DateField( required=True)
 
+    meta = {
+        'indexes': list(TRANSACTION_INDEXES),
+    }
+
 class Income(Document):
     Id = StringField(primary_key=True, default=generate_unique_id, max_length=200)
     User = ReferenceField(User,required=True)
@@ -34,3 +50,46 @@ class Income(Document):
     Tag = StringField(max_length=200, required=True)
     Type = StringField(max_length=200, required=True)
     Date = DateField( required=True)
+
+    meta = {
+        'indexes': list(TRANSACTION_INDEXES),
+    }
+
+
+# Per-user totals kept in step with Expense/Income writes by api/rollups.py: one document per
+# (User, Month "YYYY-MM", Type "Expense"/"Income", Tag). Summaries read these instead of raw history.
+# `python manage.py rebuild_rollups` recomputes them from the transactions.
+class MonthlyRollup(Document):
+    User = StringField(required=True, max_length=200)
+    Month = StringField(required=True, max_length=7)
+    Type = StringField(required=True, max_length=200)
+    Tag = StringField(required=True, max_length=200)
+    Sum = FloatField(default=0)
+    Count = IntField(default=0)
+    Min = FloatField()
+    Max = FloatField()
+
+    meta = {
+        'indexes': [
+            {'fields': ('User', 'Type', 'Month', 'Tag'), 'unique': True},
+        ],
+    }
+
+# Marks users whose rollups have been built from their full history; until one is
+# "ready" summaries fall back to the raw aggregation. While `rebuild_rollups` holds a
+# user ("building", Owner, LeaseUntil) the write hooks count their changes in Deferred
+# instead of applying them; Applying counts hook updates in flight (see api/rollups.py).
+class RollupStatus(Document):
+    User = StringField(primary_key=True, max_length=200)
+    State = StringField(choices=("building", "ready"), default="ready")
+    RebuiltAt = DateTimeField(default=datetime.datetime.utcnow)
+    Owner = StringField()
+    LeaseUntil = DateTimeField()
+    Deferred = IntField(default=0)
+    Applying = IntField(default=0)
+
+# Bumped on every change to a user's transactions (api/data_version.py); cached agent
+# answers are only reused while the version they were computed against is current.
+class UserDataVersion(Document):
+    User = StringField(primary_key=True, max_length=200)
+    Version = IntField(default=0)
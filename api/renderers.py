@@ -0,0 +1,16 @@
+from rest_framework.renderers import BaseRenderer
+
+from api.utils.sse import sse_event
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets DRF content negotiation accept `Accept: text/event-stream`.
+    Streaming bodies bypass the renderer; regular Responses (e.g. validation errors) become one `error` event.
+    """
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return sse_event("error", data).encode(self.charset)
@@ -0,0 +1,269 @@
+"""
+Transaction repository shared by the REST views and the LangChain agent tools.
+
+The views and the agent tools both read and write Expense/Income documents
+through these helpers, so a tool call made inside an already authenticated
+request talks to MongoDB directly instead of looping back over HTTP.
+"""
+import base64
+import json
+import logging
+from datetime import datetime, timedelta
+
+from mongoengine import Q
+from mongoengine.connection import ConnectionFailure, get_connection
+
+from . import rollups
+from .models import Expense, Income
+from .serializers import ExpenseSerializer, IncomeSerializer
+
+logger = logging.getLogger(__name__)
+
+# kind -> (Document, Serializer). The kinds match the URL prefixes the tools used to call.
+TRANSACTION_KINDS = {
+    "expenses": (Expense, ExpenseSerializer),
+    "incomes": (Income, IncomeSerializer),
+}
+
+REQUIRED_LLM_FIELDS = ["Id", "User", "Title", "Amount", "Tag", "Type", "Date"]
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Keyset order of the list pages, newest first: as order_by() fields and as a pymongo sort
+PAGE_ORDER = ("-Date", "-Id")
+PAGE_SORT = [("Date", -1), ("_id", -1)]
+
+
+class TransactionValidationError(Exception):
+    """Raised when a transaction payload fails validation."""
+
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.errors = errors if errors is not None else {"error": message}
+
+
+def get_model(kind: str):
+    try:
+        return TRANSACTION_KINDS[kind][0]
+    except KeyError:
+        raise ValueError(f"Unknown transaction kind: {kind}")
+
+
+def get_serializer_class(kind: str):
+    try:
+        return TRANSACTION_KINDS[kind][1]
+    except KeyError:
+        raise ValueError(f"Unknown transaction kind: {kind}")
+
+
+def is_available() -> bool:
+    """True when this process has a MongoEngine connection (i.e. runs inside Django)."""
+    try:
+        get_connection()
+        return True
+    except ConnectionFailure:
+        return False
+
+
+def validate_fields(kind: str, fields) -> list:
+    """Checks a ?fields= projection against the serializer; returns None for "all fields"."""
+    if not fields:
+        return None
+    allowed = set(get_serializer_class(kind)().fields)
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return list(fields)
+
+
+def list_user_transactions(kind: str, user_id: str, fields=None) -> list:
+    """Serialized transactions of one kind for a single user, optionally projected to `fields`."""
+    fields = validate_fields(kind, fields)
+    documents = get_model(kind).objects.filter(User=user_id)
+    if fields:
+        documents = documents.only(*fields)
+    return get_serializer_class(kind)(documents, many=True, fields=fields).data
+
+
+def encode_cursor(document) -> str:
+    position = {"d": document.Date.strftime("%Y-%m-%d"), "i": document.Id}
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.strptime(position["d"], "%Y-%m-%d"), position["i"]
+    except Exception:
+        raise ValueError("Invalid cursor.")
+
+
+def page_transactions(kind: str, user_id=None, limit=DEFAULT_PAGE_SIZE, cursor=None, fields=None) -> dict:
+    """
+    Keyset page of transactions ordered newest first by (Date, Id).
+    Pass the returned next_cursor back to get the following page; it is None on the last page.
+    user_id=None pages over every user's transactions.
+    """
+    fields = validate_fields(kind, fields)
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    documents = get_model(kind).objects
+    if user_id is not None:
+        documents = documents.filter(User=user_id)
+    if cursor:
+        date, doc_id = decode_cursor(cursor)
+        documents = documents.filter(Q(Date__lt=date) | Q(Date=date, Id__lt=doc_id))
+    if fields:
+        documents = documents.only(*set(fields) | {"Id", "Date"})
+
+    page = list(documents.order_by(*PAGE_ORDER).limit(limit + 1))
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return {
+        "results": get_serializer_class(kind)(page[:limit], many=True, fields=fields).data,
+        "next_cursor": next_cursor,
+    }
+
+
+def delete_user_transactions(user_id: str) -> None:
+    for model, _ in TRANSACTION_KINDS.values():
+        model.objects.filter(User=user_id).delete()
+    rollups.clear_user(user_id)
+
+
+def validate_llm_payload(kind: str, data: dict) -> dict:
+    """
+    Server-side checks for transactions created by the agent.
+    Normalizes Amount/Date in place and raises TransactionValidationError on bad input.
+    """
+    missing_fields = [field for field in REQUIRED_LLM_FIELDS if field not in data]
+    if missing_fields:
+        raise TransactionValidationError(f"Missing fields: {', '.join(missing_fields)}")
+
+    label = "Expense" if kind == "expenses" else "Income"
+    try:
+        data["Amount"] = float(data["Amount"])
+        if data["Amount"] <= 0:
+            raise TransactionValidationError("Amount must be a positive number.")
+
+        date_obj = datetime.strptime(data["Date"], "%Y-%m-%d").date()
+        if date_obj > datetime.now().date():
+            raise TransactionValidationError(f"{label} date cannot be in the future.")
+        data["Date"] = date_obj.strftime("%Y-%m-%d")
+    except (ValueError, TypeError) as ve:
+        raise TransactionValidationError(f"Invalid data format: {ve}")
+
+    if kind == "incomes" and data.get("Type") != "Income":
+        raise TransactionValidationError("Invalid 'Type'. This endpoint only accepts 'Income' type.")
+
+    return data
+
+
+def create_transaction(kind: str, data: dict) -> dict:
+    """Validate with the DRF serializer, save, and return the serialized document."""
+    serializer = get_serializer_class(kind)(data=data)
+    if not serializer.is_valid():
+        raise TransactionValidationError("Serializer validation failed", errors=serializer.errors)
+    serializer.save()
+    return serializer.data
+
+
+def update_transaction(kind: str, pk: str, data: dict):
+    """Replace a document through the serializer; returns None when `pk` does not exist."""
+    document = get_model(kind).objects(Id=pk).first()
+    if document is None:
+        return None
+    serializer = get_serializer_class(kind)(document, data=data)
+    if not serializer.is_valid():
+        raise TransactionValidationError("Serializer validation failed", errors=serializer.errors)
+    serializer.save()
+    return serializer.data
+
+
+def delete_transaction(kind: str, pk: str) -> bool:
+    document = get_model(kind).objects(Id=pk).first()
+    if document is None:
+        return False
+    document.delete()
+    rollups.remove(kind, document)
+    return True
+
+
+def create_llm_transaction(kind: str, data: dict) -> dict:
+    validate_llm_payload(kind, data)
+    return create_transaction(kind, data)
+
+
+def _summary_pipeline(user_id, start=None, end=None):
+    match = {"User": user_id}
+    if start or end:
+        match["Date"] = {}
+        if start:
+            match["Date"]["$gte"] = datetime.combine(start, datetime.min.time())
+        if end:
+            # end is inclusive
+            match["Date"]["$lt"] = datetime.combine(end + timedelta(days=1), datetime.min.time())
+
+    return [
+        {"$match": match},
+        {"$facet": {
+            "overall": [
+                {"$group": {"_id": None, "total": {"$sum": "$Amount"}, "count": {"$sum": 1}}},
+            ],
+            "monthly": [
+                {"$group": {"_id": {"$dateToString": {"format": "%Y-%m", "date": "$Date"}}, "total": {"$sum": "$Amount"}}},
+                {"$sort": {"_id": 1}},
+            ],
+            "tags": [
+                {"$group": {"_id": "$Tag", "total": {"$sum": "$Amount"}}},
+                {"$sort": {"total": -1}},
+            ],
+        }},
+    ]
+
+
+def summarize_transactions(user_id: str, start=None, end=None) -> dict:
+    """
+    Monthly, per-Tag and overall totals computed by MongoDB for an optional
+    inclusive [start, end] date range, so callers never download raw history.
+    Whole-month ranges are read from the MonthlyRollup documents (api/rollups.py).
+    """
+    summary = {
+        "start": start.strftime("%Y-%m-%d") if start else None,
+        "end": end.strftime("%Y-%m-%d") if end else None,
+    }
+    # Whole-month ranges (all the agent tools ask for) come from the monthly rollups, once
+    # `manage.py rebuild_rollups` has built them for this user
+    if rollups.covers(start, end) and rollups.is_built(user_id):
+        return {**summary, **rollups.summarize(user_id, start, end)}
+    pipeline = _summary_pipeline(user_id, start, end)
+    for kind in TRANSACTION_KINDS:
+        result = next(get_model(kind)._get_collection().aggregate(pipeline), {})
+        overall = result.get("overall") or [{"total": 0, "count": 0}]
+        summary[kind] = {
+            "total": round(float(overall[0]["total"]), 2),
+            "count": overall[0]["count"],
+            "monthly": {row["_id"]: round(float(row["total"]), 2) for row in result.get("monthly", [])},
+            "tags": {row["_id"]: round(float(row["total"]), 2) for row in result.get("tags", [])},
+        }
+    return summary
+
+
+def view_query_shapes(user_id: str) -> list:
+    """
+    (label, filter, sort, limit) for the queries the views and tools issue against
+    each collection; sort and limit are None where the query has none.
+    `manage.py mongo_indexes` explains these to check index coverage.
+    """
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    after_cursor = {"$or": [{"Date": {"$lt": today}}, {"Date": today, "_id": {"$lt": "__probe__"}}]}
+    page_size = DEFAULT_PAGE_SIZE + 1  # page_transactions reads one extra row to find the next cursor
+    return [
+        ("detail view / page_transactions", {"User": user_id}, PAGE_SORT, page_size),
+        ("detail view / page_transactions after cursor", {"User": user_id, **after_cursor}, PAGE_SORT, page_size),
+        ("detail view ?all=true / list_user_transactions", {"User": user_id}, None, None),
+        ("summarize_transactions with date range", {"User": user_id, "Date": {"$gte": today - timedelta(days=30), "$lt": today}}, None, None),
+        ("reset view / delete_user_transactions", {"User": user_id}, None, None),
+        ("detail view get_object", {"_id": "__probe__"}, None, None),
+        ("global list view / page_transactions", {}, PAGE_SORT, page_size),
+        ("global list view / page_transactions after cursor", after_cursor, PAGE_SORT, page_size),
+    ]
@@ -0,0 +1,337 @@
+"""
+Incrementally maintained monthly rollups of Expense/Income.
+
+Every write path keeps MonthlyRollup in step with atomic updates:
+- serializer create/update, which covers the REST views, the LLM endpoints and the agent;
+- deletes in the detail views and the repository;
+- bulk imports;
+- the reset endpoint.
+
+Adding a row is one `$inc`/`$min`/`$max` upsert. Removing one applies negative
+deltas, and recomputes Min/Max from that bucket's raw rows only when the removed
+amount was an extreme.
+
+Summaries read a user's few dozen rollup documents instead of their whole
+history, but only once that user's RollupStatus is ready, i.e. once `rebuild_user`
+(run by `manage.py rebuild_rollups`, never by a request) has built their rollups
+from the full history. Until then the caller falls back to the raw aggregation.
+
+A rebuild claims the user by setting their status to "building" (with a lease).
+While it holds the claim the write hooks leave the rollups alone and count the
+write in Deferred instead; the rebuild only marks the user ready if nothing was
+deferred since it aggregated, and otherwise aggregates again. Hooks for users
+without a status do nothing: their first rebuild reads everything from raw rows.
+"""
+import logging
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from . import data_version
+from .models import Expense, Income, MonthlyRollup, RollupStatus
+
+logger = logging.getLogger(__name__)
+
+# kind (as in repository.TRANSACTION_KINDS) -> (Document, rollup Type)
+ROLLUP_KINDS = {
+    "expenses": (Expense, "Expense"),
+    "incomes": (Income, "Income"),
+}
+
+
+# Status filter for users whose rollups are kept in step; markers from before State existed count
+READY = {"State": {"$in": ["ready", None]}}
+REBUILD_LEASE = timedelta(minutes=10)
+REBUILD_ATTEMPTS = 3
+# How long a rebuild waits for hook updates that started before it claimed the user
+APPLYING_WAIT_SECONDS = 5
+
+
+def _rollups():
+    return MonthlyRollup._get_collection()
+
+
+def _statuses():
+    return RollupStatus._get_collection()
+
+
+def _transactions(kind):
+    return ROLLUP_KINDS[kind][0]._get_collection()
+
+
+def month_key(value) -> str:
+    return value.strftime("%Y-%m")
+
+
+def _month_range(month: str):
+    year, month_number = map(int, month.split("-"))
+    start = datetime(year, month_number, 1)
+    end = datetime(year + month_number // 12, month_number % 12 + 1, 1)
+    return start, end
+
+
+def entry_from_mongo(kind: str, data) -> tuple:
+    """(bucket filter, amount) for a stored (to_mongo) Expense/Income document."""
+    bucket = {
+        "User": data["User"],
+        "Type": ROLLUP_KINDS[kind][1],
+        "Month": month_key(data["Date"]),
+        "Tag": data["Tag"],
+    }
+    return bucket, float(data["Amount"])
+
+
+def entry(kind: str, document) -> tuple:
+    """(bucket filter, amount) of an Expense/Income document, without dereferencing its User."""
+    return entry_from_mongo(kind, document.to_mongo())
+
+
+def _add_update(total, count=1, low=None, high=None):
+    return {
+        "$inc": {"Sum": total, "Count": count},
+        "$min": {"Min": total if low is None else low},
+        "$max": {"Max": total if high is None else high},
+    }
+
+
+def add_entry(bucket, amount):
+    _rollups().update_one(bucket, _add_update(amount), upsert=True)
+
+
+def remove_entry(kind, bucket, amount):
+    collection = _rollups()
+    rollup = collection.find_one_and_update(
+        bucket, {"$inc": {"Sum": -amount, "Count": -1}}, return_document=ReturnDocument.AFTER
+    )
+    if rollup is None:
+        return
+    if rollup["Count"] <= 0:
+        collection.delete_one({**bucket, "Count": {"$lte": 0}})
+    elif amount <= rollup.get("Min", amount) or amount >= rollup.get("Max", amount):
+        _refresh_extremes(kind, bucket)
+
+
+def _refresh_extremes(kind, bucket):
+    # Min/Max cannot be decremented; recompute them from the one bucket's rows (User, Tag, Date index)
+    start, end = _month_range(bucket["Month"])
+    result = next(_transactions(kind).aggregate([
+        {"$match": {"User": bucket["User"], "Tag": bucket["Tag"], "Date": {"$gte": start, "$lt": end}}},
+        {"$group": {"_id": None, "Min": {"$min": "$Amount"}, "Max": {"$max": "$Amount"}}},
+    ]), None)
+    if result is not None:
+        _rollups().update_one(bucket, {"$set": {"Min": float(result["Min"]), "Max": float(result["Max"])}})
+
+
+def _guarded(user_id, update):
+    """
+    Run `update` (a change to the user's rollups) if their rollups are ready. While a
+    rebuild holds the user the write is counted in Deferred instead, and for users
+    that were never built there is nothing to keep in step.
+    """
+    statuses = _statuses()
+    while True:
+        # Applying tells a rebuild that claims the user now to wait for this update
+        if statuses.find_one_and_update({"_id": user_id, **READY}, {"$inc": {"Applying": 1}}):
+            try:
+                update()
+            finally:
+                statuses.update_one({"_id": user_id}, {"$inc": {"Applying": -1}})
+            return
+        if statuses.update_one({"_id": user_id, "State": "building"}, {"$inc": {"Deferred": 1}}).matched_count:
+            return
+        if statuses.count_documents({"_id": user_id}, limit=1) == 0:
+            return
+        # A rebuild finished between the two checks; look again
+
+
+# The public hooks below run on every transaction write, so they also bump the
+# user's data version (which invalidates cached agent answers).
+
+def add(kind: str, document):
+    bucket, amount = entry(kind, document)
+    _guarded(bucket["User"], lambda: add_entry(bucket, amount))
+    data_version.bump(bucket["User"])
+
+
+def remove(kind: str, document):
+    bucket, amount = entry(kind, document)
+    _guarded(bucket["User"], lambda: remove_entry(kind, bucket, amount))
+    data_version.bump(bucket["User"])
+
+
+def replace(kind: str, before: tuple, document):
+    """Move an updated document from its old (bucket, amount) entry to its current one."""
+    after = entry(kind, document)
+    if after != before:
+        def move():
+            remove_entry(kind, *before)
+            add_entry(*after)
+        _guarded(after[0]["User"], move)
+    data_version.bump(after[0]["User"])
+
+
+def add_many(kind: str, documents):
+    """Fold freshly inserted (to_mongo) documents into the rollups with one bulk write per user."""
+    buckets = defaultdict(lambda: [0.0, 0, None, None])
+    for data in documents:
+        bucket, amount = entry_from_mongo(kind, data)
+        totals = buckets[tuple(sorted(bucket.items()))]
+        totals[0] += amount
+        totals[1] += 1
+        totals[2] = amount if totals[2] is None else min(totals[2], amount)
+        totals[3] = amount if totals[3] is None else max(totals[3], amount)
+    operations = defaultdict(list)  # user -> bulk updates
+    for key, (total, count, low, high) in buckets.items():
+        bucket = dict(key)
+        operations[bucket["User"]].append(UpdateOne(bucket, _add_update(total, count, low, high), upsert=True))
+    for user_id, user_operations in operations.items():
+        _guarded(user_id, lambda: _rollups().bulk_write(user_operations, ordered=False))
+        data_version.bump(user_id)
+
+
+def clear_user(user_id: str):
+    _guarded(user_id, lambda: _rollups().delete_many({"User": user_id}))
+    data_version.bump(user_id)
+
+
+def is_built(user_id: str) -> bool:
+    return _statuses().count_documents({"_id": user_id, **READY}, limit=1) > 0
+
+
+def _aggregate(user_id: str) -> list:
+    rollups = []
+    for kind, (_, rollup_type) in ROLLUP_KINDS.items():
+        for row in _transactions(kind).aggregate([
+            {"$match": {"User": user_id}},
+            {"$group": {
+                "_id": {"Month": {"$dateToString": {"format": "%Y-%m", "date": "$Date"}}, "Tag": "$Tag"},
+                "Sum": {"$sum": "$Amount"},
+                "Count": {"$sum": 1},
+                "Min": {"$min": "$Amount"},
+                "Max": {"$max": "$Amount"},
+            }},
+        ]):
+            rollups.append({
+                "User": user_id,
+                "Type": rollup_type,
+                "Month": row["_id"]["Month"],
+                "Tag": row["_id"]["Tag"],
+                "Sum": float(row["Sum"]),
+                "Count": row["Count"],
+                "Min": float(row["Min"]),
+                "Max": float(row["Max"]),
+            })
+    return rollups
+
+
+def _wait_for_applying(user_id: str):
+    deadline = time.monotonic() + APPLYING_WAIT_SECONDS
+    while _statuses().count_documents({"_id": user_id, "Applying": {"$gt": 0}}, limit=1):
+        if time.monotonic() > deadline:
+            logger.warning("Rollups of user %s: hook updates still in flight, rebuilding anyway", user_id)
+            return
+        time.sleep(0.05)
+
+
+def rebuild_user(user_id: str):
+    """
+    Recompute a user's rollups from their transactions and mark them ready. Returns the
+    number of rollup documents, or None when another rebuild holds the user or writes
+    kept arriving (the user then stays on the raw aggregation until the next rebuild).
+    """
+    statuses = _statuses()
+    owner = uuid.uuid4().hex
+    now = datetime.utcnow()
+    try:
+        statuses.update_one(
+            {"_id": user_id, "$or": [{"State": {"$ne": "building"}}, {"LeaseUntil": {"$lte": now}}]},
+            {"$set": {"State": "building", "Owner": owner, "LeaseUntil": now + REBUILD_LEASE, "Deferred": 0}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        logger.info("Rollups of user %s are already being rebuilt", user_id)
+        return None
+    mine = {"_id": user_id, "Owner": owner}
+
+    try:
+        _wait_for_applying(user_id)
+        for _ in range(REBUILD_ATTEMPTS):
+            rollups = _aggregate(user_id)
+            _rollups().delete_many({"User": user_id})  # same data, so the data version stays
+            if rollups:
+                _rollups().insert_many(rollups)
+            # Ready only if no write was deferred since this attempt started
+            ready = statuses.update_one(
+                {**mine, "Deferred": 0},
+                {"$set": {"State": "ready", "RebuiltAt": datetime.utcnow()}, "$unset": {"Owner": "", "LeaseUntil": ""}},
+            )
+            if ready.matched_count:
+                logger.info("Rebuilt %s monthly rollups for user %s", len(rollups), user_id)
+                return len(rollups)
+            retry = statuses.update_one(mine, {"$set": {"Deferred": 0, "LeaseUntil": datetime.utcnow() + REBUILD_LEASE}})
+            if not retry.matched_count:
+                logger.warning("Rollups of user %s: rebuild lease expired", user_id)
+                return None
+    except Exception:
+        statuses.delete_one(mine)
+        raise
+    statuses.delete_one(mine)
+    logger.warning("Rollups of user %s: writes kept arriving, left on the raw aggregation", user_id)
+    return None
+
+
+def rollup_users() -> list:
+    """Every user id that has transactions."""
+    users = set()
+    for model, _ in ROLLUP_KINDS.values():
+        users.update(model._get_collection().distinct("User"))
+    return sorted(users)
+
+
+def covers(start=None, end=None) -> bool:
+    """True when an inclusive [start, end] date range is made of whole months."""
+    if start and start.day != 1:
+        return False
+    if end and (end + timedelta(days=1)).day != 1:
+        return False
+    return True
+
+
+def summarize(user_id: str, start=None, end=None) -> dict:
+    """
+    The per-kind part of repository.summarize_transactions ({"total", "count",
+    "monthly", "tags"} for each kind) from the user's rollups, for whole-month ranges.
+    """
+    query = {"User": user_id}
+    if start or end:
+        query["Month"] = {}
+        if start:
+            query["Month"]["$gte"] = month_key(start)
+        if end:
+            query["Month"]["$lte"] = month_key(end)
+
+    totals = {kind: {"total": 0.0, "count": 0, "monthly": defaultdict(float), "tags": defaultdict(float)} for kind in ROLLUP_KINDS}
+    kinds = {rollup_type: kind for kind, (_, rollup_type) in ROLLUP_KINDS.items()}
+    for rollup in _rollups().find(query, {"_id": 0, "Type": 1, "Month": 1, "Tag": 1, "Sum": 1, "Count": 1}):
+        kind_totals = totals[kinds[rollup["Type"]]]
+        kind_totals["total"] += rollup["Sum"]
+        kind_totals["count"] += rollup["Count"]
+        kind_totals["monthly"][rollup["Month"]] += rollup["Sum"]
+        kind_totals["tags"][rollup["Tag"]] += rollup["Sum"]
+
+    return {
+        kind: {
+            "total": round(kind_totals["total"], 2),
+            "count": kind_totals["count"],
+            "monthly": {month: round(total, 2) for month, total in sorted(kind_totals["monthly"].items())},
+            "tags": {
+                tag: round(total, 2)
+                for tag, total in sorted(kind_totals["tags"].items(), key=lambda item: item[1], reverse=True)
+            },
+        }
+        for kind, kind_totals in totals.items()
+    }
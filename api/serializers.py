@@ -1,5 +1,18 @@
 from rest_framework import serializers
 from .models import Expense, Income ,User
+from . import rollups
+
+
+class DynamicFieldsMixin:
+    """Accepts a `fields` kwarg and serializes only those fields (used for ?fields= projection)."""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
 # User serializer
 
 
@@ -24,7 +37,7 @@ class UserSerializer(serializers.Serializer):
 
 
 # Expense Serializer
-class ExpenseSerializer(serializers.Serializer):
+class ExpenseSerializer(DynamicFieldsMixin, serializers.Serializer):
     Id = serializers.CharField(read_only=True)
     User = serializers.CharField(max_length=200)
     Title = serializers.CharField(max_length=200)
@@ -36,16 +49,20 @@ class ExpenseSerializer(serializers.Serializer):
     Date = serializers.CharField()
 
     def create(self, validated_data):
-        return Expense(**validated_data).save()
+        expense = Expense(**validated_data).save()
+        rollups.add("expenses", expense)
+        return expense
 
     def update(self, instance, validated_data):
+        before = rollups.entry("expenses", instance)
         for key, value in validated_data.items():
             setattr(instance, key, value)
         instance.save()
+        rollups.replace("expenses", before, instance)
         return instance
 
 # Income Serializer
-class IncomeSerializer(serializers.Serializer):
+class IncomeSerializer(DynamicFieldsMixin, serializers.Serializer):
     Id = serializers.CharField(read_only=True)
     User = serializers.CharField(max_length=200)
     Title = serializers.CharField(max_length=200)
@@ -55,10 +72,14 @@ class IncomeSerializer(serializers.Serializer):
     Date = serializers.CharField()
 
     def create(self, validated_data):
-        return Income(**validated_data).save()
+        income = Income(**validated_data).save()
+        rollups.add("incomes", income)
+        return income
 
     def update(self, instance, validated_data):
+        before = rollups.entry("incomes", instance)
         for key, value in validated_data.items():
             setattr(instance, key, value)
         instance.save()
+        rollups.replace("incomes", before, instance)
         return instance
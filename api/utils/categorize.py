@@ -0,0 +1,100 @@
+# utils/categorize.py
+"""
+Keyword/fuzzy categorization of transaction titles into Tags.
+
+Used by the add_transaction tool (auto_categorize) and the batch categorization
+endpoint (categorize_many). It has no LangChain dependency, so the views can import it
+without loading the agent stack.
+"""
+import math
+import re
+from functools import lru_cache
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+CATEGORIES = {
+    "Food": ["food", "grocery", "supermarket", "bigbazaar", "reliance"],
+    "Entertainment": ["movie", "cinema", "netflix", "hotstar", "game", "theater"],
+    "Transportation": ["bus", "taxi", "uber", "ola", "train", "fuel", "petrol"],
+    "Utilities": ["electricity", "water bill", "gas", "internet", "wifi"],
+    "Medical": ["hospital", "doctor", "medicine", "pharmacy"],
+    "Salary": ["salary", "paycheck", "monthly pay"],
+    "Business": ["business", "client", "deal", "sale"],
+    "Investment": ["investment", "dividend", "stock", "mutual fund", "sip"],
+    "Other": ["freelance", "consulting", "misc"],
+    "Others": ["other", "random", "unknown", "misc"]
+}
+
+# Matchers built once at import. Keywords keep CATEGORIES order, so "first keyword
+# that matches" resolves exactly as a nested loop over CATEGORIES would.
+_KEYWORDS = tuple(keyword for keywords in CATEGORIES.values() for keyword in keywords)
+_KEYWORD_CATEGORIES = tuple(category for category, keywords in CATEGORIES.items() for _ in keywords)
+# One alternation tells in a single scan whether any keyword occurs at all
+_ANY_KEYWORD = re.compile("|".join(map(re.escape, _KEYWORDS)))
+# Fuzzy scores are per keyword, so a repeated keyword ("misc") is scored once, at its first position
+_FUZZY_KEYWORDS = tuple(dict.fromkeys(_KEYWORDS))
+_FUZZY_CATEGORIES = tuple(_KEYWORD_CATEGORIES[_KEYWORDS.index(keyword)] for keyword in _FUZZY_KEYWORDS)
+
+
+def _exact_category(text_lower: str):
+    """Category of the first keyword (in CATEGORIES order) contained in the text, else None."""
+    if not _ANY_KEYWORD.search(text_lower):
+        return None
+    return _KEYWORD_CATEGORIES[next(i for i, keyword in enumerate(_KEYWORDS) if keyword in text_lower)]
+
+
+@lru_cache(maxsize=4096)
+def _categorize(text_lower: str, threshold: int) -> tuple[str, int]:
+    # Exact pass: the first keyword (in CATEGORIES order) contained in the text
+    category = _exact_category(text_lower)
+    if category is not None:
+        return category, 100
+
+    # Fuzzy pass: the first keyword scoring at least `threshold`, else the best score.
+    # Only a strictly better score matters, so each call gets the best so far as its
+    # cutoff and rapidfuzz can skip alignments that cannot beat it.
+    best_index, best_score = None, 0
+    for index, keyword in enumerate(_FUZZY_KEYWORDS):
+        score = fuzz.partial_ratio(text_lower, keyword, score_cutoff=math.nextafter(best_score, math.inf))
+        if score > best_score:
+            best_index, best_score = index, score
+            if best_score >= threshold:
+                break
+    if best_index is None:
+        return "Others", 0
+    return _FUZZY_CATEGORIES[best_index], best_score
+
+
+def auto_categorize(text: str, threshold: int = 85) -> tuple[str, int]:
+    # Titles repeat a lot ("Uber", "Rent", "Coffee"), so results are memoized
+    return _categorize(text.lower(), threshold)
+
+
+def categorize_many(titles: list[str], threshold: int = 85) -> list[tuple[str, int]]:
+    """
+    auto_categorize for many titles at once, with the same (tag, score) per title.
+    Titles without an exact keyword are scored against every keyword in one
+    multi-threaded cdist call; NumPy then picks each row's first score at or above
+    the threshold, else its best score.
+    """
+    texts = [title.lower() for title in titles]
+    results = {}
+    fuzzy_texts = []
+    for text in dict.fromkeys(texts):
+        category = _exact_category(text)
+        if category is not None:
+            results[text] = (category, 100)
+        else:
+            fuzzy_texts.append(text)
+
+    if fuzzy_texts:
+        scores = process.cdist(fuzzy_texts, _FUZZY_KEYWORDS, scorer=fuzz.partial_ratio, dtype=np.float64, workers=-1)
+        above = (scores >= threshold) & (scores > 0)
+        # argmax returns the first maximum: the first True in `above`, the first best score in `scores`
+        indexes = np.where(above.any(axis=1), above.argmax(axis=1), scores.argmax(axis=1))
+        best = scores[np.arange(len(fuzzy_texts)), indexes]
+        for text, index, score in zip(fuzzy_texts, indexes.tolist(), best.tolist()):
+            results[text] = (_FUZZY_CATEGORIES[index], score) if score > 0 else ("Others", 0)
+
+    return [results[text] for text in texts]
@@ -1,4 +1,85 @@
 # utils/filter.py
+import re
+import threading
+
+NON_ACTIONABLE_KEYWORDS = {"ok", "okay", "yes", "no", "thanks", "thank you", "cool", "got it", "👍"}
+
 def is_non_actionable(message: str) -> bool:
-    non_actionable_keywords = {"ok", "okay", "yes", "no", "thanks", "thank you", "cool", "got it", "👍"}
-    return message.strip().lower() in non_actionable_keywords
+    return message.strip().lower() in NON_ACTIONABLE_KEYWORDS
+
+
+# Small talk answered locally, without an LLM call. A message only matches when it is
+# nothing but small talk ("hi!", "thanks a lot 🙏", "ok cool"); anything with real
+# content ("hi, show my March expenses") still goes to the model. Bare "yes"/"no" are
+# left to the agent: they usually answer a question it just asked.
+SMALL_TALK_INTENTS = {
+    "greeting": ["hi+", "hello+", "hey+", "yo+", "sup", "hiya", "good (?:morning|afternoon|evening)", "namaste"],
+    "how_are_you": ["how are (?:you|u)", "how r u", "how(?: is|s) it going", "what(?: is|s) up", "wassup"],
+    "thanks": ["thanks?", "thank (?:you|u)", "thx", "ty", "tysm", "much appreciated", "🙏"],
+    "acknowledgement": sorted(NON_ACTIONABLE_KEYWORDS - {"yes", "no", "thanks", "thank you"}) + [
+        "okk+", "nice", "great", "awesome", "alright", "hmm+", "sure", "👌", "😊", "🙂",
+    ],
+    "goodbye": ["bye+", "goodbye", "see (?:you|ya)", "good night", "take care"],
+}
+
+SMALL_TALK_REPLIES = {
+    "greeting": "Hi! 👋 I can add expenses and income, show spending insights, suggest budgets and track your savings goals. What would you like to do?",
+    "how_are_you": "I'm doing great, thanks for asking! How can I help with your finances today?",
+    "thanks": "You're welcome! 😊 Anything else I can help you with?",
+    "acknowledgement": "👍 Let me know whenever you need anything else.",
+    "goodbye": "Goodbye! 👋 Come back any time you want to check on your money.",
+}
+
+# Words that do not change the intent: "hi there", "thanks so much", "ok bro"
+_FILLER = r"(?:there|all|again|so much|a lot|very much|buddy|bro|bot|dude|friend|man|mate)"
+_FIRST_PHRASE = "|".join(f"(?P<{intent}>{'|'.join(patterns)})" for intent, patterns in SMALL_TALK_INTENTS.items())
+_ANY_PHRASE = "|".join(pattern for patterns in SMALL_TALK_INTENTS.values() for pattern in patterns)
+_MESSAGE = re.compile(rf"(?:{_FIRST_PHRASE})(?: {_FILLER})*(?: (?:{_ANY_PHRASE})(?: {_FILLER})*)*")
+_SEPARATORS = re.compile(r"[\s!?.,;:~\-_*\"()]+")
+
+
+class SmallTalkStats:
+    """Thread-safe counters for how many agent messages the canned responder answered."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.messages = 0
+        self.hits = {intent: 0 for intent in SMALL_TALK_INTENTS}
+
+    def record(self, intent=None):
+        with self._lock:
+            self.messages += 1
+            if intent:
+                self.hits[intent] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            total_hits = sum(self.hits.values())
+            return {
+                "messages": self.messages,
+                "hits": total_hits,
+                "hit_rate": total_hits / self.messages if self.messages else 0.0,
+                "by_intent": dict(self.hits),
+            }
+
+
+small_talk_stats = SmallTalkStats()
+
+
+def small_talk_intent(message: str):
+    """The intent of a message made only of small talk, else None."""
+    text = _SEPARATORS.sub(" ", re.sub(r"['’]", "", message.lower())).strip()
+    if not text or len(text) > 60:
+        return None
+    match = _MESSAGE.fullmatch(text)
+    if not match:
+        return None
+    # The first phrase decides the reply: "thanks, bye" is thanks
+    return next(intent for intent in SMALL_TALK_INTENTS if match.group(intent))
+
+
+def small_talk_reply(message: str):
+    """Canned reply for pure small talk (and counts the lookup for the hit rate), else None."""
+    intent = small_talk_intent(message)
+    small_talk_stats.record(intent)
+    return SMALL_TALK_REPLIES[intent] if intent else None
@@ -0,0 +1,89 @@
+# utils/lazy.py
+"""
+Process-wide singletons built on first use, plus a report of what startup cost.
+
+Firebase, the Gemini clients, the agent's MongoClient and the vector store used to
+be built at import time, so every worker and management command paid for them even
+when it never served /ai/agent/. Wrapping each in `Lazy` defers the work (and the
+heavy imports inside the factory) to the first request that needs it, and records
+how long construction took for `startup_report()`.
+"""
+import logging
+import threading
+import time
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+_registry = {}  # name -> Lazy, in registration order
+
+
+class Lazy:
+    """Thread-safe lazily constructed singleton: call it to get (and on first call, build) the value."""
+
+    def __init__(self, name: str, factory):
+        self.name = name
+        self.factory = factory
+        self.seconds = None  # construction wall time, once built
+        self._value = None
+        self._ready = False
+        self._lock = threading.Lock()
+        _registry[name] = self
+
+    def __call__(self):
+        if self._ready:
+            return self._value
+        with self._lock:
+            if not self._ready:
+                start = time.perf_counter()
+                self._value = self.factory()
+                self.seconds = time.perf_counter() - start
+                self._ready = True
+                logger.info("Initialized %s in %.0f ms", self.name, self.seconds * 1000)
+        return self._value
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def reset(self):
+        """Forget the value; the next call builds it again."""
+        with self._lock:
+            self._value = None
+            self._ready = False
+            self.seconds = None
+
+
+def lazy(name: str):
+    """Decorator form: `@lazy("gemini-llm") def get_llm(): ...`."""
+    def decorator(factory):
+        return Lazy(name, factory)
+    return decorator
+
+
+def initializers() -> dict:
+    """Every registered singleton by name, in registration order."""
+    return dict(_registry)
+
+
+def startup_report() -> dict:
+    """Seconds since the process started, current RSS, and which singletons are built (with their cost) or still deferred."""
+    process = psutil.Process()
+    return {
+        "seconds_since_start": round(time.time() - process.create_time(), 3),
+        "rss_mb": round(process.memory_info().rss / 1024 / 1024, 1),
+        "initialized": {name: round(item.seconds * 1000, 1) for name, item in _registry.items() if item.ready},
+        "deferred": [name for name, item in _registry.items() if not item.ready],
+    }
+
+
+def log_startup_report(label: str):
+    report = startup_report()
+    logger.info(
+        "%s ready in %.2fs, RSS %.1f MB; initialized: %s; deferred: %s",
+        label, report["seconds_since_start"], report["rss_mb"],
+        ", ".join(f"{name} ({ms:.0f} ms)" for name, ms in report["initialized"].items()) or "none",
+        ", ".join(report["deferred"]) or "none",
+    )
+    return report
@@ -0,0 +1,193 @@
+# utils/mongo.py
+"""
+One MongoClient per process, with pool limits from settings and pool metrics.
+
+mongoengine's connection (opened from settings.py) is the shared client: the agent's
+vector store, checkpointer and caches use the same pool instead of a second
+MongoClient with default sizing. `pool_metrics` listens to the driver's connection
+pool events and keeps checkout wait times and in-use counts; `command_metrics` counts
+operations by command for /metrics.
+"""
+import logging
+import os
+import threading
+from collections import Counter, deque
+
+from pymongo import monitoring
+
+from api.utils import tracing
+from api.utils.lazy import lazy
+from api.utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+SLOW_CHECKOUT_SECONDS = 0.5
+
+
+def _percentile(ordered: list, fraction: float) -> float:
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Thread-safe connection pool counters; `snapshot()` is what gets reported."""
+
+    def __init__(self, window=1024):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=window)  # seconds, most recent checkouts
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._waits.clear()
+            self.open = 0
+            self.in_use = 0
+            self.max_in_use = 0
+            self.waiting = 0
+            self.checkouts = 0
+            self.max_wait = 0.0
+            self.failures = Counter()
+
+    # -- driver events ---------------------------------------------------------
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.waiting += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            self.checkouts += 1
+            self._waits.append(event.duration)
+            self.max_wait = max(self.max_wait, event.duration)
+            in_use = self.in_use
+        if event.duration >= SLOW_CHECKOUT_SECONDS:
+            logger.warning(
+                "Waited %.0f ms for a MongoDB connection to %s:%s (%d in use)",
+                event.duration * 1000, *event.address, in_use,
+            )
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.failures[str(event.reason)] += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    # -- reporting -------------------------------------------------------------
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "open": self.open,
+                "in_use": self.in_use,
+                "max_in_use": self.max_in_use,
+                "waiting": self.waiting,
+                "checkouts": self.checkouts,
+                "checkout_failures": dict(self.failures),
+                "wait_ms": {
+                    "p50": round(_percentile(waits, 0.5) * 1000, 2) if waits else 0.0,
+                    "p95": round(_percentile(waits, 0.95) * 1000, 2) if waits else 0.0,
+                    "max": round(self.max_wait * 1000, 2),
+                },
+            }
+
+
+pool_metrics = PoolMetrics()
+
+MONGO_COMMANDS = registry.counter("mongodb_commands_total", "MongoDB commands by name and outcome.", ("command", "outcome"))
+MONGO_COMMAND_LATENCY = registry.histogram("mongodb_command_duration_seconds", "MongoDB command latency.", ("command",))
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Counts and times every command; inside a traced request each one is also a "db" span."""
+
+    def __init__(self):
+        self._spans = {}  # (connection, request_id) -> span, while the command runs
+
+    def started(self, event):
+        parent = tracing.current_span()
+        if parent is not None:
+            collection = event.command.get(event.command_name)
+            name = f"{event.command_name} {event.database_name}.{collection}" if isinstance(collection, str) else event.command_name
+            self._spans[(event.connection_id, event.request_id)] = parent.child("db", name)
+
+    def succeeded(self, event):
+        MONGO_COMMANDS.inc(event.command_name, "ok")
+        MONGO_COMMAND_LATENCY.observe(event.duration_micros / 1e6, event.command_name)
+        self._finish_span(event)
+
+    def failed(self, event):
+        MONGO_COMMANDS.inc(event.command_name, "error")
+        MONGO_COMMAND_LATENCY.observe(event.duration_micros / 1e6, event.command_name)
+        self._finish_span(event, event.failure)
+
+    def _finish_span(self, event, error=None):
+        span = self._spans.pop((event.connection_id, event.request_id), None)
+        if span is not None:
+            span.attributes["server_ms"] = event.duration_micros / 1000
+            span.finish(error)
+
+
+command_metrics = CommandMetrics()
+
+registry.gauge("mongodb_pool_open", "Open connections in the pool.", lambda: pool_metrics.open)
+registry.gauge("mongodb_pool_in_use", "Connections checked out.", lambda: pool_metrics.in_use)
+registry.gauge("mongodb_pool_waiting", "Checkouts waiting for a connection.", lambda: pool_metrics.waiting)
+registry.gauge("mongodb_pool_checkouts", "Connections checked out since start.", lambda: pool_metrics.checkouts)
+registry.gauge(
+    "mongodb_pool_checkout_wait_seconds", "Checkout wait over the recent window: p50, p95 and max.",
+    lambda: {(stat,): ms / 1000 for stat, ms in pool_metrics.snapshot()["wait_ms"].items()}, ("stat",),
+)
+
+
+def connect(db: str, host: str, **pool_options):
+    """Open mongoengine's default connection: the process-wide client, instrumented."""
+    from mongoengine import connect as mongoengine_connect
+
+    return mongoengine_connect(db, host=host, event_listeners=[pool_metrics, command_metrics], **pool_options)
+
+
+@lazy("mongo-client")
+def get_client():
+    """
+    The shared MongoClient. Inside Django that is mongoengine's connection; a process
+    that never opened one (a script importing the agent) gets its own, same options.
+    """
+    from mongoengine.connection import ConnectionFailure, get_connection
+
+    try:
+        return get_connection()
+    except ConnectionFailure:
+        from django.conf import settings
+        from pymongo import MongoClient
+
+        pool_options = getattr(settings, "MONGO_POOL", {}) if settings.configured else {}
+        return MongoClient(os.getenv("MONGO_URI"), event_listeners=[pool_metrics, command_metrics], **pool_options)
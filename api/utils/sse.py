@@ -0,0 +1,23 @@
+# utils/sse.py
+import json
+
+from django.http import StreamingHttpResponse
+
+
+def sse_event(event: str, data) -> str:
+    """One Server-Sent Events frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def wants_event_stream(request) -> bool:
+    # DRF requests expose query_params; plain Django (async) views only have GET
+    query_params = getattr(request, "query_params", request.GET)
+    return query_params.get("stream") in ("1", "true") or "text/event-stream" in request.headers.get("Accept", "")
+
+
+def event_stream_response(events):
+    # `events` may be a generator or, under ASGI, an async generator
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
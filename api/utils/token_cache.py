@@ -0,0 +1,71 @@
+# utils/token_cache.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class VerifiedTokenCache:
+    """
+    Bounded, thread-safe LRU of verified Firebase ID tokens.
+
+    Entries are keyed by a SHA-256 of the raw token (the token itself is never
+    stored) and expire at the token's `exp` claim, so a cached token is never
+    accepted after Firebase would have rejected it as expired.
+    """
+
+    def __init__(self, maxsize=1024, clock=time.time):
+        self.maxsize = maxsize
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str):
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            decoded, expires_at = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return decoded
+
+    def put(self, token: str, decoded: dict):
+        expires_at = decoded.get("exp")
+        if not expires_at or expires_at <= self._clock():
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (decoded, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,144 @@
+# utils/tracing.py
+"""
+Per-request span trees for the agent endpoint.
+
+AgentTraceMiddleware opens a trace for each /ai/agent/ request. LLM calls and tool
+runs (LangChain callbacks), MongoDB commands (a pymongo command listener) and HTTP
+calls made by the tools (`span()`) become spans in it. Each span records its wall
+time and the CPU time of the thread it ran on (not recorded when it ended on another
+thread). The open span is held in a ContextVar, so it follows the request into tool
+threads the same way the user context does (see api.langchainAgent.context).
+
+Finished traces go to an in-memory ring buffer (`recent_traces`, served at /traces)
+and, when AGENT_TRACE_FILE is set, are appended to that file as JSON lines.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+TRACE_BUFFER_SIZE = int(os.getenv("AGENT_TRACE_BUFFER", "200"))
+TRACE_FILE = os.getenv("AGENT_TRACE_FILE", "")
+
+_current_span = ContextVar("current_span", default=None)
+_buffer = deque(maxlen=TRACE_BUFFER_SIZE)
+_file_lock = threading.Lock()
+
+
+class Span:
+    __slots__ = ("trace_id", "kind", "name", "attributes", "children", "error",
+                 "started_at", "_start", "_cpu_start", "_thread", "wall_ms", "cpu_ms")
+
+    def __init__(self, trace_id: str, kind: str, name: str, attributes=None):
+        self.trace_id = trace_id
+        self.kind = kind
+        self.name = name
+        self.attributes = attributes or {}
+        self.children = []
+        self.error = None
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        self._thread = threading.get_ident()
+        self.wall_ms = None
+        self.cpu_ms = None
+
+    @property
+    def finished(self) -> bool:
+        return self.wall_ms is not None
+
+    def child(self, kind: str, name: str, attributes=None) -> "Span":
+        span = Span(self.trace_id, kind, name, attributes)
+        self.children.append(span)  # list.append is atomic: parallel tool threads are safe
+        return span
+
+    def finish(self, error=None):
+        if self.finished:
+            return
+        self.wall_ms = round((time.perf_counter() - self._start) * 1000, 3)
+        if threading.get_ident() == self._thread:
+            self.cpu_ms = round((time.thread_time() - self._cpu_start) * 1000, 3)
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}" if isinstance(error, BaseException) else str(error)
+
+    def to_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "started_at": self.started_at,
+            "wall_ms": self.wall_ms,
+            "cpu_ms": self.cpu_ms,
+            **({"error": self.error} if self.error else {}),
+            **({"attributes": self.attributes} if self.attributes else {}),
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+def current_span():
+    """The innermost open span of the request being traced, else None."""
+    span = _current_span.get()
+    return span if span is not None and not span.finished else None
+
+
+def set_current_span(span):
+    _current_span.set(span)
+
+
+def start_trace(name: str, **attributes) -> Span:
+    """Open the root span of a new trace and make it current."""
+    root = Span(uuid.uuid4().hex, "request", name, attributes)
+    _current_span.set(root)
+    return root
+
+
+def finish_trace(root: Span, error=None):
+    root.finish(error)
+    trace = {"trace_id": root.trace_id, **root.to_dict()}
+    _buffer.append(trace)
+    if TRACE_FILE:
+        try:
+            with _file_lock, open(TRACE_FILE, "a", encoding="utf-8") as file:
+                file.write(json.dumps(trace, default=str) + "\n")
+        except OSError as e:
+            logger.warning(f"Could not write agent trace to {TRACE_FILE}: {e}")
+    return trace
+
+
+@contextmanager
+def span(kind: str, name: str, **attributes):
+    """A child of the current span for the block; a no-op outside a traced request."""
+    parent = current_span()
+    if parent is None:
+        yield None
+        return
+    child = parent.child(kind, name, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.finish(e)
+        raise
+    finally:
+        child.finish()
+        _current_span.reset(token)
+
+
+def recent_traces(limit=20, min_ms=0.0, slowest=False) -> list:
+    """Finished traces from the ring buffer: newest first, or slowest first."""
+    traces = [trace for trace in list(_buffer) if (trace["wall_ms"] or 0) >= min_ms]
+    if slowest:
+        traces.sort(key=lambda trace: trace["wall_ms"] or 0, reverse=True)
+    else:
+        traces.reverse()
+    return traces[:limit]
+
+
+def clear_traces():
+    _buffer.clear()
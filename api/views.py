@@ -5,15 +5,27 @@ from rest_framework.response import Response
 from rest_framework import status
 from .models import Expense, Income , User
 from .serializers import ExpenseSerializer, IncomeSerializer,UserSerializer
-from api.langchainAgent.agent import llm,create_user_agent
+from . import bulk_import, data_version, repository, rollups
+from api.langchainAgent.agent import get_agent, agent_config, get_response_cache, get_thread_lock, record_cached_turn
+from api.langchainAgent.response_cache import is_cacheable, turn_tool_names
+from api.utils.categorize import categorize_many
 from datetime import datetime
 import logging
-from api.langchainAgent.context import set_user_info
+from api.langchainAgent.context import iterate_in_context, user_context
+from api.utils.token_cache import VerifiedTokenCache
+from api.utils.filter import small_talk_reply, small_talk_stats
 from functools import wraps
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from django.utils.decorators import method_decorator
 import firebase_admin
 from django.http import JsonResponse
-from firebase_admin import auth, credentials, firestore
+from rest_framework.settings import api_settings
+from api.utils.sse import event_stream_response, wants_event_stream
+from .renderers import EventStreamRenderer
+from api.langchainAgent.streaming import canned_events, error_message, message_text, stream_agent_events
+from api.langchainAgent.thread_lock import ThreadBusy
+from firebase_admin import auth, credentials
+from api.utils.lazy import lazy
 import json
 
 
@@ -28,28 +40,77 @@ if not firebase_json:
 # Convert JSON string to dictionary
 firebase_cred_dict = json.loads(firebase_json)
 
-# Only initialize once
-if not firebase_admin._apps:
-    cred = credentials.Certificate(firebase_cred_dict)  # ✅ This works for firebase_admin >= 4.3.0
-    # Or: cred = credentials.Certificate.from_json(firebase_cred_dict)  # ✅ safest
-    firebase_admin.initialize_app(cred)
+# Initialized on the first token verification, not at import
+@lazy("firebase-app")
+def get_firebase_app():
+    # Only initialize once
+    if not firebase_admin._apps:
+        cred = credentials.Certificate(firebase_cred_dict)  # ✅ This works for firebase_admin >= 4.3.0
+        # Or: cred = credentials.Certificate.from_json(firebase_cred_dict)  # ✅ safest
+        return firebase_admin.initialize_app(cred)
+    return firebase_admin.get_app()
+
+# Get Firestore client (on first use: importing google-cloud-firestore alone takes ~0.5s)
+@lazy("firestore-client")
+def get_firestore():
+    from firebase_admin import firestore
+
+    return firestore.client(get_firebase_app())
+
+
+def verify_id_token(id_token):
+    return auth.verify_id_token(id_token, app=get_firebase_app())
+
+# Verified ID tokens, so the several API calls of one page load verify a token only once
+verified_tokens = VerifiedTokenCache(maxsize=int(os.getenv("FIREBASE_TOKEN_CACHE_SIZE", "1024")))
+
+def _bearer_token(request):
+    auth_header = request.headers.get("Authorization") or request.META.get("HTTP_AUTHORIZATION")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None
+    return auth_header.split(" ")[1]
+
+
+def _set_firebase_user(request, decoded_token):
+    request.firebase_user = decoded_token  # ✅ Store in a new field
+    request.uid = decoded_token['uid']
 
-# Get Firestore client
-db = firestore.client()
 
 def firebase_authenticated(view_func):
+    if iscoroutinefunction(view_func):
+        # Async views: a token not yet cached is verified in a worker thread, off the event loop
+        @wraps(view_func)
+        async def async_wrapped_view(request, *args, **kwargs):
+            id_token = _bearer_token(request)
+            if not id_token:
+                return JsonResponse({'error': 'Unauthorized - Missing or Invalid Token'}, status=401)
+
+            try:
+                decoded_token = verified_tokens.get(id_token)
+                if decoded_token is None:
+                    decoded_token = await sync_to_async(verify_id_token, thread_sensitive=False)(id_token)
+                    verified_tokens.put(id_token, decoded_token)
+                _set_firebase_user(request, decoded_token)
+            except Exception as e:
+                logging.error(f"Invalid Firebase token: {str(e)}")
+                return JsonResponse({'error': 'Unauthorized - Token verification failed'}, status=401)
+
+            return await view_func(request, *args, **kwargs)
+
+        return async_wrapped_view
+
     @wraps(view_func)
     def wrapped_view(request, *args, **kwargs):
-        auth_header = request.headers.get("Authorization") or request.META.get("HTTP_AUTHORIZATION")
-
-        if not auth_header or not auth_header.startswith("Bearer "):
+        id_token = _bearer_token(request)
+        if not id_token:
             return JsonResponse({'error': 'Unauthorized - Missing or Invalid Token'}, status=401)
 
         try:
-            id_token = auth_header.split(" ")[1]
-            decoded_token = auth.verify_id_token(id_token)
-            request.firebase_user = decoded_token  # ✅ Store in a new field
-            request.uid = decoded_token['uid']
+            decoded_token = verified_tokens.get(id_token)
+            if decoded_token is None:
+                decoded_token = verify_id_token(id_token)
+                verified_tokens.put(id_token, decoded_token)
+            _set_firebase_user(request, decoded_token)
         except Exception as e:
             logging.error(f"Invalid Firebase token: {str(e)}")
             return JsonResponse({'error': 'Unauthorized - Token verification failed'}, status=401)
@@ -59,6 +120,42 @@ def firebase_authenticated(view_func):
     return wrapped_view
 
 
+def transaction_list_payload(query_params, kind, user_id=None):
+    """
+    List payload for the expense/income views (sync and async): keyset pages of
+    {"results": [...], "next_cursor": ...}, DEFAULT_PAGE_SIZE unless ?limit= is given,
+    continued with ?cursor=. ?fields=Title,Amount projects columns.
+    Per-user views keep the old bare array of the whole history behind an explicit
+    ?all=true, for clients that have not moved to pages yet.
+    Raises ValueError for a bad query string.
+    """
+    fields = query_params.get("fields")
+    fields = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    if query_params.get("all", "").lower() in ("1", "true"):
+        if user_id is None:
+            raise ValueError("all=true is only available for a single user's transactions.")
+        return repository.list_user_transactions(kind, user_id, fields=fields)
+    limit = query_params.get("limit")
+    limit = int(limit) if limit else repository.DEFAULT_PAGE_SIZE
+    return repository.page_transactions(kind, user_id, limit=limit, cursor=query_params.get("cursor"), fields=fields)
+
+
+def transaction_list_response(request, kind, user_id=None):
+    try:
+        return Response(transaction_list_payload(request.query_params, kind, user_id))
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def parse_summary_range(query_params):
+    """?start=YYYY-MM-DD&end=YYYY-MM-DD (both optional, inclusive); raises ValueError."""
+    start = query_params.get("start")
+    end = query_params.get("end")
+    start = datetime.strptime(start, "%Y-%m-%d").date() if start else None
+    end = datetime.strptime(end, "%Y-%m-%d").date() if end else None
+    return start, end
+
+
 # User Views
 @method_decorator(firebase_authenticated, name='dispatch')
 class UserListCreateView(APIView):
@@ -110,9 +207,7 @@ class UserDetailView(APIView):
 @method_decorator(firebase_authenticated, name='dispatch')
 class ExpenseListCreateView(APIView):
     def get(self, request):
-        expenses = Expense.objects.all()
-        serializer = ExpenseSerializer(expenses, many=True)
-        return Response(serializer.data)
+        return transaction_list_response(request, "expenses")
     def post(self, request):
         serializer = ExpenseSerializer(data=request.data)
         if serializer.is_valid():
@@ -129,17 +224,8 @@ class ExpenseDetailView(APIView):
         except Expense.DoesNotExist:
             return None
        
-    def get_objects(self, pk):
-
-        try:
-            expenses = Expense.objects.filter(User=pk)
-            serializer = ExpenseSerializer(expenses, many=True)
-            return serializer.data
-        except Expense.DoesNotExist:
-            return []            
     def get(self, request, pk):
-        expenses = self.get_objects(pk)
-        return Response(expenses)
+        return transaction_list_response(request, "expenses", pk)
     def put(self, request, pk):
         expense = self.get_object(pk)
         if not expense:
@@ -154,6 +240,7 @@ class ExpenseDetailView(APIView):
         if not expense:
             return Response({"error": "Expense not found"}, status=status.HTTP_404_NOT_FOUND)
         expense.delete()
+        rollups.remove("expenses", expense)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -161,9 +248,7 @@ class ExpenseDetailView(APIView):
 @method_decorator(firebase_authenticated, name='dispatch')
 class IncomeListCreateView(APIView):
     def get(self, request):
-        incomes = Income.objects.all()
-        serializer = IncomeSerializer(incomes, many=True)
-        return Response(serializer.data)
+        return transaction_list_response(request, "incomes")
     def post(self, request):
         print("Received data:", request.data) 
         serializer = IncomeSerializer(data=request.data)
@@ -179,16 +264,8 @@ class IncomeDetailView(APIView):
             return Income.objects.get(Id=pk)
         except Income.DoesNotExist:
             return None
-    def get_objects(self, pk):
-        try:
-            incomes = Income.objects.filter(User=pk)
-            serializer = IncomeSerializer(incomes, many=True)
-            return serializer.data
-        except Income.DoesNotExist:
-            return []   
     def get(self, request, pk):
-        incomes = self.get_objects(pk)
-        return Response(incomes)
+        return transaction_list_response(request, "incomes", pk)
     def put(self, request, pk):
         income = self.get_object(pk)
         if not income:
@@ -203,22 +280,91 @@ class IncomeDetailView(APIView):
         if not income:
             return Response({"error": "income not found"}, status=status.HTTP_404_NOT_FOUND)
         income.delete()
+        rollups.remove("incomes", income)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+@method_decorator(firebase_authenticated, name='dispatch')
+class TransactionImportView(APIView):
+    # Bulk import of the caller's expenses/incomes from a CSV or NDJSON upload, sent either
+    # as the `file` field of a multipart form or as the raw body (text/csv, application/x-ndjson).
+    # ?filetype=csv|ndjson overrides detection (DRF reserves ?format= for renderers). Returns counts and per-line errors.
+    kind = None  # "expenses" | "incomes", set in the URLconf
+
+    @method_decorator(ratelimit(key='ip', rate='10/m', method='POST', block=True))
+    def post(self, request):
+        try:
+            stream, filename, content_type = bulk_import.read_upload(request)
+            fmt = bulk_import.detect_format(request.query_params.get("filetype"), content_type, filename)
+            result = bulk_import.import_transactions(self.kind, request.uid, stream, fmt)
+        except bulk_import.ImportFormatError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_201_CREATED if result["inserted"] else status.HTTP_400_BAD_REQUEST)
+
+MAX_CATEGORIZE_TITLES = 10000
+
+@method_decorator(firebase_authenticated, name='dispatch')
+class CategorizeTitlesView(APIView):
+    # Suggested Tag for many titles in one call (statement imports, re-tagging "Others"):
+    # {"titles": [...], "threshold": 85} -> {"results": [{"title", "tag", "score"}]}, in input order.
+    # Tags are the ones the agent's auto_categorize would pick.
+
+    @method_decorator(ratelimit(key='ip', rate='30/m', method='POST', block=True))
+    def post(self, request):
+        titles = request.data.get("titles")
+        threshold = request.data.get("threshold", 85)
+        if not isinstance(titles, list) or not all(isinstance(title, str) for title in titles):
+            return Response({"error": "titles must be a list of strings."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(titles) > MAX_CATEGORIZE_TITLES:
+            return Response({"error": f"At most {MAX_CATEGORIZE_TITLES} titles per request."}, status=status.HTTP_400_BAD_REQUEST)
+        if isinstance(threshold, bool) or not isinstance(threshold, (int, float)) or not 0 <= threshold <= 100:
+            return Response({"error": "threshold must be a number between 0 and 100."}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = categorize_many(titles, threshold)
+        return Response({"results": [{"title": title, "tag": tag, "score": score} for title, (tag, score) in zip(titles, results)]})
+
 @method_decorator(firebase_authenticated, name='dispatch')
 class ResetAllTransactionsView(APIView):
     def delete(self, request):
-        user = request.uid
-        Income.objects.filter(User=user).delete()
-        Expense.objects.filter(User=user).delete()
+        repository.delete_user_transactions(request.uid)
         return Response({"message": "All income and expenses deleted successfully."}, status=status.HTTP_200_OK)
 
+@method_decorator(firebase_authenticated, name='dispatch')
+class TransactionSummaryView(APIView):
+    # Monthly / per-Tag / overall totals computed by a MongoDB aggregation pipeline.
+    # Optional ?start=YYYY-MM-DD&end=YYYY-MM-DD (inclusive) limits the date range.
+    def get(self, request, pk):
+        try:
+            start, end = parse_summary_range(request.query_params)
+        except ValueError:
+            return Response({"error": "start and end must be in YYYY-MM-DD format."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(repository.summarize_transactions(pk, start, end))
+
 ## llm part 
 logger = logging.getLogger(__name__)
 
+
+def log_small_talk_hit(view_name):
+    stats = small_talk_stats.snapshot()
+    logger.info(
+        "%s: Answered small talk locally. Hit rate %.1f%% (%d of %d messages)",
+        view_name, stats["hit_rate"] * 100, stats["hits"], stats["messages"]
+    )
+
+
+def remember_agent_reply(user_id, user_input, version, lookup, response, tool_names):
+    """Cache the reply of a read-only agent run; a run that wrote anything bumps the data version instead."""
+    if not is_cacheable(tool_names):
+        data_version.bump(user_id)
+    elif response:
+        get_response_cache().store(user_id, user_input, version, response, lookup.vector)
+
+
 @method_decorator(firebase_authenticated, name='dispatch')
 class LangChainAgentView(APIView):
+    # ?stream=1 or `Accept: text/event-stream` streams the reply as Server-Sent Events
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, EventStreamRenderer]
+
     @method_decorator(ratelimit(key='ip', rate='5/m', method='POST', block=True))
     def post(self, request):
         user_input = request.data.get("query")
@@ -229,168 +375,141 @@ class LangChainAgentView(APIView):
             return Response({"error": "Missing query, user_id, or token"}, status=status.HTTP_400_BAD_REQUEST)
 
         auth_token = id_token.split(" ")[1]
-        set_user_info(user_id, auth_token)
 
         chat_history = request.data.get("chat_history") or []
         if not isinstance(chat_history, list):
             chat_history = []
 
-        def is_natural_chat(text: str) -> bool:
-            casual_phrases = [
-                "hi", "hello", "thanks", "thank you", "how are you", "ok", "okay", "cool",
-                "nice", "great", "hmm", "yo", "sup", "good morning", "good evening", "heyy"
-            ]
-            text = text.strip().lower()
-            return any(text.startswith(phrase) or text == phrase for phrase in casual_phrases)
-
-        try:
-            logger.info("LangChainAgentView: Invoking agent for user_id: %s with query: '%s'", user_id, user_input)
-
-            if is_natural_chat(user_input):
-                logger.info("LangChainAgentView: Detected casual input. Letting base LLM respond.")
-                casual_response = llm.invoke(user_input).content
-                return Response({"response": casual_response}, status=200)
-
-            # ✅ Create per-user agent with memory
-            agent = create_user_agent(user_id)
-            config = {"configurable": {"thread_id": user_id}}
-
-            # ✅ Run agent
-            response_from_agent = agent.invoke(
-                {"messages": [{"role": "user", "content": user_input}]},
-                config=config
-            )
-            final_ai_message = response_from_agent.get("messages", [])[-1]
-            logger.info("LangChainAgentView: Agent responded: %s", final_ai_message)
-
-            return Response({"response": final_ai_message.content})
-
-        except Ratelimited:
-            logger.warning(f"LangChainAgentView: Rate limit exceeded for IP: {request.META.get('REMOTE_ADDR')}")
-            return Response(
-                {"error": "Rate limit exceeded. Please wait a minute before making more requests."},
-                status=429
-            )
-        except Exception as e:
-            if "quota" in str(e).lower() or "resource exhausted" in str(e).lower():
-                logger.error(f"LangChainAgentView: Gemini quota exceeded: {e}")
-                return Response({"error": "Our AI service has reached its usage limit for now. Please try again later."}, status=503)
-            logger.exception("LangChainAgentView: Agent crashed for input: '%s'", user_input)
-            return Response({"error": f"Agent error: {str(e)}"}, status=500)
+        # Only for this request: reset when the view returns (threads are reused), and
+        # carried into a streamed reply by iterate_in_context
+        with user_context(user_id, auth_token):
+            try:
+                logger.info("LangChainAgentView: Invoking agent for user_id: %s with query: '%s'", user_id, user_input)
+
+                stream = wants_event_stream(request)
+
+                # Pure small talk gets a canned reply: no LLM round-trip, no quota. Anything
+                # with real content goes to the agent, greeting or not ("hi, show my March expenses")
+                canned_reply = small_talk_reply(user_input)
+                if canned_reply is not None:
+                    log_small_talk_hit("LangChainAgentView")
+                    if stream:
+                        return event_stream_response(canned_events(canned_reply))
+                    return Response({"response": canned_reply}, status=200)
+
+                # ✅ Shared compiled agent; memory namespace and thread come from the config
+                agent = get_agent()
+                config = agent_config(user_id)
+
+                # ✅ Same question against unchanged data: reuse the earlier answer
+                version = data_version.current(user_id)
+                cached = get_response_cache().lookup(user_id, user_input, version)
+                if cached.response is not None:
+                    logger.info("LangChainAgentView: Answered from the response cache for user_id: %s", user_id)
+                    record_cached_turn(agent, config, user_input, cached.response)
+                    if stream:
+                        return event_stream_response(canned_events(cached.response))
+                    return Response({"response": cached.response})
+
+                def remember(response, tool_names):
+                    remember_agent_reply(user_id, user_input, version, cached, response, tool_names)
+
+                if stream:
+                    return event_stream_response(iterate_in_context(stream_agent_events(
+                        agent, user_input, config, on_complete=remember, thread_lock=get_thread_lock()
+                    )))
+
+                # ✅ Run agent, one run at a time per conversation thread
+                with get_thread_lock().hold(config["configurable"]["thread_id"]):
+                    response_from_agent = agent.invoke(
+                        {"messages": [{"role": "user", "content": user_input}]},
+                        config=config
+                    )
+                messages = response_from_agent.get("messages", [])
+                final_ai_message = messages[-1]
+                logger.info("LangChainAgentView: Agent responded: %s", final_ai_message)
+                remember(message_text(final_ai_message), turn_tool_names(messages))
+
+                return Response({"response": final_ai_message.content})
+
+            except Ratelimited:
+                logger.warning(f"LangChainAgentView: Rate limit exceeded for IP: {request.META.get('REMOTE_ADDR')}")
+                return Response(
+                    {"error": "Rate limit exceeded. Please wait a minute before making more requests."},
+                    status=429
+                )
+            except ThreadBusy as e:
+                logger.warning("LangChainAgentView: Thread busy for user_id: %s", user_id)
+                return Response({"error": error_message(e)}, status=status.HTTP_409_CONFLICT)
+            except Exception as e:
+                if "quota" in str(e).lower() or "resource exhausted" in str(e).lower():
+                    logger.error(f"LangChainAgentView: Gemini quota exceeded: {e}")
+                    return Response({"error": "Our AI service has reached its usage limit for now. Please try again later."}, status=503)
+                logger.exception("LangChainAgentView: Agent crashed for input: '%s'", user_input)
+                return Response({"error": f"Agent error: {str(e)}"}, status=500)
 
 
 @method_decorator(firebase_authenticated, name='dispatch')
 class ExpenseListCreateViewLlm(APIView):
-    # This endpoint is primarily for the LangChain agent to call.
- 
+    # This endpoint is primarily for the LangChain agent to call over HTTP.
+    # In-process tool calls go straight to repository.create_llm_transaction.
 
     def post(self, request):
         logger.info("ExpenseListCreateViewLlm: POST request received. Remote IP: %s", request.META.get('REMOTE_ADDR'))
         data = request.data
 
-        # Server-side validation for required fields (redundant with tool, but crucial for security)
-        required_fields = ["Id", "User", "Title", "Amount", "Tag", "Type", "Date"]
-        missing_fields = [field for field in required_fields if field not in data]
-        if missing_fields:
-            logger.warning("ExpenseListCreateViewLlm: Missing fields in request: %s. Data: %s", ', '.join(missing_fields), data)
-            return Response({"error": f"Missing fields: {', '.join(missing_fields)}"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Additional server-side validation for data types/formats
+        # Server-side validation (redundant with tool, but crucial for security)
         try:
-            # Ensure Amount is a float and positive
-            data['Amount'] = float(data['Amount'])
-            if data['Amount'] <= 0:
-                logger.warning("ExpenseListCreateViewLlm: Invalid amount (must be positive): %s. Data: %s", data['Amount'], data)
-                return Response({"error": "Amount must be a positive number."}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Ensure Date is valid and not in the future
-            expense_date_obj = datetime.strptime(data['Date'], "%Y-%m-%d").date()
-            if expense_date_obj > datetime.now().date():
-                logger.warning("ExpenseListCreateViewLlm: Expense date in future: %s. Data: %s", data['Date'], data)
-                return Response({"error": "Expense date cannot be in the future."}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Reformat date to ensure consistency if needed by serializer/model
-            data['Date'] = expense_date_obj.strftime("%Y-%m-%d")
-
-        except (ValueError, TypeError) as ve:
-            logger.warning("ExpenseListCreateViewLlm: Data type or format error: %s. Data: %s", str(ve), data)
-            return Response({"error": f"Invalid data format: {ve}"}, status=status.HTTP_400_BAD_REQUEST)
+            repository.validate_llm_payload("expenses", data)
+        except repository.TransactionValidationError as ve:
+            logger.warning("ExpenseListCreateViewLlm: Validation failed: %s. Data: %s", ve, data)
+            return Response(ve.errors, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.exception("ExpenseListCreateViewLlm: Unexpected data processing error for data: %s", data)
             return Response({"error": f"An unexpected data processing error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        serializer = ExpenseSerializer(data=data)
-        if serializer.is_valid():
-            try:
+        try:
+            saved = repository.create_transaction("expenses", data)
+        except repository.TransactionValidationError as ve:
+            logger.warning("ExpenseListCreateViewLlm: Serializer validation failed: %s. Data: %s", ve.errors, data)
+            return Response(ve.errors, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.exception("ExpenseListCreateViewLlm: Error saving expense through serializer for data: %s", data)
+            return Response({"error": f"Failed to save expense: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-                serializer.save()
-                logger.info("ExpenseListCreateViewLlm: Expense added successfully. ID: %s by User: %s", data.get("Id"), data.get("User"))
-                return Response(serializer.data, status=status.HTTP_201_CREATED)
-            except Exception as e:
-                logger.exception("ExpenseListCreateViewLlm: Error saving expense through serializer for data: %s", data)
-                return Response({"error": f"Failed to save expense: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        else:
-            logger.warning("ExpenseListCreateViewLlm: Serializer validation failed: %s. Data: %s", serializer.errors, data)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        logger.info("ExpenseListCreateViewLlm: Expense added successfully. ID: %s by User: %s", data.get("Id"), data.get("User"))
+        return Response(saved, status=status.HTTP_201_CREATED)
 
 
 
 
 @method_decorator(firebase_authenticated, name='dispatch')
 class IncomeListCreateViewLlm(APIView):
-    # This endpoint is primarily for the LangChain agent/tool to call to add income.
+    # This endpoint is primarily for the LangChain agent/tool to call to add income over HTTP.
+    # In-process tool calls go straight to repository.create_llm_transaction.
 
     def post(self, request):
         logger.info("IncomeListCreateViewLlm: POST request received. Remote IP: %s", request.META.get('REMOTE_ADDR'))
         data = request.data
 
-        # Note: 'Type' should explicitly be "Income" for this endpoint's purpose
-        required_fields = ["Id", "User", "Title", "Amount", "Tag", "Type", "Date"]
-        missing_fields = [field for field in required_fields if field not in data]
-        if missing_fields:
-            logger.warning("IncomeListCreateViewLlm: Missing fields in request: %s. Data: %s", ', '.join(missing_fields), data)
-            return Response({"error": f"Missing fields: {', '.join(missing_fields)}"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Additional server-side validation for data types/formats
+        # Note: 'Type' must explicitly be "Income" for this endpoint's purpose
         try:
-            # Ensure Amount is a float and positive
-            data['Amount'] = float(data['Amount'])
-            if data['Amount'] <= 0:
-                logger.warning("IncomeListCreateViewLlm: Invalid amount (must be positive): %s. Data: %s", data['Amount'], data)
-                return Response({"error": "Amount must be a positive number."}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Ensure Date is valid and not in the future (using current date/time)
-            income_date_obj = datetime.strptime(data['Date'], "%Y-%m-%d").date()
-            if income_date_obj > datetime.now().date(): # Compare only dates, ignoring time
-                logger.warning("IncomeListCreateViewLlm: Income date in future: %s. Data: %s", data['Date'], data)
-                return Response({"error": "Income date cannot be in the future."}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Reformat date to ensure consistency if needed by serializer/model
-            data['Date'] = income_date_obj.strftime("%Y-%m-%d")
-
-            # Validate that 'Type' is indeed "Income" for this endpoint
-            if data.get('Type') != "Income":
-                logger.warning("IncomeListCreateViewLlm: Invalid 'Type' specified. Expected 'Income', got '%s'. Data: %s", data.get('Type'), data)
-                return Response({"error": "Invalid 'Type'. This endpoint only accepts 'Income' type."}, status=status.HTTP_400_BAD_REQUEST)
-
-        except (ValueError, TypeError) as ve:
-            logger.warning("IncomeListCreateViewLlm: Data type or format error: %s. Data: %s", str(ve), data)
-            return Response({"error": f"Invalid data format: {ve}"}, status=status.HTTP_400_BAD_REQUEST)
+            repository.validate_llm_payload("incomes", data)
+        except repository.TransactionValidationError as ve:
+            logger.warning("IncomeListCreateViewLlm: Validation failed: %s. Data: %s", ve, data)
+            return Response(ve.errors, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.exception("IncomeListCreateViewLlm: Unexpected data processing error for data: %s", data)
             return Response({"error": f"An unexpected data processing error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        try:
+            saved = repository.create_transaction("incomes", data)
+        except repository.TransactionValidationError as ve:
+            logger.warning("IncomeListCreateViewLlm: Serializer validation failed: %s. Data: %s", ve.errors, data)
+            return Response(ve.errors, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.exception("IncomeListCreateViewLlm: Error saving income through serializer for data: %s", data)
+            return Response({"error": f"Failed to save income: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        serializer = IncomeSerializer(data=data) 
-        if serializer.is_valid():
-            try:
-                serializer.save()
-                logger.info("IncomeListCreateViewLlm: Income added successfully. ID: %s by User: %s", data.get("Id"), data.get("User"))
-                return Response(serializer.data, status=status.HTTP_201_CREATED)
-            except Exception as e:
-                logger.exception("IncomeListCreateViewLlm: Error saving income through serializer for data: %s", data)
-                return Response({"error": f"Failed to save income: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        else:
-            logger.warning("IncomeListCreateViewLlm: Serializer validation failed: %s. Data: %s", serializer.errors, data)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
+        logger.info("IncomeListCreateViewLlm: Income added successfully. ID: %s by User: %s", data.get("Id"), data.get("User"))
+        return Response(saved, status=status.HTTP_201_CREATED)
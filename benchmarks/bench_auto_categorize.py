@@ -0,0 +1,109 @@
+"""
+Per-call latency of auto_categorize (and per-title cost of categorize_many) against
+the original keyword loops.
+
+    python -m benchmarks.bench_auto_categorize [--repeat 5] [--titles 2000]
+
+Checks that both give identical results on every title before timing them. The
+memoized timing starts each run with an empty cache, so it only gains from titles
+repeated within the run.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from rapidfuzz import fuzz
+
+from api.utils.categorize import CATEGORIES, _categorize, auto_categorize, categorize_many
+
+SAMPLE_TITLES = [
+    "Uber to airport", "Big Bazaar groceries", "Netflix subscription", "Electricity bill",
+    "Apollo pharmacy", "Monthly pay", "Client dinner", "SIP mutual fund", "Freelance logo",
+    "Coffee", "Gym membership", "Rent", "Petrol pump", "Birthday gift", "Zomato order",
+    "Hospitl visit", "Grocry run", "Netflx", "Movie tickets at PVR", "Random stuff",
+]
+
+
+def legacy_auto_categorize(text: str, threshold: int = 85) -> tuple[str, int]:
+    """auto_categorize before it was precompiled: one substring check and one partial_ratio per keyword."""
+    text_lower = text.lower()
+
+    for category, keywords in CATEGORIES.items():
+        for keyword in keywords:
+            if keyword in text_lower:
+                return category, 100
+
+    best_category = "Others"
+    best_score = 0
+    for category, keywords in CATEGORIES.items():
+        for keyword in keywords:
+            score = fuzz.partial_ratio(text_lower, keyword)
+            if score > best_score:
+                best_score = score
+                best_category = category
+                if best_score >= threshold:
+                    return best_category, best_score
+
+    return best_category, best_score
+
+
+def generate_titles(count: int, seed: int = 7) -> list[str]:
+    """Sample titles plus random words, some with a keyword typo, so both passes get exercised."""
+    rng = random.Random(seed)
+    words = [keyword for keywords in CATEGORIES.values() for keyword in keywords]
+    filler = ["paid", "for", "the", "weekly", "shop", "with", "friends", "at", "store", "online", "cash", "card"]
+    titles = list(SAMPLE_TITLES)
+    while len(titles) < count:
+        parts = rng.sample(filler, rng.randint(1, 4))
+        if rng.random() < 0.5:
+            word = rng.choice(words)
+            if rng.random() < 0.5 and len(word) > 3:
+                position = rng.randrange(len(word))
+                word = word[:position] + word[position + 1:]
+            parts.insert(rng.randrange(len(parts) + 1), word)
+        titles.append(" ".join(parts).title())
+    return titles[:count]
+
+
+def uncached_auto_categorize(text: str, threshold: int = 85) -> tuple[str, int]:
+    return _categorize.__wrapped__(text.lower(), threshold)
+
+
+def time_per_call(func, titles, repeat):
+    runs = []
+    for _ in range(repeat):
+        _categorize.cache_clear()
+        start = time.perf_counter()
+        for title in titles:
+            func(title)
+        runs.append((time.perf_counter() - start) / len(titles))
+    return statistics.median(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--titles", type=int, default=2000)
+    args = parser.parse_args()
+
+    titles = generate_titles(args.titles)
+    mismatches = [title for title in titles if auto_categorize(title) != legacy_auto_categorize(title)]
+    if mismatches:
+        raise SystemExit(f"auto_categorize differs from the original on {len(mismatches)} titles, e.g. {mismatches[:3]}")
+
+    before = time_per_call(legacy_auto_categorize, titles, args.repeat)
+    print(f"{len(titles)} titles ({len(set(titles))} distinct), identical results")
+    print(f"before:          {before * 1e6:8.1f} µs/call")
+    for label, func in [("after, uncached", uncached_auto_categorize), ("after, memoized", auto_categorize)]:
+        after = time_per_call(func, titles, args.repeat)
+        print(f"{label}: {after * 1e6:8.1f} µs/call  ({before / after:.1f}x)")
+
+    start = time.perf_counter()
+    categorize_many(titles)
+    batch = (time.perf_counter() - start) / len(titles)
+    print(f"categorize_many: {batch * 1e6:8.1f} µs/title ({before / batch:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
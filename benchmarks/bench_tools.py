@@ -0,0 +1,282 @@
+"""
+Latency and peak memory of the agent tools on synthetic histories, with a JSON
+baseline to catch regressions.
+
+    python -m benchmarks.bench_tools [--sizes 1000,100000,1000000] [--repeat 5]
+        [--cases financial_insight,...] [--save baseline.json]
+        [--compare baseline.json] [--tolerance 0.25]
+
+Each size is one user with that many transactions (two thirds expenses) over the
+last two years. The tools' data access is answered in memory, the way production
+answers it:
+- fetch_summary for whole months folds precomputed monthly rollups (api/rollups.py);
+  other ranges scan the raw history, like the repository's aggregation fallback;
+- fetch_transactions copies the whole history out, like a full list download.
+So a tool stays flat across sizes only while it reads rollups; one that starts
+reading raw history grows with it. MongoDB itself is not measured here (see
+benchmarks.load_test).
+
+auto_categorize runs once per transaction title, with an empty cache at the start
+of each run.
+
+Latency is the median of --repeat runs after a warm-up. Peak memory is measured
+in one more run under tracemalloc. --save writes the results to a JSON file.
+--compare checks them against a saved file and exits with status 1 when a case is
+slower, or peaks higher, by more than --tolerance. Compare only runs from the same
+machine.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import ExitStack
+from datetime import date, timedelta
+from unittest import mock
+
+from api.langchainAgent import data_access
+from api.langchainAgent.context import user_context
+from api.langchainAgent.Tools import financial_insight_tool, goal_tracker_tool, optimize_budget
+from api.utils.categorize import _categorize, auto_categorize
+from benchmarks.bench_auto_categorize import generate_titles
+
+USER_ID = "bench-user"
+EXPENSE_TAGS = ["Food", "Transportation", "Utilities", "Entertainment", "Medical", "Others"]
+INCOME_TAGS = ["Salary", "Business", "Investment"]
+HISTORY_DAYS = 730
+
+# Below these, a difference is timer or allocator noise whatever the ratio
+MIN_MS_DELTA = 0.25
+MIN_KIB_DELTA = 64
+
+# Modules whose data-access functions are answered from the synthetic history
+TOOL_MODULES = (data_access, financial_insight_tool, optimize_budget, goal_tracker_tool)
+
+
+class History:
+    """A user's synthetic transactions, stored column-wise, with their monthly rollups."""
+
+    def __init__(self, size: int, seed: int = 7):
+        rng = random.Random(seed)
+        today = date.today()
+        titles = generate_titles(2000, seed)
+        self.size = size
+        self.kinds, self.titles, self.amounts, self.tags, self.dates = [], [], [], [], []
+        # (kind, "YYYY-MM", Tag) -> [sum, count]
+        self.rollups = defaultdict(lambda: [0.0, 0])
+        for i in range(size):
+            kind = "expenses" if i % 3 else "incomes"
+            if kind == "expenses":
+                amount, tag = round(rng.uniform(10, 5000), 2), rng.choice(EXPENSE_TAGS)
+            else:
+                amount, tag = round(rng.uniform(1000, 100000), 2), rng.choice(INCOME_TAGS)
+            day = today - timedelta(days=rng.randrange(HISTORY_DAYS))
+            self.kinds.append(kind)
+            self.titles.append(rng.choice(titles))
+            self.amounts.append(amount)
+            self.tags.append(tag)
+            self.dates.append(day)
+            totals = self.rollups[kind, day.strftime("%Y-%m"), tag]
+            totals[0] += amount
+            totals[1] += 1
+
+    def rows(self, kind: str):
+        for i in range(self.size):
+            if self.kinds[i] == kind:
+                yield i
+
+    def fetch_transactions(self, kind, user_id, auth_token, fields=None, timeout=120):
+        documents = [
+            {
+                "Id": f"{kind}-{i}", "User": user_id, "Title": self.titles[i], "Amount": self.amounts[i],
+                "Tag": self.tags[i], "Type": "Expense" if kind == "expenses" else "Income",
+                "Date": self.dates[i].isoformat(),
+            }
+            for i in self.rows(kind)
+        ]
+        if fields:
+            documents = [{field: document[field] for field in fields} for document in documents]
+        return documents
+
+    def fetch_summary(self, user_id, auth_token, start=None, end=None, timeout=120):
+        """Same shape as repository.summarize_transactions."""
+        totals = {kind: {"total": 0.0, "count": 0, "monthly": defaultdict(float), "tags": defaultdict(float)}
+                  for kind in ("expenses", "incomes")}
+
+        def add(kind, month, tag, amount, count):
+            kind_totals = totals[kind]
+            kind_totals["total"] += amount
+            kind_totals["count"] += count
+            kind_totals["monthly"][month] += amount
+            kind_totals["tags"][tag] += amount
+
+        whole_months = (not start or start.day == 1) and (not end or (end + timedelta(days=1)).day == 1)
+        if whole_months:
+            first = start.strftime("%Y-%m") if start else ""
+            last = end.strftime("%Y-%m") if end else "9999-99"
+            for (kind, month, tag), (amount, count) in self.rollups.items():
+                if first <= month <= last:
+                    add(kind, month, tag, amount, count)
+        else:
+            for i in range(self.size):
+                day = self.dates[i]
+                if (not start or day >= start) and (not end or day <= end):
+                    add(self.kinds[i], day.strftime("%Y-%m"), self.tags[i], self.amounts[i], 1)
+
+        return {
+            "start": start.strftime("%Y-%m-%d") if start else None,
+            "end": end.strftime("%Y-%m-%d") if end else None,
+            **{
+                kind: {
+                    "total": round(kind_totals["total"], 2),
+                    "count": kind_totals["count"],
+                    "monthly": {month: round(total, 2) for month, total in sorted(kind_totals["monthly"].items())},
+                    "tags": {
+                        tag: round(total, 2)
+                        for tag, total in sorted(kind_totals["tags"].items(), key=lambda item: item[1], reverse=True)
+                    },
+                }
+                for kind, kind_totals in totals.items()
+            },
+        }
+
+
+def install(history: History, stack: ExitStack):
+    """Point every tool module's data-access functions at `history` for the life of `stack`."""
+    for module in TOOL_MODULES:
+        for name in ("fetch_summary", "fetch_transactions"):
+            if hasattr(module, name):
+                stack.enter_context(mock.patch.object(module, name, getattr(history, name)))
+    stack.enter_context(user_context(USER_ID, "bench-token"))
+
+
+def categorize_history(history: History):
+    _categorize.cache_clear()
+    return [auto_categorize(title) for title in history.titles]
+
+
+# case -> function of the history; tool cases return the tool's reply
+CASES = {
+    "financial_insight": lambda history: financial_insight_tool.financial_insight.func("Show insights for last month"),
+    "financial_insight_year": lambda history: financial_insight_tool.financial_insight.func(
+        f"Give insights for {date.today().year} overall"
+    ),
+    "optimize_budgets": lambda history: optimize_budget.optimize_budgets.func("Optimize my budget"),
+    "goal_tracker": lambda history: goal_tracker_tool.goal_tracker.func("I want to save ₹50000 in 6 months"),
+    "auto_categorize": categorize_history,
+}
+
+
+def measure(func, repeat: int) -> dict:
+    func()  # warm-up: imports, regex compilation, allocator
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"ms": round(statistics.median(runs) * 1000, 4), "peak_kib": round(peak / 1024, 1)}
+
+
+def run(sizes, cases, repeat) -> dict:
+    results = {case: {} for case in cases}
+    for size in sizes:
+        start = time.perf_counter()
+        history = History(size)
+        print(f"history {size:>9}: generated in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        with ExitStack() as stack:
+            install(history, stack)
+            for case in cases:
+                reply = CASES[case](history)
+                if isinstance(reply, str) and reply.startswith(("❌", "📭", "⚠️")):
+                    raise SystemExit(f"{case} did not reach its normal path at history {size}: {reply[:120]}")
+                results[case][str(size)] = measure(lambda: CASES[case](history), repeat)
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def find_regressions(baseline: dict, current: dict, tolerance: float) -> list:
+    """(case, size, metric, before, after) for every measurement worse than the baseline by more than `tolerance`."""
+    regressions = []
+    for case, sizes in current["results"].items():
+        for size, after in sizes.items():
+            before = baseline.get("results", {}).get(case, {}).get(size)
+            if before is None:
+                continue
+            for metric, min_delta in (("ms", MIN_MS_DELTA), ("peak_kib", MIN_KIB_DELTA)):
+                if after[metric] > before[metric] * (1 + tolerance) and after[metric] - before[metric] > min_delta:
+                    regressions.append((case, size, metric, before[metric], after[metric]))
+    return regressions
+
+
+def print_results(current: dict, baseline=None):
+    for case, sizes in current["results"].items():
+        for size, after in sizes.items():
+            line = f"{case:<24} {int(size):>9}  {after['ms']:>10.3f} ms  {after['peak_kib']:>10.1f} KiB"
+            before = (baseline or {}).get("results", {}).get(case, {}).get(size)
+            if before:
+                line += "  (" + ", ".join(
+                    f"{metric} {(after[metric] / before[metric] - 1) * 100:+.0f}%" if before[metric] else f"{metric} n/a"
+                    for metric in ("ms", "peak_kib")
+                ) + ")"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="comma-separated history sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--cases", default=",".join(CASES), help=f"comma-separated subset of {', '.join(CASES)}")
+    parser.add_argument("--save", metavar="PATH", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="fail on regressions against this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown/growth, as a fraction")
+    args = parser.parse_args()
+
+    cases = [case.strip() for case in args.cases.split(",") if case.strip()]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if (baseline.get("python"), baseline.get("platform")) != (platform.python_version(), platform.platform()):
+            print(f"warning: baseline was recorded on {baseline.get('platform')} / Python {baseline.get('python')}",
+                  file=sys.stderr)
+
+    current = run(sizes, cases, args.repeat)
+    print_results(current, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(current, file, indent=2)
+            file.write("\n")
+        print(f"saved to {args.save}")
+
+    if baseline is not None:
+        regressions = find_regressions(baseline, current, args.tolerance)
+        for case, size, metric, before, after in regressions:
+            print(f"REGRESSION {case} @ {size}: {metric} {before} -> {after}", file=sys.stderr)
+        if regressions:
+            raise SystemExit(1)
+        print(f"no regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Hermetic load test of the HTTP API: latency percentiles and throughput per endpoint.
+
+    python -m benchmarks.load_test [--history 100,1000,10000] [--requests 200]
+        [--concurrency 8] [--mode wsgi|asgi] [--mongo-uri mongodb://localhost:27017]
+        [--llm-latency-ms 0] [--json]
+
+The app is booted in-process with local stand-ins, so nothing reaches Firebase,
+Gemini or Atlas:
+- MongoDB: mongomock (pip install mongomock), or a local mongod with --mongo-uri
+  (its "expensestracker" database is dropped between runs);
+- Firebase: api.views.verify_id_token accepts any "Bearer user-<n>" token;
+- Gemini: a fake chat model replaces ChatGoogleGenerativeAI (and a hash-based fake
+  replaces the embeddings), so /ai/agent/ goes through the real key pool, agent graph,
+  checkpointer and financial_insight tool, with --llm-latency-ms per model call.
+
+For each history size (transactions per user, split between expenses and incomes)
+the database is reseeded, then each endpoint gets --requests requests from
+--concurrency clients: threads on the WSGI handler, or tasks on the ASGI handler with
+--mode asgi. Rate limiting is switched off. Times are in-process (no sockets): they
+measure the Django stack, views, repository and agent, not the network.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from functools import partial
+
+ENDPOINTS = ("expenses-by-user", "incomes-page", "add-expense", "agent")
+TAGS = ["Food", "Transportation", "Utilities", "Entertainment", "Medical", "Others"]
+
+
+# -- stand-ins -----------------------------------------------------------------
+
+def configure_environment(args):
+    """Settings the app reads at import time; must run before django.setup()."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "expensetracker.settings")
+    os.environ.update({
+        "MONGO_URI": args.mongo_uri or "mongodb://localhost:27017",
+        "DJANGO_SECRET_KEY": "load-test",
+        "FIREBASE_CREDENTIALS_JSON": "{}",  # never used: token verification is stubbed
+        "GOOGLE_API_KEY_1": "load-test-key-1",
+        "GOOGLE_API_KEY_2": "load-test-key-2",
+        "ASYNC_VIEWS": "true" if args.mode == "asgi" else "false",
+        "AGENT_DATA_ACCESS": "direct",
+    })
+
+    if not args.mongo_uri:
+        try:
+            import mongomock
+        except ImportError:
+            raise SystemExit("mongomock is not installed: pip install mongomock, or pass --mongo-uri for a local mongod")
+        from api.utils import mongo
+
+        accept_bulk_sort(mongomock)
+        mongo.connect = partial(mongo.connect, mongo_client_class=mongomock.MongoClient)
+
+
+def accept_bulk_sort(mongomock):
+    """pymongo 4.11+ passes sort= to bulk UpdateOne/ReplaceOne, which mongomock 4.3 does not take; drop it."""
+    builder = mongomock.collection.BulkOperationBuilder
+    for name in ("add_update", "add_replace"):
+        method = getattr(builder, name)
+
+        def without_sort(self, *args, _method=method, sort=None, **kwargs):
+            return _method(self, *args, **kwargs)
+
+        setattr(builder, name, without_sort)
+
+
+def fake_models(llm_latency):
+    """A chat model that asks financial_insight once and then answers, and a deterministic embedder."""
+    from langchain_core.embeddings import Embeddings
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+    from pydantic import ConfigDict
+
+    class FakeGeminiChat(BaseChatModel):
+        model_config = ConfigDict(extra="allow")
+
+        @property
+        def _llm_type(self):
+            return "fake-gemini"
+
+        def bind_tools(self, tools, **kwargs):
+            return self.bind(tools=[tool.name for tool in tools], **kwargs)
+
+        def _generate(self, messages, stop=None, run_manager=None, tools=(), **kwargs):
+            if llm_latency:
+                time.sleep(llm_latency)
+            if tools and messages[-1].type == "human":
+                message = AIMessage(content="", tool_calls=[
+                    {"name": "financial_insight", "args": {"query": "insights for this month"}, "id": f"call-{uuid.uuid4().hex}"},
+                ])
+            else:
+                message = AIMessage(content="Here is how your month looks.")
+            message.usage_metadata = {"input_tokens": 50 * len(messages), "output_tokens": 20, "total_tokens": 50 * len(messages) + 20}
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+    class FakeGeminiEmbeddings(Embeddings):
+
+        def __init__(self, **kwargs):
+            self.model = kwargs.get("model", "fake-embeddings")
+
+        def embed_query(self, text):
+            digest = hashlib.sha256(text.encode("utf-8")).digest()
+            return [byte / 255 for byte in digest[:16]]
+
+        def embed_documents(self, texts):
+            return [self.embed_query(text) for text in texts]
+
+    return FakeGeminiChat, FakeGeminiEmbeddings
+
+
+def install_stand_ins(args):
+    import langchain_google_genai
+    from django.conf import settings
+
+    from api import views
+
+    def verify_id_token(id_token):
+        if not id_token.startswith("user-"):
+            raise ValueError("not a load-test token")
+        return {"uid": id_token, "exp": time.time() + 3600}
+
+    views.verify_id_token = verify_id_token
+    settings.RATELIMIT_ENABLE = False
+    langchain_google_genai.ChatGoogleGenerativeAI, langchain_google_genai.GoogleGenerativeAIEmbeddings = (
+        fake_models(args.llm_latency_ms / 1000)
+    )
+
+
+# -- data ----------------------------------------------------------------------
+
+def seed(history: int, users: int):
+    """`history` transactions for each user (two thirds expenses), with their rollups."""
+    from mongoengine.connection import get_db
+
+    from api import rollups
+    from api.models import Expense, Income, User
+    from api.utils.lazy import initializers
+
+    get_db().client.drop_database(get_db().name)
+    # Rebuilt on next use: the checkpointer recreates its indexes, caches start empty
+    for initializer in initializers().values():
+        initializer.reset()
+    today = date.today()
+    for n in range(users):
+        user_id = f"user-{n}"
+        User(Id=user_id, Displayname=f"Load test {n}", email=f"{user_id}@example.com").save()
+        expenses, incomes = [], []
+        for i in range(history):
+            day = today - timedelta(days=i % 365)
+            if i % 3:
+                expenses.append(Expense(
+                    Id=uuid.uuid4().hex, User=user_id, Title=f"Expense {i}", Amount=10 + i % 500,
+                    Tag=TAGS[i % len(TAGS)], Type="Expense", Paymentmethod="Card", Date=day,
+                ))
+            else:
+                incomes.append(Income(
+                    Id=uuid.uuid4().hex, User=user_id, Title=f"Income {i}", Amount=1000 + i % 5000,
+                    Tag="Salary", Type="Income", Date=day,
+                ))
+        for model, documents in ((Expense, expenses), (Income, incomes)):
+            if documents:
+                model.objects.insert(documents, load_bulk=False)
+        rollups.rebuild_user(user_id)
+
+
+def make_request(endpoint: str, n: int, users: int):
+    """(method, path, json body or None, token) for request `n` of an endpoint."""
+    user_id = f"user-{n % users}"
+    if endpoint == "expenses-by-user":
+        return "get", f"/expenses/{user_id}/", None, user_id
+    if endpoint == "incomes-page":
+        return "get", "/incomes/?limit=50", None, user_id
+    if endpoint == "add-expense":
+        return "post", "/expenses/add/", {
+            "Id": uuid.uuid4().hex, "User": user_id, "Title": f"Load test {n}", "Amount": 120.5,
+            "Tag": "Food", "Type": "Expense", "Date": date.today().strftime("%Y-%m-%d"),
+            "Paymentmethod": "Card", "Description": "",
+        }, user_id
+    # A distinct question each time, so the response cache does not answer it
+    question = f"How am I doing this month? ({uuid.uuid4().hex[:8]})"
+    return "post", "/ai/agent/", {"query": question, "user_id": user_id}, user_id
+
+
+# -- load ----------------------------------------------------------------------
+
+def run_wsgi(endpoint, args):
+    from django.test import Client
+
+    local = threading.local()
+
+    def one(n):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = Client()
+        method, path, body, token = make_request(endpoint, n, args.users)
+        start = time.perf_counter()
+        response = getattr(client, method)(
+            path, json.dumps(body) if body else None, content_type="application/json",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        return time.perf_counter() - start, response.status_code
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(one, range(args.requests)))
+        return results, time.perf_counter() - start
+
+
+def run_asgi(endpoint, args):
+    from django.test import AsyncClient
+
+    async def main():
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def one(n):
+            method, path, body, token = make_request(endpoint, n, args.users)
+            async with semaphore:
+                start = time.perf_counter()
+                response = await getattr(client, method)(
+                    path, json.dumps(body) if body else None, content_type="application/json",
+                    headers={"Authorization": f"Bearer {token}"},
+                )
+                return time.perf_counter() - start, response.status_code
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(n) for n in range(args.requests)))
+        return results, time.perf_counter() - start
+
+    return asyncio.run(main())
+
+
+def percentile(ordered: list, fraction: float) -> float:
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def summarize(results, wall) -> dict:
+    latencies = sorted(seconds for seconds, _ in results)
+    statuses = {}
+    for _, status in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "requests": len(results),
+        "rps": round(len(results) / wall, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "statuses": statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--history", default="100,1000,10000", help="Transactions per user, comma separated.")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and history size.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mode", choices=("wsgi", "asgi"), default="wsgi")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help=f"Subset of {', '.join(ENDPOINTS)}.")
+    parser.add_argument("--mongo-uri", help="A local mongod instead of mongomock. Its expensestracker database is dropped.")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated Gemini latency per model call.")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    args = parser.parse_args()
+
+    endpoints = [endpoint.strip() for endpoint in args.endpoints.split(",") if endpoint.strip()]
+    unknown = sorted(set(endpoints) - set(ENDPOINTS))
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(unknown)}")
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    configure_environment(args)
+    import logging
+    import django
+
+    django.setup()
+    logging.disable(logging.WARNING)  # per-request INFO/WARNING lines would dominate the timings
+    install_stand_ins(args)
+    run = run_asgi if args.mode == "asgi" else run_wsgi
+
+    report = []
+    for history in [int(size) for size in args.history.split(",")]:
+        seed(history, args.users)
+        for endpoint in endpoints:
+            run(endpoint, argparse.Namespace(**{**vars(args), "requests": min(args.concurrency, args.requests)}))  # warm-up
+            results, wall = run(endpoint, args)
+            report.append({"history": history, "endpoint": endpoint, **summarize(results, wall)})
+            if not args.json:
+                row = report[-1]
+                print(
+                    f"history {history:>6}  {endpoint:<17} {row['rps']:>8.1f} req/s   "
+                    f"p50 {row['p50_ms']:>8.2f}  p95 {row['p95_ms']:>8.2f}  p99 {row['p99_ms']:>8.2f} ms   "
+                    f"{' '.join(f'{status}x{count}' for status, count in sorted(row['statuses'].items()))}",
+                    flush=True,
+                )
+    if args.json:
+        print(json.dumps({"mode": args.mode, "users": args.users, "concurrency": args.concurrency, "results": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,16 @@ ASGI config for expensetracker project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serving through this entry point switches the agent and transaction endpoints to
+the async views (settings.ASYNC_VIEWS, api/async_views.py), so each worker process
+handles many concurrent LLM-bound requests instead of one. Deploy with uvicorn
+workers under gunicorn:
+
+    gunicorn expensetracker.asgi:application -k uvicorn_worker.UvicornWorker \\
+        --workers 2 --bind=0.0.0.0:8000 --timeout 120
+
+or, for local development, ``uvicorn expensetracker.asgi:application --reload``.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -12,5 +22,15 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'expensetracker.settings')
+os.environ.setdefault('ASYNC_VIEWS', 'true')
 
 application = get_asgi_application()
+
+# Load the URLconf (and the views) now rather than on the first request, then log
+# the boot cost. Firebase, Gemini and the agent's Mongo clients stay deferred until
+# first use (api/utils/lazy.py).
+from django.urls import get_resolver
+from api.utils.lazy import log_startup_report
+
+get_resolver().url_patterns
+log_startup_report("ASGI worker")
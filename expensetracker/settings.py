@@ -1,9 +1,9 @@
 import os
 from pathlib import Path
 import environ
-from mongoengine import connect
 from dotenv import load_dotenv
 from corsheaders.defaults import default_headers
+from api.utils import mongo
 
 # Base Directory
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -13,9 +13,16 @@ load_dotenv(dotenv_path=BASE_DIR / '.env')
 env = environ.Env()
 environ.Env.read_env(os.path.join(BASE_DIR, '.env'))
 
-# MongoDB Connection (MongoEngine)
+# MongoDB Connection (MongoEngine): one pooled client per process, shared with the agent
 MONGO_URI = env('MONGO_URI')
-connect('expensestracker', host=MONGO_URI)
+MONGO_POOL = {
+    'maxPoolSize': env.int('MONGO_MAX_POOL_SIZE', default=50),
+    'minPoolSize': env.int('MONGO_MIN_POOL_SIZE', default=0),
+    'maxIdleTimeMS': env.int('MONGO_MAX_IDLE_TIME_MS', default=300000),
+    'serverSelectionTimeoutMS': env.int('MONGO_SERVER_SELECTION_TIMEOUT_MS', default=5000),
+    'waitQueueTimeoutMS': env.int('MONGO_WAIT_QUEUE_TIMEOUT_MS', default=10000),
+}
+mongo.connect('expensestracker', MONGO_URI, **MONGO_POOL)
 
 # Dummy Django database (needed for Django's ORM checks)
 DATABASES = {
@@ -55,6 +62,8 @@ INSTALLED_APPS = [
 
 # Middleware
 MIDDLEWARE = [
+    'api.middleware.RequestMetricsMiddleware',  # first, so it times the whole stack
+    'api.middleware.AgentTraceMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -65,6 +74,11 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# /metrics (Prometheus text format) and /traces (recent agent span trees, JSON). Callers
+# must send "Authorization: Bearer <token>"; when unset both answer 404, except to
+# localhost with DEBUG on
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = env.list('CORS_ALLOWED_ORIGINS', default=[
     "http://localhost:3000",
@@ -100,6 +114,11 @@ TEMPLATES = [
 # WSGI
 WSGI_APPLICATION = 'expensetracker.wsgi.application'
 
+# ASGI: expensetracker/asgi.py turns ASYNC_VIEWS on, so the agent and transaction
+# endpoints are served by the async views in api/async_views.py
+ASGI_APPLICATION = 'expensetracker.asgi.application'
+ASYNC_VIEWS = env.bool('ASYNC_VIEWS', default=False)
+
 # Password Validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -3,16 +3,57 @@ from django.urls import path
 from api.views import (
     ExpenseListCreateView, ExpenseDetailView, IncomeListCreateView, IncomeDetailView,
     UserDetailView, UserListCreateView, ExpenseListCreateViewLlm, LangChainAgentView,
-    IncomeListCreateViewLlm, ResetAllTransactionsView
+    IncomeListCreateViewLlm, ResetAllTransactionsView, TransactionSummaryView, TransactionImportView,
+    CategorizeTitlesView
 )
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from secrets import compare_digest
+from api.utils.metrics import CONTENT_TYPE, registry
+from api.utils.tracing import recent_traces
 
 # Optional: Simple health check view for Render
 def health_check(request):
     return HttpResponse("OK")
 
+LOOPBACK_ADDRESSES = ("127.0.0.1", "::1")
+
+def metrics_access_denied(request):
+    """None when the caller may read /metrics and /traces, else the response to send."""
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if compare_digest(request.headers.get("Authorization", ""), expected):
+            return None
+        return HttpResponse(status=401)
+    # No token configured: closed, except to a local development server
+    if settings.DEBUG and request.META.get("REMOTE_ADDR") in LOOPBACK_ADDRESSES:
+        return None
+    return HttpResponse(status=404)
+
+# Prometheus scrape endpoint for this worker's metrics
+def metrics(request):
+    denied = metrics_access_denied(request)
+    if denied is not None:
+        return denied
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
+
+# This worker's recent agent traces: ?limit=20&min_ms=0&order=recent|slowest
+def traces(request):
+    denied = metrics_access_denied(request)
+    if denied is not None:
+        return denied
+    try:
+        limit = int(request.GET.get("limit", 20))
+        min_ms = float(request.GET.get("min_ms", 0))
+    except ValueError:
+        return JsonResponse({"error": "limit and min_ms must be numbers"}, status=400)
+    slowest = request.GET.get("order") == "slowest"
+    return JsonResponse({"traces": recent_traces(limit, min_ms, slowest)})
+
 urlpatterns = [
-    path('', health_check),  # Health check for Render deployment ✅
+    path('', health_check, name='health-check'),  # Health check for Render deployment ✅
+    path('metrics', metrics, name='metrics'),
+    path('traces', traces, name='traces'),
     path('admin/', admin.site.urls),
 
     # users
@@ -25,15 +66,49 @@ urlpatterns = [
 
     # expenses
     path('expenses/', ExpenseListCreateView.as_view(), name='expense-list-create'),
+    path('expenses/import/', TransactionImportView.as_view(kind='expenses'), name='expense-import'),
     path('expenses/<str:pk>/', ExpenseDetailView.as_view(), name='expense-detail'),
 
     # incomes
     path('incomes/', IncomeListCreateView.as_view(), name='income-list-create'),
+    path('incomes/import/', TransactionImportView.as_view(kind='incomes'), name='income-import'),
     path('incomes/<str:pk>/', IncomeDetailView.as_view(), name='income-detail'),
 
+    # categorization
+    path('transactions/categorize/', CategorizeTitlesView.as_view(), name='categorize-titles'),
+
+    # summary
+    path('summary/<str:pk>/', TransactionSummaryView.as_view(), name='transaction-summary'),
+
     # reset
     path('reset-transactions/', ResetAllTransactionsView.as_view(), name='reset-transactions'),
 
     # langchain
     path('ai/agent/', LangChainAgentView.as_view(), name='langchain-agent'),
 ]
+
+if settings.ASYNC_VIEWS:
+    # ASGI deployment: the same routes, served by the async views
+    from api.async_views import (
+        AsyncTransactionListView, AsyncTransactionDetailView, AsyncTransactionCreateViewLlm,
+        AsyncTransactionImportView, AsyncResetAllTransactionsView, AsyncTransactionSummaryView, AsyncLangChainAgentView
+    )
+
+    async_views = {
+        'add-expense': AsyncTransactionCreateViewLlm.as_view(kind='expenses'),
+        'add-income': AsyncTransactionCreateViewLlm.as_view(kind='incomes'),
+        'expense-list-create': AsyncTransactionListView.as_view(kind='expenses'),
+        'expense-import': AsyncTransactionImportView.as_view(kind='expenses'),
+        'expense-detail': AsyncTransactionDetailView.as_view(kind='expenses', label='Expense'),
+        'income-list-create': AsyncTransactionListView.as_view(kind='incomes'),
+        'income-import': AsyncTransactionImportView.as_view(kind='incomes'),
+        'income-detail': AsyncTransactionDetailView.as_view(kind='incomes', label='Income'),
+        'transaction-summary': AsyncTransactionSummaryView.as_view(),
+        'reset-transactions': AsyncResetAllTransactionsView.as_view(),
+        'langchain-agent': AsyncLangChainAgentView.as_view(),
+    }
+    urlpatterns = [
+        path(str(pattern.pattern), async_views[pattern.name], name=pattern.name)
+        if getattr(pattern, 'name', None) in async_views else pattern
+        for pattern in urlpatterns
+    ]
@@ -18,3 +18,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'expensetracker.settings')
 
 application = get_wsgi_application()
+
+# Load the URLconf (and the views) now rather than on the first request, then log
+# the boot cost. Firebase, Gemini and the agent's Mongo clients stay deferred until
+# first use (api/utils/lazy.py).
+from django.urls import get_resolver
+from api.utils.lazy import log_startup_report
+
+get_resolver().url_patterns
+log_startup_report("WSGI worker")
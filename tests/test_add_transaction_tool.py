@@ -6,7 +6,7 @@ from api.langchainAgent.Tools.add_transaction_tool import add_transaction
 class TestAddTransactionTool(unittest.TestCase):
 
     @patch('api.langchainAgent.Tools.add_transaction_tool.get_current_user_info')
-    @patch('api.langchainAgent.Tools.add_transaction_tool.requests.post')
+    @patch('api.langchainAgent.data_access.requests.post')
     def test_add_transaction_json_expense_success(self, mock_post, mock_user_info):
         # Mock user info
         mock_user_info.return_value = ("test_user_id", "fake_auth_token")
@@ -44,7 +44,7 @@ class TestAddTransactionTool(unittest.TestCase):
         self.assertIn("❌ Cannot add transaction", result)
 
     @patch('api.langchainAgent.Tools.add_transaction_tool.get_current_user_info')
-    @patch('api.langchainAgent.Tools.add_transaction_tool.requests.post')
+    @patch('api.langchainAgent.data_access.requests.post')
     def test_add_transaction_api_failure(self, mock_post, mock_user_info):
         
         mock_user_info.return_value = ("test_user_id", "fake_auth_token")
@@ -63,7 +63,7 @@ class TestAddTransactionTool(unittest.TestCase):
         self.assertIn("❌ Failed to add transaction", result)
 
     @patch('api.langchainAgent.Tools.add_transaction_tool.get_current_user_info')
-    @patch('api.langchainAgent.Tools.add_transaction_tool.requests.post')
+    @patch('api.langchainAgent.data_access.requests.post')
     def test_add_transaction_natural_language(self, mock_post, mock_user_info):
         mock_user_info.return_value = ("test_user_id", "fake_auth_token")
 
@@ -0,0 +1,38 @@
+import os
+import unittest
+
+os.environ.setdefault("GOOGLE_API_KEY_1", "test-key")
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017/?serverSelectionTimeoutMS=100")
+
+from unittest.mock import patch
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
+from langmem.utils import NamespaceTemplate
+from api.langchainAgent import agent
+
+class TestAgentGraph(unittest.TestCase):
+
+    def test_graph_compiled_once(self):
+        self.assertIs(agent.get_agent(), agent.get_agent())
+
+    def test_memory_namespace_from_config(self):
+        namespace = NamespaceTemplate(agent.MEMORY_NAMESPACE)
+        self.assertEqual(namespace(agent.agent_config("user-a")), ("user-a",))
+        self.assertEqual(namespace(agent.agent_config("user-b")), ("user-b",))
+
+    def test_config_separates_threads(self):
+        self.assertEqual(agent.agent_config("user-a")["configurable"]["thread_id"], "user-a")
+
+    def test_trim_history_keeps_recent_turns(self):
+        messages = []
+        for i in range(4):
+            messages += [HumanMessage(content=f"q{i}", id=f"h{i}"), AIMessage(content=f"r{i}", id=f"a{i}")]
+        with patch.object(agent, "MAX_HISTORY_MESSAGES", 5):
+            update = agent.trim_history({"messages": messages})
+        self.assertIsInstance(update["messages"][0], RemoveMessage)
+        self.assertEqual([m.content for m in update["messages"][1:]], ["q2", "r2", "q3", "r3"])
+
+    def test_trim_history_noop_when_short(self):
+        self.assertEqual(agent.trim_history({"messages": [HumanMessage(content="hi")]}), {})
+
+if __name__ == '__main__':
+    unittest.main()
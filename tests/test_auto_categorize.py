@@ -0,0 +1,29 @@
+import unittest
+from api.utils.categorize import auto_categorize, categorize_many
+from benchmarks.bench_auto_categorize import SAMPLE_TITLES, generate_titles, legacy_auto_categorize
+
+class TestAutoCategorize(unittest.TestCase):
+
+    def test_exact_match_follows_category_order(self):
+        self.assertEqual(auto_categorize("Uber to the cinema"), ("Entertainment", 100))
+        self.assertEqual(auto_categorize("MISC charges"), ("Other", 100))
+        self.assertEqual(auto_categorize("Business class bus"), ("Transportation", 100))
+
+    def test_fuzzy_match(self):
+        category, score = auto_categorize("Hospitl")
+        self.assertEqual(category, "Medical")
+        self.assertGreaterEqual(score, 85)
+        self.assertEqual(auto_categorize(""), ("Others", 0))
+
+    def test_same_results_as_original_loops(self):
+        for threshold in (85, 60, 0):
+            for title in SAMPLE_TITLES + generate_titles(500, seed=threshold):
+                self.assertEqual(auto_categorize(title, threshold), legacy_auto_categorize(title, threshold), title)
+    def test_batch_matches_single_calls(self):
+        titles = SAMPLE_TITLES + generate_titles(300, seed=1) + ["Uber to airport", ""]
+        for threshold in (85, 0):
+            self.assertEqual(categorize_many(titles, threshold), [auto_categorize(title, threshold) for title in titles])
+        self.assertEqual(categorize_many([]), [])
+
+if __name__ == '__main__':
+    unittest.main()
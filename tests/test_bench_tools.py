@@ -0,0 +1,39 @@
+import unittest
+from datetime import date, timedelta
+from benchmarks.bench_tools import History, find_regressions
+
+def results(ms, peak_kib):
+    return {"results": {"optimize_budgets": {"1000": {"ms": ms, "peak_kib": peak_kib}}}}
+
+class TestBenchTools(unittest.TestCase):
+
+    def test_rollup_summary_matches_raw_scan(self):
+        history = History(3000)
+        month_start = date.today().replace(day=1)
+        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+        from_rollups = history.fetch_summary("u", "t", month_start, month_end)
+        # A range ending mid-month scans the raw history; one more day covers the same rows
+        from_rows = history.fetch_summary("u", "t", month_start, date.today())
+        for kind in ("expenses", "incomes"):
+            self.assertEqual(from_rollups[kind]["count"], from_rows[kind]["count"])
+            self.assertAlmostEqual(from_rollups[kind]["total"], from_rows[kind]["total"], places=1)
+        whole = history.fetch_summary("u", "t")
+        self.assertEqual(whole["expenses"]["count"] + whole["incomes"]["count"], 3000)
+
+    def test_regressions_beyond_tolerance(self):
+        baseline = results(ms=2.0, peak_kib=100.0)
+        self.assertEqual(find_regressions(baseline, results(ms=2.4, peak_kib=120.0), 0.25), [])
+        self.assertEqual(
+            find_regressions(baseline, results(ms=3.0, peak_kib=400.0), 0.25),
+            [("optimize_budgets", "1000", "ms", 2.0, 3.0), ("optimize_budgets", "1000", "peak_kib", 100.0, 400.0)],
+        )
+
+    def test_small_absolute_changes_are_noise(self):
+        # +100% but only 0.1 ms / 10 KiB: within the timer and allocator floors
+        self.assertEqual(find_regressions(results(ms=0.1, peak_kib=10.0), results(ms=0.2, peak_kib=20.0), 0.25), [])
+        # Cases or sizes missing from the baseline are not compared
+        self.assertEqual(find_regressions({"results": {}}, results(ms=50.0, peak_kib=1e6), 0.25), [])
+
+if __name__ == '__main__':
+    unittest.main()
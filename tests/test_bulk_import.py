@@ -0,0 +1,74 @@
+import io
+import unittest
+from unittest.mock import patch
+from pymongo.errors import BulkWriteError
+from api import bulk_import
+from api.bulk_import import ImportFormatError, detect_format, import_transactions, iter_csv_rows, iter_ndjson_rows
+
+CSV_UPLOAD = (
+    "\ufeffTitle,Amount,Tag,Date,Paymentmethod\n"
+    "Lunch,12.50,Food,2025-03-01,Cash,extra-column\n"
+    "\"Two\nlines\",3,Travel,2025-03-03,Card\n"
+    "Taxi,7,Travel,2025-03-04,\n"
+).encode()
+
+class TestBulkImport(unittest.TestCase):
+
+    def test_csv_rows_keep_line_numbers(self):
+        rows = list(iter_csv_rows(io.BytesIO(CSV_UPLOAD)))
+        self.assertEqual([line for line, _ in rows], [2, 4, 5])
+        self.assertEqual(rows[0][1], {"Title": "Lunch", "Amount": "12.50", "Tag": "Food", "Date": "2025-03-01", "Paymentmethod": "Cash"})
+        self.assertEqual(rows[1][1]["Title"], "Two\nlines")
+
+    def test_csv_without_header(self):
+        with self.assertRaises(ImportFormatError):
+            list(iter_csv_rows(io.BytesIO(b"")))
+
+    def test_ndjson_bad_lines_become_errors(self):
+        rows = list(iter_ndjson_rows(io.BytesIO(b'{"Title": "Salary"}\n\nnot json\n[1]\n')))
+        self.assertEqual(rows[0], (1, {"Title": "Salary"}))
+        self.assertEqual([line for line, _ in rows], [1, 3, 4])
+        self.assertTrue(all(isinstance(row, str) for _, row in rows[1:]))
+
+    def test_detect_format(self):
+        self.assertEqual(detect_format("ndjson", "text/csv", "a.csv"), "ndjson")
+        self.assertEqual(detect_format(None, "application/octet-stream", "statement.CSV"), "csv")
+        self.assertEqual(detect_format(None, "application/x-ndjson; charset=utf-8"), "ndjson")
+        with self.assertRaises(ImportFormatError):
+            detect_format(None, "text/plain", "statement.txt")
+
+    @patch('api.bulk_import._insert_chunk')
+    def test_rows_are_inserted_in_chunks_for_the_caller(self, mock_insert):
+        mock_insert.side_effect = lambda kind, documents: (len(documents), [])
+
+        result = import_transactions("expenses", "test_user", io.BytesIO(CSV_UPLOAD), "csv", chunk_size=2)
+        self.assertEqual(result, {"inserted": 3, "failed": 0, "errors": [], "errors_truncated": False})
+        self.assertEqual([len(call.args[1]) for call in mock_insert.call_args_list], [2, 1])
+        line, document = mock_insert.call_args_list[0].args[1][0]
+        self.assertEqual((line, document["User"], document["Type"], document["Amount"]), (2, "test_user", "Expense", 12.5))
+
+    @patch('api.bulk_import._insert_chunk')
+    def test_row_limit(self, mock_insert):
+        mock_insert.side_effect = lambda kind, documents: (len(documents), [])
+
+        result = import_transactions("expenses", "test_user", io.BytesIO(CSV_UPLOAD), "csv", max_rows=2)
+        self.assertEqual((result["inserted"], result["failed"]), (2, 1))
+        self.assertEqual(result["errors"][0]["line"], 5)
+
+    @patch('api.bulk_import.rollups.add_many')
+    @patch('api.bulk_import.repository.get_model')
+    def test_write_errors_map_back_to_lines(self, mock_get_model, mock_add_many):
+        collection = mock_get_model.return_value._get_collection.return_value
+        collection.insert_many.side_effect = BulkWriteError({
+            "nInserted": 1,
+            "writeErrors": [{"index": 1, "errmsg": "E11000 duplicate key"}],
+        })
+
+        inserted, errors = bulk_import._insert_chunk("expenses", [(2, {"_id": "a"}), (3, {"_id": "a"})])
+        self.assertEqual(inserted, 1)
+        self.assertEqual(errors, [{"line": 3, "errors": {"error": "E11000 duplicate key"}}])
+        self.assertFalse(collection.insert_many.call_args.kwargs["ordered"])
+        mock_add_many.assert_called_once_with("expenses", [{"_id": "a"}])  # only the inserted row
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta, timezone
+import mongomock
+from langgraph.checkpoint.base import ERROR, empty_checkpoint
+from api.langchainAgent.checkpointer import MongoCheckpointSaver
+from api.langchainAgent.thread_lock import ThreadBusy, ThreadRunLock
+from benchmarks.load_test import accept_bulk_sort
+
+accept_bulk_sort(mongomock)  # pymongo 4.11+ sends bulk updates a sort= that mongomock does not take
+
+def config(thread_id="user-1", checkpoint_id=None):
+    configurable = {"thread_id": thread_id, "checkpoint_ns": ""}
+    if checkpoint_id:
+        configurable["checkpoint_id"] = checkpoint_id
+    return {"configurable": configurable}
+
+def checkpoint(checkpoint_id, **channel_values):
+    return {**empty_checkpoint(), "id": checkpoint_id, "channel_values": channel_values}
+
+class TestMongoCheckpointSaver(unittest.TestCase):
+
+    def setUp(self):
+        self.saver = MongoCheckpointSaver(mongomock.MongoClient()["test"], max_checkpoints_per_thread=3)
+
+    def put_chain(self, ids, thread_id="user-1"):
+        # Each checkpoint's parent is the one saved before it, as LangGraph does
+        parent = config(thread_id)
+        for checkpoint_id in ids:
+            parent = self.saver.put(parent, checkpoint(checkpoint_id, step=checkpoint_id), {"step": int(checkpoint_id)}, {})
+        return parent
+
+    def test_put_get_tuple_round_trip(self):
+        saved = self.put_chain(["01", "02"])
+        self.assertEqual(saved, config(checkpoint_id="02"))
+
+        latest = self.saver.get_tuple(config())
+        self.assertEqual(latest.checkpoint["id"], "02")
+        self.assertEqual(latest.checkpoint["channel_values"], {"step": "02"})
+        self.assertEqual(latest.metadata["step"], 2)
+        self.assertEqual(latest.parent_config, config(checkpoint_id="01"))
+
+        first = self.saver.get_tuple(config(checkpoint_id="01"))
+        self.assertEqual(first.checkpoint["channel_values"], {"step": "01"})
+        self.assertIsNone(first.parent_config)
+        self.assertIsNone(self.saver.get_tuple(config("someone-else")))
+
+    def test_list_before_and_limit(self):
+        self.put_chain(["01", "02", "03"])
+        self.put_chain(["01"], thread_id="user-2")
+
+        ids = [item.checkpoint["id"] for item in self.saver.list(config())]
+        self.assertEqual(ids, ["03", "02", "01"])
+        ids = [item.checkpoint["id"] for item in self.saver.list(config(), before=config(checkpoint_id="03"), limit=1)]
+        self.assertEqual(ids, ["02"])
+        ids = [item.checkpoint["id"] for item in self.saver.list(config(), filter={"step": 1})]
+        self.assertEqual(ids, ["01"])
+
+    def test_put_writes_upserts(self):
+        saved = self.put_chain(["01"])
+        self.saver.put_writes(saved, [("messages", "first"), (ERROR, "boom")], task_id="task-a")
+        # A retried task: regular writes keep their first value, special channels are overwritten
+        self.saver.put_writes(saved, [("messages", "second"), (ERROR, "boom again")], task_id="task-a")
+
+        writes = self.saver.get_tuple(config()).pending_writes
+        self.assertEqual(sorted(writes), [("task-a", ERROR, "boom again"), ("task-a", "messages", "first")])
+        self.assertEqual(self.saver.writes.count_documents({}), 2)
+
+    def test_prunes_to_max_checkpoints_per_thread(self):
+        saved = self.put_chain(["01"])
+        self.saver.put_writes(saved, [("messages", "old")], task_id="task-a")
+        self.put_chain(["02", "03", "04", "05"])
+        self.put_chain(["01"], thread_id="user-2")
+
+        ids = [item.checkpoint["id"] for item in self.saver.list(config())]
+        self.assertEqual(ids, ["05", "04", "03"])
+        self.assertEqual(self.saver.writes.count_documents({"checkpoint_id": "01", "thread_id": "user-1"}), 0)
+        self.assertIsNotNone(self.saver.get_tuple(config("user-2")))
+
+class TestThreadRunLock(unittest.TestCase):
+
+    def setUp(self):
+        self.lock = ThreadRunLock(mongomock.MongoClient()["test"]["AgentThreadLocks"], wait_seconds=0, poll_seconds=0)
+
+    def test_one_run_per_thread(self):
+        owner = self.lock.try_acquire("user-1")
+        self.assertIsNotNone(owner)
+        self.assertIsNone(self.lock.try_acquire("user-1"))
+        self.assertIsNotNone(self.lock.try_acquire("user-2"))
+        self.lock.release("user-1", owner)
+        self.assertIsNotNone(self.lock.try_acquire("user-1"))
+
+    def test_hold_raises_when_busy_and_releases(self):
+        with self.lock.hold("user-1"):
+            with self.assertRaises(ThreadBusy):
+                with self.lock.hold("user-1"):
+                    pass
+        with self.lock.hold("user-1"):
+            pass
+
+        async def run():
+            async with self.lock.ahold("user-1"):
+                with self.assertRaises(ThreadBusy):
+                    async with self.lock.ahold("user-1"):
+                        pass
+        asyncio.run(run())
+        self.assertEqual(self.lock.collection.count_documents({}), 0)
+
+    def test_expired_lease_is_taken_over(self):
+        self.lock.try_acquire("user-1")
+        past = datetime.now(timezone.utc) - timedelta(seconds=1)
+        self.lock.collection.update_one({"_id": "user-1"}, {"$set": {"expires_at": past}})
+        self.assertIsNotNone(self.lock.try_acquire("user-1"))
+
+if __name__ == '__main__':
+    unittest.main()
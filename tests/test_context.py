@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.prebuilt import create_react_agent
+from api.langchainAgent.context import (
+    bind_context, get_current_user_info, iterate_in_context, set_user_info, user_context,
+)
+from api.langchainAgent.streaming import stream_agent_events
+from test_streaming import ScriptedChatModel, current_user, parse
+
+REQUESTS = 64
+
+def agent_for_one_request():
+    model = ScriptedChatModel(script=[
+        AIMessage(content="", tool_calls=[{"name": "current_user", "args": {"query": "me"}, "id": "call-1"}]),
+        AIMessage(content="done"),
+    ])
+    return create_react_agent(model=model, tools=[current_user], checkpointer=MemorySaver())
+
+class TestRequestContext(unittest.TestCase):
+
+    def test_user_context_resets_for_the_next_request_on_the_thread(self):
+        with user_context("user_a", "token_a"):
+            with user_context("user_b", "token_b"):
+                self.assertEqual(get_current_user_info(), ("user_b", "token_b"))
+            self.assertEqual(get_current_user_info(), ("user_a", "token_a"))
+        self.assertEqual(get_current_user_info(), (None, None))
+
+    def test_parallel_threaded_requests_are_isolated(self):
+        def request(n):
+            with user_context(f"user_{n}", f"token_{n}"):
+                time.sleep(0.001)  # let the other requests run in between
+                return get_current_user_info()
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(request, range(REQUESTS)))
+        self.assertEqual(results, [(f"user_{n}", f"token_{n}") for n in range(REQUESTS)])
+
+    def test_parallel_agent_runs_see_their_own_user_in_tools(self):
+        def request(n):
+            agent = agent_for_one_request()
+            config = {"configurable": {"thread_id": f"user_{n}"}}
+            with user_context(f"user_{n}", "token"):
+                agent.invoke({"messages": [{"role": "user", "content": "who?"}]}, config=config)
+            return agent.get_state(config).values["messages"][2].content  # the tool's output
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(request, range(REQUESTS // 2)))
+        self.assertEqual(results, [f"user_{n}" for n in range(REQUESTS // 2)])
+
+    def test_bind_context_carries_the_user_into_threads(self):
+        seen = {}
+        with user_context("test_user", "token"):
+            plain = threading.Thread(target=lambda: seen.update(plain=get_current_user_info()))
+            bound = threading.Thread(target=bind_context(lambda: seen.update(bound=get_current_user_info())))
+        for thread in (plain, bound):
+            thread.start()
+            thread.join()
+        self.assertEqual(seen, {"plain": (None, None), "bound": ("test_user", "token")})
+
+    def test_concurrent_asyncio_requests_are_isolated(self):
+        async def request(n):
+            set_user_info(f"user_{n}", f"token_{n}")  # each task has its own copy
+            await asyncio.sleep(0)
+            loop = asyncio.get_running_loop()
+            in_thread = await asyncio.to_thread(get_current_user_info)
+            in_executor = await loop.run_in_executor(None, bind_context(get_current_user_info))
+            return get_current_user_info(), in_thread, in_executor
+
+        async def main():
+            return await asyncio.gather(*(request(n) for n in range(REQUESTS)))
+
+        for n, seen in enumerate(asyncio.run(main())):
+            self.assertEqual(set(seen), {(f"user_{n}", f"token_{n}")})
+
+    def test_streamed_reply_keeps_the_user_after_the_view_returns(self):
+        agent = agent_for_one_request()
+        with user_context("test_user", "token"):
+            frames = iterate_in_context(stream_agent_events(agent, "who?", {"configurable": {"thread_id": "test_user"}}))
+        self.assertEqual(get_current_user_info(), (None, None))
+
+        # A WSGI server iterates the response after the view has returned, maybe on another thread
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            events = pool.submit(lambda: parse(list(frames))).result()
+        self.assertEqual(events[-1], ("done", {"response": "done"}))
+        state = agent.get_state({"configurable": {"thread_id": "test_user"}})
+        self.assertEqual(state.values["messages"][2].content, "test_user")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from datetime import date
+from unittest.mock import patch, MagicMock
+from api.langchainAgent import data_access
+from api.langchainAgent.data_access import DataAccessError, fetch_transactions, fetch_summary, create_transaction
+
+class TestDataAccess(unittest.TestCase):
+
+    @patch('api.langchainAgent.data_access.requests.get')
+    @patch('api.langchainAgent.data_access.repository')
+    def test_direct_access_skips_http(self, mock_repo, mock_get):
+        mock_repo.is_available.return_value = True
+        mock_repo.list_user_transactions.return_value = [{"Amount": "10.00"}]
+
+        result = fetch_transactions("expenses", "test_user", "fake_token")
+        self.assertEqual(result, [{"Amount": "10.00"}])
+        mock_repo.list_user_transactions.assert_called_once_with("expenses", "test_user", fields=None)
+        mock_get.assert_not_called()
+
+    @patch('api.langchainAgent.data_access.requests.get')
+    @patch('api.langchainAgent.data_access.repository')
+    def test_falls_back_to_http_when_direct_fails(self, mock_repo, mock_get):
+        mock_repo.is_available.return_value = True
+        mock_repo.list_user_transactions.side_effect = Exception("connection reset")
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = [{"Amount": "5.00"}]
+
+        result = fetch_transactions("incomes", "test_user", "fake_token")
+        self.assertEqual(result, [{"Amount": "5.00"}])
+        self.assertIn("/incomes/test_user/?all=true", mock_get.call_args[0][0])
+
+    @patch('api.langchainAgent.data_access.requests.get')
+    def test_http_error_carries_status_code(self, mock_get):
+        mock_get.return_value.status_code = 401
+        with self.assertRaises(DataAccessError) as ctx:
+            fetch_transactions("expenses", "test_user", "fake_token")
+        self.assertEqual(ctx.exception.status_code, 401)
+
+    @patch('api.langchainAgent.data_access.requests.post')
+    @patch('api.langchainAgent.data_access.repository')
+    def test_http_mode_forces_loopback(self, mock_repo, mock_post):
+        mock_repo.is_available.return_value = True
+        mock_post.return_value = MagicMock()
+        with patch.object(data_access, "DATA_ACCESS_MODE", "http"):
+            create_transaction("incomes", {"Id": "1"}, "fake_token")
+        mock_repo.create_llm_transaction.assert_not_called()
+        self.assertIn("income/add/", mock_post.call_args[0][0])
+
+    @patch('api.langchainAgent.data_access.requests.post')
+    @patch('api.langchainAgent.data_access.repository')
+    def test_direct_write_failure_is_not_retried_over_http(self, mock_repo, mock_post):
+        mock_repo.is_available.return_value = True
+        mock_repo.TransactionValidationError = type("TransactionValidationError", (Exception,), {})
+        # Saved, then a later step failed: posting again would insert a duplicate
+        mock_repo.create_llm_transaction.side_effect = Exception("User matching query does not exist")
+        with self.assertRaises(DataAccessError):
+            create_transaction("expenses", {"Id": "1"}, "fake_token")
+        mock_post.assert_not_called()
+
+    @patch('api.langchainAgent.data_access.requests.get')
+    def test_summary_passes_date_range(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = {"expenses": {}, "incomes": {}}
+
+        fetch_summary("test_user", "fake_token", date(2025, 3, 1), date(2025, 3, 31))
+        self.assertIn("/summary/test_user/?start=2025-03-01&end=2025-03-31", mock_get.call_args[0][0])
+
+if __name__ == '__main__':
+    unittest.main()
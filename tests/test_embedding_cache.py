@@ -0,0 +1,87 @@
+import unittest
+from unittest.mock import MagicMock
+from pymongo.errors import BulkWriteError
+from api.langchainAgent.embedding_cache import CachedEmbeddings, embedding_key
+
+def fake_model():
+    model = MagicMock()
+    model.model = "models/embedding-001"
+    model.embed_documents.side_effect = lambda texts: [[float(len(text)), 1.0] for text in texts]
+    model.embed_query.side_effect = lambda text: [float(len(text)), 0.0]
+    return model
+
+class TestEmbeddingCache(unittest.TestCase):
+
+    def test_misses_are_batched_and_deduplicated(self):
+        model = fake_model()
+        cache = CachedEmbeddings(model)
+
+        vectors = cache.embed_documents(["rent", "salary", "rent"])
+        self.assertEqual(vectors, [[4.0, 1.0], [6.0, 1.0], [4.0, 1.0]])
+        model.embed_documents.assert_called_once_with(["rent", "salary"])
+
+        self.assertEqual(cache.embed_documents(["salary", "groceries"])[1], [9.0, 1.0])
+        self.assertEqual(model.embed_documents.call_args.args[0], ["groceries"])
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_query_and_document_vectors_are_cached_apart(self):
+        model = fake_model()
+        cache = CachedEmbeddings(model)
+        cache.embed_documents(["rent"])
+
+        self.assertEqual(cache.embed_query("rent"), [4.0, 0.0])
+        self.assertEqual(cache.embed_query("rent"), [4.0, 0.0])
+        model.embed_query.assert_called_once_with("rent")
+        self.assertNotEqual(embedding_key("m", "query", "rent"), embedding_key("m", "document", "rent"))
+        self.assertNotEqual(embedding_key("m", "query", "rent"), embedding_key("other", "query", "rent"))
+
+    def test_least_recently_used_vector_is_evicted(self):
+        model = fake_model()
+        cache = CachedEmbeddings(model, maxsize=2)
+        cache.embed_query("a")
+        cache.embed_query("bb")
+        cache.embed_query("a")
+        cache.embed_query("ccc")
+
+        cache.embed_query("bb")
+        self.assertEqual(model.embed_query.call_count, 4)
+        self.assertEqual(cache.stats()["size"], 2)
+
+    def test_backing_store_is_shared_across_workers(self):
+        model = fake_model()
+        collection = MagicMock()
+        writer = CachedEmbeddings(model, collection)
+        writer.embed_documents(["rent"])
+        document = collection.insert_many.call_args.args[0][0]
+        self.assertEqual(document["_id"], embedding_key("models/embedding-001", "document", "rent"))
+
+        collection.find.return_value = [document]
+        collection.insert_many.side_effect = BulkWriteError({"writeErrors": [{"index": 0, "code": 11000}]})
+        reader = CachedEmbeddings(model, collection)
+        self.assertEqual(reader.embed_documents(["rent", "salary"]), [[4.0, 1.0], [6.0, 1.0]])
+        self.assertEqual(model.embed_documents.call_args.args[0], ["salary"])
+        self.assertEqual(reader.stats()["stored_hits"], 1)
+
+    def test_stored_vectors_expire(self):
+        collection = MagicMock()
+        collection.find.return_value = []
+        cache = CachedEmbeddings(fake_model(), collection, ttl_seconds=3600)
+        cache.embed_query("rent")
+        cache.embed_documents(["salary"])
+        collection.create_index.assert_called_once_with("CreatedAt", expireAfterSeconds=3600)
+
+        collection = MagicMock()
+        collection.find.return_value = []
+        CachedEmbeddings(fake_model(), collection, ttl_seconds=None).embed_query("rent")
+        collection.create_index.assert_not_called()
+
+    def test_store_outage_falls_back_to_the_model(self):
+        model = fake_model()
+        collection = MagicMock()
+        collection.find.side_effect = Exception("connection refused")
+        collection.insert_many.side_effect = Exception("connection refused")
+
+        self.assertEqual(CachedEmbeddings(model, collection).embed_query("rent"), [4.0, 0.0])
+
+if __name__ == '__main__':
+    unittest.main()
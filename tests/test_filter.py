@@ -0,0 +1,42 @@
+import unittest
+from api.utils.filter import SmallTalkStats, is_non_actionable, small_talk_intent, small_talk_reply, SMALL_TALK_REPLIES
+
+class TestSmallTalk(unittest.TestCase):
+
+    def test_recognized_intents(self):
+        cases = {
+            "hi": "greeting",
+            "Heyyy there!": "greeting",
+            "Good morning :)": "greeting",
+            "how's it going?": "how_are_you",
+            "Thank you so much 🙏": "thanks",
+            "thanks, bye": "thanks",
+            "ok cool": "acknowledgement",
+            "👍": "acknowledgement",
+            "bye!": "goodbye",
+        }
+        for message, intent in cases.items():
+            self.assertEqual(small_talk_intent(message), intent, message)
+
+    def test_messages_with_content_go_to_the_model(self):
+        for message in ["hi, show my expenses for March", "ok add 200 for lunch", "thanks, now set a budget", "yes", "no", "typo", ""]:
+            self.assertIsNone(small_talk_intent(message), message)
+
+    def test_reply_counts_hit_rate(self):
+        self.assertEqual(small_talk_reply("thanks!"), SMALL_TALK_REPLIES["thanks"])
+
+        stats = SmallTalkStats()
+        stats.record("greeting")
+        stats.record(None)
+        stats.record("thanks")
+        stats.record(None)
+        snapshot = stats.snapshot()
+        self.assertEqual((snapshot["messages"], snapshot["hits"], snapshot["hit_rate"]), (4, 2, 0.5))
+        self.assertEqual(snapshot["by_intent"]["greeting"], 1)
+
+    def test_is_non_actionable_unchanged(self):
+        self.assertTrue(is_non_actionable(" Got it "))
+        self.assertFalse(is_non_actionable("got it, add 50 for fuel"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,30 +5,31 @@ from api.langchainAgent.Tools.financial_insight_tool import financial_insight
 class TestFinancialInsightTool(unittest.TestCase):
 
     @patch('api.langchainAgent.Tools.financial_insight_tool.get_current_user_info')
-    @patch('api.langchainAgent.Tools.financial_insight_tool.requests.get')
+    @patch('api.langchainAgent.data_access.requests.get')
     def test_yearly_insight_success(self, mock_get, mock_user_info):
         mock_user_info.return_value = ("test_user_id", "fake_token")
 
-        # Mock incomes API
-        mock_income_response = MagicMock()
-        mock_income_response.status_code = 200
-        mock_income_response.json.return_value = [
-            {"Amount": 50000, "Date": "2025-01-10"},
-            {"Amount": 60000, "Date": "2025-05-15"}
-        ]
+        summary = {
+            "expenses": {
+                "total": 50000, "count": 2,
+                "monthly": {"2025-03": 30000, "2025-07": 20000},
+                "tags": {"Food": 30000, "Travel": 20000}
+            },
+            "incomes": {
+                "total": 110000, "count": 2,
+                "monthly": {"2025-01": 50000, "2025-05": 60000},
+                "tags": {"Salary": 110000}
+            }
+        }
 
-        # Mock expenses API
-        mock_expense_response = MagicMock()
-        mock_expense_response.status_code = 200
-        mock_expense_response.json.return_value = [
-            {"Amount": 30000, "Date": "2025-03-05", "Tag": "Food"},
-            {"Amount": 20000, "Date": "2025-07-20", "Tag": "Travel"}
-        ]
-
-        # Mock API get calls
-        mock_get.side_effect = [mock_expense_response, mock_income_response]
+        # Mock summary API: all-time first, then the 2025 range
+        mock_summary_response = MagicMock()
+        mock_summary_response.status_code = 200
+        mock_summary_response.json.return_value = summary
+        mock_get.return_value = mock_summary_response
 
         result = financial_insight("Show my 2025 yearly summary")
+        self.assertIn("start=2025-01-01&end=2025-12-31", mock_get.call_args_list[1][0][0])
         self.assertIn("📅 **Financial Summary for 2025:**", result)
         self.assertIn("Total Income", result)
         self.assertIn("Total Expenses", result)
@@ -40,7 +41,7 @@ class TestFinancialInsightTool(unittest.TestCase):
         self.assertIn("❌ Cannot fetch insights", result)
 
     @patch('api.langchainAgent.Tools.financial_insight_tool.get_current_user_info')
-    @patch('api.langchainAgent.Tools.financial_insight_tool.requests.get')
+    @patch('api.langchainAgent.data_access.requests.get')
     def test_api_unauthorized(self, mock_get, mock_user_info):
         mock_user_info.return_value = ("test_user_id", "fake_token")
         mock_unauth = MagicMock()
@@ -50,29 +51,28 @@ class TestFinancialInsightTool(unittest.TestCase):
         self.assertIn("❌ Unable to fetch expenses", result)
 
     @patch('api.langchainAgent.Tools.financial_insight_tool.get_current_user_info')
-    @patch('api.langchainAgent.Tools.financial_insight_tool.requests.get')
+    @patch('api.langchainAgent.data_access.requests.get')
     def test_invalid_month_input(self, mock_get, mock_user_info):
         mock_user_info.return_value = ("test_user_id", "fake_token")
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = []
+        mock_get.return_value.json.return_value = {
+            "expenses": {"total": 0, "count": 0, "monthly": {}, "tags": {}},
+            "incomes": {"total": 0, "count": 0, "monthly": {}, "tags": {}}
+        }
         result = financial_insight("Show me insights for FooberMonth 2025")
         self.assertIn("❌ Invalid month", result)
 
     @patch('api.langchainAgent.Tools.financial_insight_tool.get_current_user_info')
-    @patch('api.langchainAgent.Tools.financial_insight_tool.requests.get')
+    @patch('api.langchainAgent.data_access.requests.get')
     def test_zero_income_division(self, mock_get, mock_user_info):
         mock_user_info.return_value = ("test_user_id", "fake_token")
-        mock_income_response = MagicMock()
-        mock_income_response.status_code = 200
-        mock_income_response.json.return_value = []  # No incomes
-
-        mock_expense_response = MagicMock()
-        mock_expense_response.status_code = 200
-        mock_expense_response.json.return_value = [
-            {"Amount": 5000, "Date": "2025-04-10", "Tag": "Bills"}
-        ]
-
-        mock_get.side_effect = [mock_expense_response, mock_income_response]
+        mock_summary_response = MagicMock()
+        mock_summary_response.status_code = 200
+        mock_summary_response.json.return_value = {
+            "expenses": {"total": 5000, "count": 1, "monthly": {"2025-04": 5000}, "tags": {"Bills": 5000}},
+            "incomes": {"total": 0, "count": 0, "monthly": {}, "tags": {}}  # No incomes
+        }
+        mock_get.return_value = mock_summary_response
         result = financial_insight("Give me 2025 yearly summary")
         self.assertIn("Savings Rate: 0.0%", result)
 
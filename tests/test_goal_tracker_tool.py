@@ -5,29 +5,19 @@ from api.langchainAgent.Tools.goal_tracker_tool import goal_tracker
 class TestGoalTrackerTool(unittest.TestCase):
 
     @patch('api.langchainAgent.Tools.goal_tracker_tool.get_current_user_info')
-    @patch('api.langchainAgent.Tools.goal_tracker_tool.requests.get')
+    @patch('api.langchainAgent.data_access.requests.get')
     def test_goal_tracker_success(self, mock_get, mock_user_info):
         # Mock user info
         mock_user_info.return_value = ("test_user_id", "fake_auth_token")
 
-        # Mock Expenses API response
-        mock_expenses_response = MagicMock()
-        mock_expenses_response.status_code = 200
-        mock_expenses_response.json.return_value = [
-            {"Amount": "1000"},
-            {"Amount": "2000"}
-        ]
-
-        # Mock Incomes API response
-        mock_incomes_response = MagicMock()
-        mock_incomes_response.status_code = 200
-        mock_incomes_response.json.return_value = [
-            {"Amount": "5000"},
-            {"Amount": "3000"}
-        ]
-
-        # Arrange API call order: expenses first, then incomes
-        mock_get.side_effect = [mock_expenses_response, mock_incomes_response]
+        # Mock Summary API response
+        mock_summary_response = MagicMock()
+        mock_summary_response.status_code = 200
+        mock_summary_response.json.return_value = {
+            "expenses": {"total": 3000, "count": 2, "monthly": {}, "tags": {}},
+            "incomes": {"total": 8000, "count": 2, "monthly": {}, "tags": {}}
+        }
+        mock_get.return_value = mock_summary_response
 
         # Test input string (simulating user message)
         input_query = "I want to save ₹12000 in 6 months"
@@ -49,7 +39,7 @@ class TestGoalTrackerTool(unittest.TestCase):
         self.assertIn("❌ Missing user session info", result)
 
     @patch('api.langchainAgent.Tools.goal_tracker_tool.get_current_user_info')
-    @patch('api.langchainAgent.Tools.goal_tracker_tool.requests.get')
+    @patch('api.langchainAgent.data_access.requests.get')
     def test_goal_tracker_api_failure(self, mock_get, mock_user_info):
         mock_user_info.return_value = ("test_user_id", "fake_auth_token")
 
@@ -58,7 +48,7 @@ class TestGoalTrackerTool(unittest.TestCase):
         failed_response.status_code = 500
         failed_response.text = "Server error"
 
-        # Simulate API failure on expenses call
+        # Simulate API failure on the summary call
         mock_get.side_effect = [failed_response]
 
         result = goal_tracker("I want to save ₹12000 in 6 months")
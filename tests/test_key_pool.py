@@ -0,0 +1,135 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+from google.api_core.exceptions import InvalidArgument, ResourceExhausted
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+from langchain_google_genai import ChatGoogleGenerativeAI, chat_models
+from api.langchainAgent.key_pool import GeminiKeyPool, KeysExhausted, pooled_chat_model, single_attempt_gemini_calls
+from test_streaming import ScriptedChatModel
+
+class ThrottledChatModel(ScriptedChatModel):
+    # Fails every call with the given error, the way an exhausted Gemini key does
+    error: Exception = ResourceExhausted("429 Resource has been exhausted (e.g. check quota).")
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise self.error
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        raise self.error
+        yield
+
+class ToolAwareChatModel(ScriptedChatModel):
+    # Formats tools into call kwargs like ChatGoogleGenerativeAI.bind_tools, and echoes them back
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[tool.name for tool in tools], **kwargs)
+
+    def _generate(self, messages, stop=None, run_manager=None, tools=(), **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="tools: " + ", ".join(tools)))])
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def pool_with(clients, **kwargs):
+    pool = GeminiKeyPool(list(clients), clock=kwargs.pop("clock", FakeClock()), **kwargs)
+    return pool, pooled_chat_model(pool, lambda key: clients[key])
+
+def answers(*texts):
+    return ScriptedChatModel(script=[AIMessage(content=text) for text in texts])
+
+@tool
+def lookup_balance(query: str) -> str:
+    """Look up the balance."""
+    return "₹42"
+
+class TestGeminiKeyPool(unittest.TestCase):
+
+    def test_calls_are_spread_round_robin(self):
+        pool, llm = pool_with({"key-aaaa": answers("a1", "a2"), "key-bbbb": answers("b1", "b2")})
+        self.assertEqual([llm.invoke("hi").content for _ in range(4)], ["a1", "b1", "a2", "b2"])
+        self.assertEqual({label: stats["calls"] for label, stats in pool.stats().items()}, {"#1 ...aaaa": 2, "#2 ...bbbb": 2})
+
+    def test_throttled_key_is_skipped_until_its_cooldown_ends(self):
+        clock = FakeClock()
+        throttled = ThrottledChatModel(script=[])
+        pool, llm = pool_with({"key-aaaa": throttled, "key-bbbb": answers("b1", "b2", "b3", "b4")}, clock=clock, cooldown=30)
+
+        self.assertEqual(llm.invoke("hi").content, "b1")  # retried on the next key
+        self.assertEqual(llm.invoke("hi").content, "b2")  # the throttled key is not tried again
+        self.assertEqual(pool.stats()["#1 ...aaaa"], {"calls": 1, "throttles": 1, "open": True, "retry_in": 30.0})
+
+        clock.now = 31  # half-open: the key is tried again and, still throttled, cools down twice as long
+        self.assertEqual([llm.invoke("hi").content for _ in range(2)], ["b3", "b4"])
+        self.assertEqual(pool.stats()["#1 ...aaaa"]["retry_in"], 60.0)
+
+    def test_all_keys_throttled_is_a_quota_error(self):
+        pool, llm = pool_with({"key-aaaa": ThrottledChatModel(script=[]), "key-bbbb": ThrottledChatModel(script=[])})
+        with self.assertRaises(KeysExhausted) as raised:
+            llm.invoke("hi")
+        self.assertIn("resource exhausted", str(raised.exception).lower())
+        self.assertEqual(raised.exception.retry_after, 30.0)
+
+    def test_other_errors_are_not_retried(self):
+        broken = ThrottledChatModel(script=[], error=InvalidArgument("bad request"))
+        pool, llm = pool_with({"key-aaaa": broken, "key-bbbb": answers("b1")})
+        with self.assertRaises(InvalidArgument):
+            llm.invoke("hi")
+        self.assertEqual(pool.stats()["#1 ...aaaa"]["throttles"], 0)
+
+    def test_least_throttled_prefers_keys_that_were_not_throttled_recently(self):
+        clock = FakeClock()
+        pool = GeminiKeyPool(["key-aaaa", "key-bbbb", "key-cccc"], strategy="least_throttled", clock=clock, cooldown=10)
+        pool.record_throttle(pool.states[0])
+        clock.now = 5
+        pool.record_throttle(pool.states[1])
+        clock.now = 100  # every circuit has closed again
+        self.assertEqual(pool.acquire().key, "key-cccc")
+        self.assertEqual(pool.acquire(exclude={"key-cccc"}).key, "key-aaaa")  # throttled longest ago
+
+    def test_streams_retry_before_the_first_chunk(self):
+        pool, llm = pool_with({"key-aaaa": ThrottledChatModel(script=[]), "key-bbbb": answers("streamed reply", "async reply")})
+        self.assertEqual("".join(chunk.content for chunk in llm.stream("hi")), "streamed reply")
+
+        pool.states[0].open_until = float("-inf")
+
+        async def astream():
+            return "".join([chunk.content async for chunk in llm.astream("hi")])
+        self.assertEqual(asyncio.run(astream()), "async reply")
+        self.assertEqual(pool.stats()["#1 ...aaaa"]["throttles"], 2)
+
+    def test_tools_bound_once_reach_every_key(self):
+        clients = {"key-aaaa": ToolAwareChatModel(script=[]), "key-bbbb": ToolAwareChatModel(script=[])}
+        pool, llm = pool_with(clients)
+        bound = llm.bind_tools([lookup_balance])
+        self.assertEqual([bound.invoke("hi").content for _ in range(2)], ["tools: lookup_balance"] * 2)
+
+    @patch.object(chat_models, "_create_retry_decorator", chat_models._create_retry_decorator)
+    def test_gemini_clients_leave_retries_to_the_pool(self):
+        single_attempt_gemini_calls()
+        calls = []
+
+        def generate_content(client, *args, **kwargs):
+            calls.append(client)
+            if len(calls) == 1:
+                raise ResourceExhausted("429 Resource has been exhausted (e.g. check quota).")
+            raise InvalidArgument("stop here")  # not a throttle: the pool gives up
+
+        clients = {key: ChatGoogleGenerativeAI(model="gemini-2.0-flash", google_api_key=key, max_retries=0)
+                   for key in ("key-aaaa", "key-bbbb")}
+        pool, llm = pool_with(clients)
+        with patch.object(type(clients["key-aaaa"].client), "generate_content", generate_content):
+            with self.assertRaises(Exception):
+                llm.invoke("hi")
+        # One attempt on the throttled key, then straight on to the next one
+        self.assertEqual(len(calls), 2)
+        self.assertIsNot(calls[0], calls[1])
+        self.assertEqual(pool.stats()["#1 ...aaaa"]["throttles"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+import threading
+import unittest
+from unittest.mock import MagicMock
+from api.utils.lazy import Lazy, startup_report
+
+class TestLazy(unittest.TestCase):
+
+    def test_built_once_across_threads(self):
+        factory = MagicMock(side_effect=lambda: object())
+        client = Lazy("test-client", factory)
+        self.assertFalse(client.ready)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(client())) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(factory.call_count, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertIn("test-client", startup_report()["initialized"])
+
+    def test_failed_construction_is_retried(self):
+        factory = MagicMock(side_effect=[ConnectionError("down"), "client"])
+        client = Lazy("test-flaky", factory)
+        with self.assertRaises(ConnectionError):
+            client()
+        self.assertIn("test-flaky", startup_report()["deferred"])
+        self.assertEqual(client(), "client")
+
+    def test_importing_the_agent_module_builds_nothing(self):
+        env = dict(os.environ, GOOGLE_API_KEY_1="test-key", MONGO_URI="mongodb://localhost:27017/?serverSelectionTimeoutMS=100")
+        code = (
+            "import sys; from api.langchainAgent import agent; from api.utils.lazy import startup_report; "
+            "print(startup_report()['initialized'], 'langchain_google_genai' in sys.modules, 'langmem' in sys.modules)"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True, text=True, check=True,
+        ).stdout
+        self.assertEqual(output.strip().splitlines()[-1], "{} False False")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.prebuilt import create_react_agent
+from api.middleware import RequestMetricsMiddleware, REQUEST_LATENCY
+from api.utils.metrics import Registry
+from api.langchainAgent.instrumentation import LLM_LATENCY, LLM_TOKENS, TOOL_DURATION, MetricsCallbackHandler
+from test_streaming import ScriptedChatModel
+
+@tool
+def slow_tool(query: str) -> str:
+    """A tool that fails on request."""
+    if query == "fail":
+        raise ValueError("boom")
+    return "ok"
+
+class TestRegistry(unittest.TestCase):
+
+    def test_renders_prometheus_text(self):
+        registry = Registry()
+        requests = registry.counter("requests_total", "Requests.", ("path",))
+        latency = registry.histogram("latency_seconds", "Latency.", ("view",), buckets=(0.1, 1.0))
+        registry.gauge("in_use", "In use.", lambda: 3)
+        requests.inc('/a"b')
+        requests.inc('/a"b', amount=2)
+        for seconds in (0.05, 0.5, 5.0):
+            latency.observe(seconds, "agent")
+
+        self.assertEqual(registry.render(), "\n".join([
+            "# HELP requests_total Requests.",
+            "# TYPE requests_total counter",
+            'requests_total{path="/a\\"b"} 3',
+            "# HELP latency_seconds Latency.",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{view="agent",le="0.1"} 1',
+            'latency_seconds_bucket{view="agent",le="1.0"} 2',
+            'latency_seconds_bucket{view="agent",le="+Inf"} 3',
+            'latency_seconds_sum{view="agent"} 5.55',
+            'latency_seconds_count{view="agent"} 3',
+            "# HELP in_use In use.",
+            "# TYPE in_use gauge",
+            "in_use 3",
+        ]) + "\n")
+
+    def test_registering_a_name_twice_returns_the_same_metric(self):
+        registry = Registry()
+        self.assertIs(registry.counter("hits_total", "Hits."), registry.counter("hits_total", "Hits."))
+
+class TestAgentInstrumentation(unittest.TestCase):
+
+    def test_llm_calls_tokens_and_tool_runs_are_recorded_once(self):
+        handler = MetricsCallbackHandler()
+        model = ScriptedChatModel(script=[
+            AIMessage(content="", tool_calls=[{"name": "slow_tool", "args": {"query": "fail"}, "id": "call-1"}]),
+            AIMessage(content="done", usage_metadata={"input_tokens": 12, "output_tokens": 4, "total_tokens": 16}),
+        ], callbacks=[handler])
+        slow_tool.callbacks = [handler]
+        self.addCleanup(setattr, slow_tool, "callbacks", None)
+        agent = create_react_agent(model=model, tools=[slow_tool], checkpointer=MemorySaver())
+
+        before = (LLM_LATENCY.count("ok"), LLM_TOKENS.value("input"), LLM_TOKENS.value("output"), TOOL_DURATION.count("slow_tool", "error"))
+        agent.invoke({"messages": [{"role": "user", "content": "go"}]}, config={"configurable": {"thread_id": "t"}})
+        after = (LLM_LATENCY.count("ok"), LLM_TOKENS.value("input"), LLM_TOKENS.value("output"), TOOL_DURATION.count("slow_tool", "error"))
+        self.assertEqual([b - a for a, b in zip(before, after)], [2, 12, 4, 1])
+
+class TestRequestMetricsMiddleware(unittest.TestCase):
+
+    def request(self, url_name):
+        match = SimpleNamespace(url_name=url_name, route="x/") if url_name else None
+        return SimpleNamespace(method="GET", resolver_match=match)
+
+    def test_sync_and_async_requests_are_timed_by_url_name(self):
+        before = REQUEST_LATENCY.count("test-view", "GET", "200"), REQUEST_LATENCY.count("unmatched", "GET", "404")
+        RequestMetricsMiddleware(lambda request: SimpleNamespace(status_code=200))(self.request("test-view"))
+
+        async def get_response(request):
+            return SimpleNamespace(status_code=404)
+        asyncio.run(RequestMetricsMiddleware(get_response)(self.request(None)))
+        after = REQUEST_LATENCY.count("test-view", "GET", "200"), REQUEST_LATENCY.count("unmatched", "GET", "404")
+        self.assertEqual([b - a for a, b in zip(before, after)], [1, 1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,18 @@
+import unittest
+from api.management.commands.mongo_indexes import _index_problem, _plan_stages
+
+def stage(name, child=None):
+    return {"stage": name, "inputStage": child} if child else {"stage": name}
+
+class TestMongoIndexes(unittest.TestCase):
+
+    def test_plan_problems(self):
+        keyset = stage("LIMIT", stage("FETCH", stage("IXSCAN")))
+        self.assertEqual(_plan_stages(keyset), ["LIMIT", "FETCH", "IXSCAN"])
+        self.assertIsNone(_index_problem(_plan_stages(keyset)))
+        # The filter uses an index but the sort does not: still unsupported
+        self.assertEqual(_index_problem(_plan_stages(stage("SORT", stage("FETCH", stage("IXSCAN"))))), "in-memory SORT")
+        self.assertEqual(_index_problem(_plan_stages(stage("SORT", stage("COLLSCAN")))), "COLLSCAN")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from mongoengine.connection import ConnectionFailure
+from api.utils import mongo
+from api.utils.mongo import PoolMetrics
+
+ADDRESS = ("localhost", 27017)
+
+def checked_out(duration):
+    return SimpleNamespace(address=ADDRESS, connection_id=1, duration=duration)
+
+class TestPoolMetrics(unittest.TestCase):
+
+    def test_counts_connections_in_use_and_checkout_waits(self):
+        metrics = PoolMetrics()
+        for _ in range(3):
+            metrics.connection_created(SimpleNamespace(address=ADDRESS, connection_id=1))
+        for duration in (0.001, 0.002, 0.010):
+            metrics.connection_check_out_started(SimpleNamespace(address=ADDRESS))
+            metrics.connection_checked_out(checked_out(duration))
+        metrics.connection_checked_in(SimpleNamespace(address=ADDRESS, connection_id=1))
+        metrics.connection_check_out_started(SimpleNamespace(address=ADDRESS))
+        metrics.connection_check_out_failed(SimpleNamespace(address=ADDRESS, reason="timeout", duration=10.0))
+        metrics.connection_check_out_started(SimpleNamespace(address=ADDRESS))
+
+        self.assertEqual(metrics.snapshot(), {
+            "open": 3,
+            "in_use": 2,
+            "max_in_use": 3,
+            "waiting": 1,
+            "checkouts": 3,
+            "checkout_failures": {"timeout": 1},
+            "wait_ms": {"p50": 2.0, "p95": 10.0, "max": 10.0},
+        })
+
+    def test_slow_checkout_is_logged(self):
+        metrics = PoolMetrics()
+        metrics.connection_check_out_started(SimpleNamespace(address=ADDRESS))
+        with self.assertLogs("api.utils.mongo", level="WARNING") as logs:
+            metrics.connection_checked_out(checked_out(0.75))
+        self.assertIn("Waited 750 ms", logs.output[0])
+
+class TestSharedClient(unittest.TestCase):
+
+    def setUp(self):
+        mongo.get_client.reset()
+        self.addCleanup(mongo.get_client.reset)
+
+    @patch("mongoengine.connection.get_connection")
+    def test_mongoengine_connection_is_the_shared_client(self, mock_get_connection):
+        self.assertIs(mongo.get_client(), mock_get_connection.return_value)
+        self.assertIs(mongo.get_client(), mock_get_connection.return_value)
+        mock_get_connection.assert_called_once()
+
+    @patch("pymongo.MongoClient")
+    @patch("mongoengine.connection.get_connection", side_effect=ConnectionFailure("not connected"))
+    def test_without_mongoengine_a_client_is_built_with_the_metrics_listener(self, _, mock_client):
+        pool_settings = SimpleNamespace(configured=True, MONGO_POOL={"maxPoolSize": 5})
+        with patch.dict("os.environ", {"MONGO_URI": "mongodb://db.example"}), patch("django.conf.settings", pool_settings):
+            self.assertIs(mongo.get_client(), mock_client.return_value)
+        mock_client.assert_called_once_with(
+            "mongodb://db.example", event_listeners=[mongo.pool_metrics, mongo.command_metrics], maxPoolSize=5,
+        )
+
+    @patch("mongoengine.connect")
+    def test_connect_registers_the_listener_and_pool_options(self, mock_connect):
+        mongo.connect("expensestracker", "mongodb://db.example", maxPoolSize=10)
+        mock_connect.assert_called_once_with(
+            "expensestracker", host="mongodb://db.example", event_listeners=[mongo.pool_metrics, mongo.command_metrics], maxPoolSize=10,
+        )
+
+if __name__ == '__main__':
+    unittest.main()
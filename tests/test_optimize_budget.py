@@ -2,22 +2,30 @@ import unittest
 from unittest.mock import patch, MagicMock
 from api.langchainAgent.Tools.optimize_budget import optimize_budgets
 
+def summary_response(incomes, expenses):
+    # Build a mocked /summary/ response from raw income/expense items
+    def totals(items):
+        tags = {}
+        for item in items:
+            tags[item.get("Tag", "Other")] = tags.get(item.get("Tag", "Other"), 0) + item["Amount"]
+        return {"total": sum(item["Amount"] for item in items), "count": len(items), "monthly": {}, "tags": tags}
+
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = {"incomes": totals(incomes), "expenses": totals(expenses)}
+    return response
+
 class TestOptimizeBudgetsTool(unittest.TestCase):
 
     @patch('api.langchainAgent.Tools.optimize_budget.get_current_user_info')
-    @patch('api.langchainAgent.Tools.optimize_budget.requests.get')
+    @patch('api.langchainAgent.data_access.requests.get')
     def test_successful_budget(self, mock_get, mock_user_info):
         mock_user_info.return_value = ("test_user", "fake_token")
 
-        income_response = MagicMock()
-        income_response.status_code = 200
-        income_response.json.return_value = [{"Amount": 70000}]
-
-        expense_response = MagicMock()
-        expense_response.status_code = 200
-        expense_response.json.return_value = [{"Amount": 30000, "Tag": "Food"}, {"Amount": 5000, "Tag": "Entertainment"}]
-
-        mock_get.side_effect = [expense_response, income_response]
+        mock_get.return_value = summary_response(
+            incomes=[{"Amount": 70000}],
+            expenses=[{"Amount": 30000, "Tag": "Food"}, {"Amount": 5000, "Tag": "Entertainment"}]
+        )
         result = optimize_budgets("Optimize my budget")
         self.assertIn("Total Income", result)
         self.assertIn("Food", result)
@@ -29,7 +37,7 @@ class TestOptimizeBudgetsTool(unittest.TestCase):
         self.assertIn("❌ Missing user authentication", result)
 
     @patch('api.langchainAgent.Tools.optimize_budget.get_current_user_info')
-    @patch('api.langchainAgent.Tools.optimize_budget.requests.get')
+    @patch('api.langchainAgent.data_access.requests.get')
     def test_api_unauthorized(self, mock_get, mock_user_info):
         mock_user_info.return_value = ("test_user", "fake_token")
         unauthorized_response = MagicMock()
@@ -39,106 +47,68 @@ class TestOptimizeBudgetsTool(unittest.TestCase):
         self.assertIn("❌ Unauthorized access", result)
 
     @patch('api.langchainAgent.Tools.optimize_budget.get_current_user_info')
-    @patch('api.langchainAgent.Tools.optimize_budget.requests.get')
+    @patch('api.langchainAgent.data_access.requests.get')
     def test_income_json_parse_error(self, mock_get, mock_user_info):
         mock_user_info.return_value = ("test_user", "fake_token")
-        expense_response = MagicMock()
-        expense_response.status_code = 200
-        expense_response.json.return_value = [{"Amount": 1000, "Tag": "Food"}]
-
-        bad_income_response = MagicMock()
-        bad_income_response.status_code = 200
-        bad_income_response.json.return_value = [{"WrongField": 5000}]
-
-        mock_get.side_effect = [expense_response, bad_income_response]
+        bad_income_response = summary_response(incomes=[], expenses=[{"Amount": 1000, "Tag": "Food"}])
+        bad_income_response.json.return_value["incomes"] = {"WrongField": 5000}
+        mock_get.return_value = bad_income_response
         result = optimize_budgets("Budget overview")
         self.assertIn("❌ Error parsing income data", result)
 
     @patch('api.langchainAgent.Tools.optimize_budget.get_current_user_info')
-    @patch('api.langchainAgent.Tools.optimize_budget.requests.get')
+    @patch('api.langchainAgent.data_access.requests.get')
     def test_expense_json_parse_error(self, mock_get, mock_user_info):
         mock_user_info.return_value = ("test_user", "fake_token")
-        bad_expense_response = MagicMock()
-        bad_expense_response.status_code = 200
-        bad_expense_response.json.return_value = [{"WrongField": 1000}]
-
-        income_response = MagicMock()
-        income_response.status_code = 200
-        income_response.json.return_value = [{"Amount": 5000}]
-
-        mock_get.side_effect = [bad_expense_response, income_response]
+        bad_expense_response = summary_response(incomes=[{"Amount": 5000}], expenses=[])
+        bad_expense_response.json.return_value["expenses"] = {"WrongField": 1000}
+        mock_get.return_value = bad_expense_response
         result = optimize_budgets("Check budget")
         self.assertIn("❌ Error parsing expense data", result)
 
     @patch('api.langchainAgent.Tools.optimize_budget.get_current_user_info')
-    @patch('api.langchainAgent.Tools.optimize_budget.requests.get')
+    @patch('api.langchainAgent.data_access.requests.get')
     def test_no_income_data(self, mock_get, mock_user_info):
         mock_user_info.return_value = ("test_user", "fake_token")
-        expense_response = MagicMock()
-        expense_response.status_code = 200
-        expense_response.json.return_value = [{"Amount": 1000, "Tag": "Food"}]
-
-        empty_income_response = MagicMock()
-        empty_income_response.status_code = 200
-        empty_income_response.json.return_value = []
-
-        mock_get.side_effect = [expense_response, empty_income_response]
+        mock_get.return_value = summary_response(incomes=[], expenses=[{"Amount": 1000, "Tag": "Food"}])
         result = optimize_budgets("Show my budget")
         self.assertIn("⚠️ No income records found", result)
 
     @patch('api.langchainAgent.Tools.optimize_budget.get_current_user_info')
-    @patch('api.langchainAgent.Tools.optimize_budget.requests.get')
+    @patch('api.langchainAgent.data_access.requests.get')
     def test_overspending_case(self, mock_get, mock_user_info):
         mock_user_info.return_value = ("test_user", "fake_token")
 
-        income_response = MagicMock()
-        income_response.status_code = 200
-        income_response.json.return_value = [{"Amount": 5000}]
-
-        expense_response = MagicMock()
-        expense_response.status_code = 200
-        expense_response.json.return_value = [{"Amount": 6000, "Tag": "Food"}]
-
-        mock_get.side_effect = [expense_response, income_response]
+        mock_get.return_value = summary_response(incomes=[{"Amount": 5000}], expenses=[{"Amount": 6000, "Tag": "Food"}])
         result = optimize_budgets("Budget status")
         self.assertIn("❗ Overspending!", result)
 
     @patch('api.langchainAgent.Tools.optimize_budget.get_current_user_info')
-    @patch('api.langchainAgent.Tools.optimize_budget.requests.get')
+    @patch('api.langchainAgent.data_access.requests.get')
     def test_high_food_spending(self, mock_get, mock_user_info):
         mock_user_info.return_value = ("test_user", "fake_token")
 
-        income_response = MagicMock()
-        income_response.status_code = 200
-        income_response.json.return_value = [{"Amount": 10000}]
-
-        expense_response = MagicMock()
-        expense_response.status_code = 200
-        expense_response.json.return_value = [{"Amount": 4000, "Tag": "Food"}, {"Amount": 1000, "Tag": "Other"}]
-
-        mock_get.side_effect = [expense_response, income_response]
+        mock_get.return_value = summary_response(
+            incomes=[{"Amount": 10000}],
+            expenses=[{"Amount": 4000, "Tag": "Food"}, {"Amount": 1000, "Tag": "Other"}]
+        )
         result = optimize_budgets("Optimize")
         self.assertIn("Food expenses are too high", result)
 
     @patch('api.langchainAgent.Tools.optimize_budget.get_current_user_info')
-    @patch('api.langchainAgent.Tools.optimize_budget.requests.get')
+    @patch('api.langchainAgent.data_access.requests.get')
     def test_high_entertainment_spending(self, mock_get, mock_user_info):
         mock_user_info.return_value = ("test_user", "fake_token")
 
-        income_response = MagicMock()
-        income_response.status_code = 200
-        income_response.json.return_value = [{"Amount": 10000}]
-
-        expense_response = MagicMock()
-        expense_response.status_code = 200
-        expense_response.json.return_value = [{"Amount": 2000, "Tag": "Entertainment"}, {"Amount": 500, "Tag": "Other"}]
-
-        mock_get.side_effect = [expense_response, income_response]
+        mock_get.return_value = summary_response(
+            incomes=[{"Amount": 10000}],
+            expenses=[{"Amount": 2000, "Tag": "Entertainment"}, {"Amount": 500, "Tag": "Other"}]
+        )
         result = optimize_budgets("Optimize entertainment")
         self.assertIn("Reduce entertainment costs", result)
 
     @patch('api.langchainAgent.Tools.optimize_budget.get_current_user_info')
-    @patch('api.langchainAgent.Tools.optimize_budget.requests.get')
+    @patch('api.langchainAgent.data_access.requests.get')
     def test_api_500_error(self, mock_get, mock_user_info):
         mock_user_info.return_value = ("test_user", "fake_token")
         error_response = MagicMock()
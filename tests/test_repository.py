@@ -0,0 +1,71 @@
+import unittest
+from datetime import date, datetime
+from types import SimpleNamespace
+import mongomock
+from mongoengine import connect, disconnect
+from api import repository
+from api.models import Expense
+
+class TestRepository(unittest.TestCase):
+
+    def test_cursor_round_trip(self):
+        document = SimpleNamespace(Date=date(2025, 3, 14), Id="abc-123")
+        cursor = repository.encode_cursor(document)
+        self.assertEqual(repository.decode_cursor(cursor), (datetime(2025, 3, 14), "abc-123"))
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            repository.decode_cursor("not-a-cursor")
+
+    def test_validate_fields(self):
+        self.assertIsNone(repository.validate_fields("expenses", None))
+        self.assertEqual(repository.validate_fields("incomes", ["Amount", "Date"]), ["Amount", "Date"])
+        with self.assertRaises(ValueError):
+            repository.validate_fields("incomes", ["Paymentmethod"])  # expense-only field
+
+    def test_query_shapes_carry_the_page_sort(self):
+        shapes = {label: (query, sort, limit) for label, query, sort, limit in repository.view_query_shapes("user-1")}
+        self.assertEqual(repository.PAGE_SORT, [(field.lstrip("-").replace("Id", "_id"), -1) for field in repository.PAGE_ORDER])
+        for label in ("detail view / page_transactions", "global list view / page_transactions"):
+            _, sort, limit = shapes[label]
+            self.assertEqual(sort, repository.PAGE_SORT)
+            self.assertEqual(limit, repository.DEFAULT_PAGE_SIZE + 1)
+
+class TestPageTransactions(unittest.TestCase):
+
+    def setUp(self):
+        connect("test", mongo_client_class=mongomock.MongoClient, uuidRepresentation="standard")
+        self.addCleanup(disconnect)
+        # Several rows per day, so pages break inside runs of equal Dates
+        self.expected = []
+        for day in (date(2025, 3, 3), date(2025, 3, 2), date(2025, 3, 1)):
+            for n in range(4, 0, -1):
+                self.expected.append(f"{day:%m%d}-{n}")
+        rows = [("user-1", doc_id) for doc_id in self.expected] + [("user-2", f"0302-other-{n}") for n in range(2)]
+        Expense.objects.insert([
+            Expense(Id=doc_id, User=user, Title="t", Amount=1, Tag="Food", Type="Expense", Date=date(2025, 3, int(doc_id[2:4])))
+            for user, doc_id in rows
+        ], load_bulk=False)
+
+    def pages(self, user_id, limit):
+        ids, cursor = [], None
+        while True:
+            page = repository.page_transactions("expenses", user_id, limit=limit, cursor=cursor, fields=["Id", "Date"])
+            self.assertLessEqual(len(page["results"]), limit)
+            ids += [row["Id"] for row in page["results"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return ids
+
+    def test_pages_across_equal_dates_without_gaps_or_repeats(self):
+        for limit in (1, 3, 5, 12, 50):
+            self.assertEqual(self.pages("user-1", limit), self.expected)
+
+    def test_pages_over_every_user(self):
+        ids = self.pages(None, 5)
+        self.assertEqual(len(ids), 14)
+        self.assertEqual(len(set(ids)), 14)
+        self.assertEqual(ids[4:10], ["0302-other-1", "0302-other-0", "0302-4", "0302-3", "0302-2", "0302-1"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from api.langchainAgent.response_cache import (
+    SemanticResponseCache, is_cacheable, is_follow_up, normalize_query, query_slots, turn_tool_names,
+)
+
+VECTORS = {
+    "how much did i spend on food": [1.0, 0.0, 0.0],
+    "how much have i spent on food": [0.99, 0.1, 0.0],
+    "what is my income this month": [0.0, 1.0, 0.0],
+    "what are my biggest expenses": [0.0, 0.0, 1.0],
+    "can i save ₹5000 in 3 months": [0.6, 0.8, 0.0],
+    "can i save ₹8000 in 6 months": [0.6, 0.8, 0.0],
+    "insights for march 2025": [0.0, 0.6, 0.8],
+    "insights for april 2025": [0.0, 0.6, 0.8],
+}
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.embed = MagicMock(side_effect=lambda text: VECTORS[text])
+        self.clock = Clock()
+        self.cache = SemanticResponseCache(self.embed, threshold=0.95, ttl_seconds=60, maxsize=2, clock=self.clock)
+
+    def test_same_text_hits_without_embedding(self):
+        self.cache.store("test_user", "How much did I spend on food?", 1, "₹500")
+        self.embed.reset_mock()
+
+        lookup = self.cache.lookup("test_user", "  how much did I spend on FOOD ", 1)
+        self.assertEqual(lookup.response, "₹500")
+        self.embed.assert_not_called()
+
+    def test_similar_query_hits_above_threshold(self):
+        self.cache.store("test_user", "how much did i spend on food", 1, "₹500")
+
+        self.assertEqual(self.cache.lookup("test_user", "How much have I spent on food?", 1).response, "₹500")
+        lookup = self.cache.lookup("test_user", "What are my biggest expenses?", 1)
+        self.assertIsNone(lookup.response)
+        self.assertIsNotNone(lookup.vector)  # reused by store()
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_different_amount_or_month_misses(self):
+        # Same embedding, different answer: the slots must match before cosine is tried
+        self.cache.store("test_user", "Can I save ₹5,000 in 3 months?", 1, "Save ₹1,667 a month")
+        self.cache.store("test_user", "Insights for March 2025", 1, "March insights")
+        self.embed.reset_mock()
+
+        self.assertIsNone(self.cache.lookup("test_user", "Can I save ₹8000 in 6 months?", 1).response)
+        self.assertIsNone(self.cache.lookup("test_user", "Insights for April 2025", 1).response)
+        self.embed.assert_not_called()
+        self.assertEqual(self.cache.lookup("test_user", "can I save ₹5000 in 3 months", 1).response, "Save ₹1,667 a month")
+
+    def test_follow_ups_are_neither_stored_nor_served(self):
+        for query in ("and last month?", "What about food?", "same for Uber", "show that again please"):
+            self.cache.store("test_user", query, 1, "depends on the previous turn")
+            self.assertIsNone(self.cache.lookup("test_user", query, 1).response)
+        self.assertEqual(self.cache.stats()["size"], 0)
+        self.embed.assert_not_called()
+
+    def test_query_slots(self):
+        self.assertEqual(query_slots("Can I save ₹5,000 in 3 months?"), ("5000", "3", "month"))
+        self.assertEqual(query_slots("Spent 2.5k last week"), ("2.5k", "last", "week"))
+        self.assertEqual(query_slots("insights for March 2024"), query_slots("Insights for mar 2024"))
+        self.assertEqual(query_slots("how much did I spend on food"), ())
+        self.assertFalse(is_follow_up(normalize_query("Is it possible to save ₹5000 in 3 months?")))
+
+    def test_new_data_version_or_other_user_misses(self):
+        self.cache.store("test_user", "how much did i spend on food", 1, "₹500")
+
+        self.assertIsNone(self.cache.lookup("test_user", "how much did i spend on food", 2).response)
+        self.assertIsNone(self.cache.lookup("other_user", "how much did i spend on food", 1).response)
+
+    def test_entries_expire(self):
+        self.cache.store("test_user", "how much did i spend on food", 1, "₹500")
+        self.clock.now += 61
+
+        self.assertIsNone(self.cache.lookup("test_user", "how much did i spend on food", 1).response)
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_relative_periods_do_not_outlive_the_day(self):
+        # Within the TTL, but "this month" now means April
+        self.clock.now = datetime(2025, 3, 31, 23, 59, 50).timestamp()
+        self.cache.store("test_user", "what is my income this month", 1, "March income")
+        self.assertEqual(self.cache.lookup("test_user", "what is my income this month", 1).response, "March income")
+
+        self.clock.now += 20
+        self.assertIsNone(self.cache.lookup("test_user", "what is my income this month", 1).response)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.store("test_user", "how much did i spend on food", 1, "food")
+        self.cache.store("test_user", "what is my income this month", 1, "income")
+        self.cache.lookup("test_user", "how much did i spend on food", 1)
+        self.cache.store("test_user", "how much have i spent on food", 1, "food again")
+
+        self.assertIsNone(self.cache.lookup("test_user", "what is my income this month", 1).response)
+        self.assertEqual(self.cache.stats()["size"], 2)
+
+    def test_embedding_failure_is_a_miss(self):
+        self.cache.store("test_user", "how much did i spend on food", 1, "₹500")
+        self.embed.side_effect = Exception("429 Resource exhausted")
+
+        self.assertEqual(self.cache.lookup("test_user", "what is my income this month", 1), (None, None))
+
+    def test_backing_store_shared_across_workers(self):
+        collection = MagicMock()
+        writer = SemanticResponseCache(self.embed, collection, clock=self.clock)
+        writer.store("test_user", "how much did i spend on food", 3, "₹500")
+        document = collection.insert_one.call_args.args[0]
+        self.assertEqual((document["User"], document["Version"], document["Query"]), ("test_user", 3, "how much did i spend on food"))
+        self.assertEqual(document["ExpiresAt"] - document["CreatedAt"], timedelta(seconds=3600))
+
+        stored = dict(document, ExpiresAt=document["ExpiresAt"].replace(tzinfo=None))
+        collection.find.return_value.sort.return_value.limit.return_value = [stored]
+        reader = SemanticResponseCache(self.embed, collection, clock=self.clock)
+        self.assertEqual(reader.lookup("test_user", "How much have I spent on food?", 3).response, "₹500")
+        query = collection.find.call_args.args[0]
+        self.assertEqual((query["User"], query["Version"], query["Slots"]), ("test_user", 3, []))
+        self.assertEqual(query["Day"], document["Day"])
+        self.assertEqual(document["Day"], datetime.fromtimestamp(self.clock.now).strftime("%Y-%m-%d"))
+        self.assertEqual(query["ExpiresAt"]["$gt"], datetime.fromtimestamp(self.clock.now, timezone.utc))
+
+    def test_only_read_only_turns_are_cacheable(self):
+        messages = [
+            HumanMessage(content="add ₹200 for lunch"),
+            AIMessage(content="", tool_calls=[{"name": "add_transaction", "args": {}, "id": "1"}]),
+            ToolMessage(content="added", tool_call_id="1"),
+            AIMessage(content="Added."),
+            HumanMessage(content="how am I doing?"),
+            AIMessage(content="", tool_calls=[{"name": "financial_insight", "args": {}, "id": "2"}]),
+            ToolMessage(content="fine", tool_call_id="2"),
+            AIMessage(content="Fine."),
+        ]
+        self.assertEqual(turn_tool_names(messages), ["financial_insight"])
+        self.assertTrue(is_cacheable(turn_tool_names(messages)))
+        self.assertFalse(is_cacheable(turn_tool_names(messages[:4])))
+        self.assertTrue(is_cacheable([]))
+
+    def test_normalize_query(self):
+        self.assertEqual(normalize_query("  What's my   budget for ₹5000?! "), "what s my budget for ₹5000")
+        self.assertEqual(normalize_query("Save ₹5,000, please"), "save ₹5000 please")
+
+if __name__ == '__main__':
+    unittest.main()
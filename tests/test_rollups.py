@@ -0,0 +1,151 @@
+import unittest
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+import mongomock
+from api import rollups
+from benchmarks.load_test import accept_bulk_sort
+
+accept_bulk_sort(mongomock)  # pymongo 4.11+ sends bulk updates a sort= that mongomock does not take
+
+def stored(amount, tag="Food", day=date(2025, 3, 14)):
+    return {"User": "test_user", "Tag": tag, "Amount": amount, "Date": datetime.combine(day, datetime.min.time())}
+
+class TestRollups(unittest.TestCase):
+
+    def test_entry_bucket(self):
+        bucket, amount = rollups.entry_from_mongo("incomes", stored(1200.5, tag="Salary"))
+        self.assertEqual(bucket, {"User": "test_user", "Type": "Income", "Month": "2025-03", "Tag": "Salary"})
+        self.assertEqual(amount, 1200.5)
+
+    def test_covers_whole_months_only(self):
+        self.assertTrue(rollups.covers())
+        self.assertTrue(rollups.covers(date(2024, 1, 1), date(2024, 12, 31)))
+        self.assertTrue(rollups.covers(date(2024, 2, 1), date(2024, 2, 29)))
+        self.assertFalse(rollups.covers(date(2024, 2, 1), date(2024, 2, 28)))
+        self.assertFalse(rollups.covers(date(2024, 2, 2), None))
+
+    @patch('api.rollups._guarded', lambda user_id, update: update())
+    @patch('api.rollups.data_version.bump')
+    @patch('api.rollups._rollups')
+    def test_add_many_groups_rows_per_bucket(self, mock_rollups, mock_bump):
+        rollups.add_many("expenses", [stored(10.0), stored(30.0), stored(5.0, tag="Travel")])
+        mock_bump.assert_called_once_with("test_user")
+
+        operations = mock_rollups.return_value.bulk_write.call_args.args[0]
+        updates = {op._filter["Tag"]: op._doc for op in operations}
+        self.assertEqual(updates["Food"], {"$inc": {"Sum": 40.0, "Count": 2}, "$min": {"Min": 10.0}, "$max": {"Max": 30.0}})
+        self.assertEqual(updates["Travel"]["$inc"], {"Sum": 5.0, "Count": 1})
+
+    @patch('api.rollups._refresh_extremes')
+    @patch('api.rollups._rollups')
+    def test_remove_entry(self, mock_rollups, mock_refresh):
+        collection = mock_rollups.return_value
+        bucket, _ = rollups.entry_from_mongo("expenses", stored(10.0))
+
+        collection.find_one_and_update.return_value = {"Count": 0, "Sum": 0.0, "Min": 10.0, "Max": 10.0}
+        rollups.remove_entry("expenses", bucket, 10.0)
+        collection.delete_one.assert_called_once()
+
+        collection.find_one_and_update.return_value = {"Count": 2, "Sum": 50.0, "Min": 10.0, "Max": 30.0}
+        rollups.remove_entry("expenses", bucket, 20.0)
+        mock_refresh.assert_not_called()  # 20 was neither the min nor the max
+        rollups.remove_entry("expenses", bucket, 30.0)
+        mock_refresh.assert_called_once_with("expenses", bucket)
+
+    @patch('api.rollups._rollups')
+    def test_summarize(self, mock_rollups):
+        mock_rollups.return_value.find.return_value = [
+            {"Type": "Expense", "Month": "2025-03", "Tag": "Food", "Sum": 40.0, "Count": 2},
+            {"Type": "Expense", "Month": "2025-02", "Tag": "Rent", "Sum": 100.0, "Count": 1},
+            {"Type": "Expense", "Month": "2025-03", "Tag": "Rent", "Sum": 100.0, "Count": 1},
+            {"Type": "Income", "Month": "2025-03", "Tag": "Salary", "Sum": 1000.0, "Count": 1},
+        ]
+
+        summary = rollups.summarize("test_user", date(2025, 2, 1), date(2025, 3, 31))
+        query = mock_rollups.return_value.find.call_args.args[0]
+        self.assertEqual(query, {"User": "test_user", "Month": {"$gte": "2025-02", "$lte": "2025-03"}})
+        self.assertEqual(summary["expenses"], {
+            "total": 240.0,
+            "count": 4,
+            "monthly": {"2025-02": 100.0, "2025-03": 140.0},
+            "tags": {"Rent": 200.0, "Food": 40.0},
+        })
+        self.assertEqual(summary["incomes"]["total"], 1000.0)
+
+@patch('api.rollups.data_version.bump')
+class TestRollupRebuild(unittest.TestCase):
+
+    def setUp(self):
+        db = mongomock.MongoClient()["test"]
+        self.rollups, self.statuses = db["MonthlyRollup"], db["RollupStatus"]
+        self.transactions = {"expenses": db["Expense"], "incomes": db["Income"]}
+        for name, replacement in (
+            ("_rollups", lambda: self.rollups),
+            ("_statuses", lambda: self.statuses),
+            ("_transactions", lambda kind: self.transactions[kind]),
+        ):
+            patcher = patch.object(rollups, name, replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write(self, amount):
+        # A transaction write: the raw row first, then the hook
+        row = stored(amount)
+        self.transactions["expenses"].insert_one(dict(row))
+        rollups.add_many("expenses", [row])
+
+    def food_sum(self):
+        return self.rollups.find_one({"Tag": "Food"})["Sum"]
+
+    def test_hooks_wait_for_the_first_rebuild(self, _):
+        self.write(10.0)
+        self.assertEqual(self.rollups.count_documents({}), 0)
+        self.assertFalse(rollups.is_built("test_user"))
+
+        self.assertEqual(rollups.rebuild_user("test_user"), 1)
+        self.assertTrue(rollups.is_built("test_user"))
+        self.write(5.0)
+        self.assertEqual(self.food_sum(), 15.0)
+
+    def test_write_during_rebuild_is_not_lost_or_counted_twice(self, _):
+        self.write(10.0)
+        rollups.rebuild_user("test_user")
+        aggregate = rollups._aggregate
+        calls = []
+
+        def aggregate_then_write(user_id):
+            result = aggregate(user_id)
+            if not calls:
+                self.write(5.0)  # lands after the aggregation read the raw rows
+            calls.append(user_id)
+            return result
+
+        with patch.object(rollups, "_aggregate", aggregate_then_write):
+            self.assertEqual(rollups.rebuild_user("test_user"), 1)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self.food_sum(), 15.0)
+        self.assertEqual(self.statuses.find_one({"_id": "test_user"})["State"], "ready")
+
+    def test_one_rebuild_per_user(self, _):
+        self.write(10.0)
+        lease = datetime.utcnow() + timedelta(minutes=5)
+        self.statuses.insert_one({"_id": "test_user", "State": "building", "Owner": "other", "LeaseUntil": lease})
+        self.assertIsNone(rollups.rebuild_user("test_user"))
+        self.assertFalse(rollups.is_built("test_user"))
+
+        self.statuses.update_one({"_id": "test_user"}, {"$set": {"LeaseUntil": datetime.utcnow() - timedelta(seconds=1)}})
+        self.assertEqual(rollups.rebuild_user("test_user"), 1)
+
+    @patch('api.repository.rollups.summarize')
+    def test_summaries_never_rebuild_on_the_request_path(self, mock_summarize, _):
+        from api import repository
+        self.write(10.0)
+        with patch.object(repository, "get_model", lambda kind: SimpleNamespace(_get_collection=lambda: self.transactions[kind])):
+            summary = repository.summarize_transactions("test_user", date(2025, 3, 1), date(2025, 3, 31))
+        mock_summarize.assert_not_called()
+        self.assertEqual(self.statuses.count_documents({}), 0)
+        self.assertEqual(summary["expenses"]["total"], 10.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+from api.management.commands.startup_profile import parse_importtime, summarize_imports
+
+IMPORTTIME = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     _json
+import time:       900 |       1020 |   json
+INFO some log line
+import time:      2000 |       2000 |     langchain_core.messages
+import time:       500 |       2500 |   langchain_core
+import time:        80 |       3600 | api.views
+"""
+
+class TestStartupProfile(unittest.TestCase):
+
+    def test_parse_importtime(self):
+        imports = parse_importtime(IMPORTTIME)
+        self.assertEqual([item["module"] for item in imports], ["_json", "json", "langchain_core.messages", "langchain_core", "api.views"])
+        self.assertEqual(imports[1], {"module": "json", "self_ms": 0.9, "cumulative_ms": 1.02, "depth": 1})
+        self.assertEqual(imports[-1]["depth"], 0)
+
+    def test_summary_sorts_modules_and_packages(self):
+        summary = summarize_imports(parse_importtime(IMPORTTIME), top=2)
+        self.assertEqual(summary["total_ms"], 3.6)
+        self.assertEqual(summary["modules"], 5)
+        self.assertEqual([item["module"] for item in summary["slowest"]], ["api.views", "langchain_core"])
+        self.assertEqual(summary["packages"], {"langchain_core": 2.5, "json": 0.9})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import unittest
+import mongomock
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.prebuilt import create_react_agent
+from api.langchainAgent.context import get_current_user_info, set_user_info
+from api.langchainAgent.streaming import astream_agent_events, stream_agent_events
+from api.langchainAgent.thread_lock import ThreadRunLock
+
+class ScriptedChatModel(BaseChatModel):
+    # Replies with the scripted messages in order, streaming them word by word
+    script: list
+    position: int = 0
+
+    @property
+    def _llm_type(self):
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _next(self):
+        message = self.script[self.position]
+        self.position += 1
+        return message
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=self._next())])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self._next()
+        words = message.content.split(" ")
+        for i, word in enumerate(words):
+            last = i == len(words) - 1
+            chunk = AIMessageChunk(
+                content=word if last else word + " ",
+                tool_call_chunks=[
+                    {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": n}
+                    for n, call in enumerate(message.tool_calls)
+                ] if last else [],
+            )
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+@tool
+def lookup_balance(query: str) -> str:
+    """Look up the balance."""
+    return "₹42"
+
+@tool
+def current_user(query: str) -> str:
+    """Who is asking."""
+    return get_current_user_info()[0]
+
+def parse(frames):
+    events = []
+    for frame in frames:
+        event_line, data_line = frame.strip().split("\n")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+class TestStreaming(unittest.TestCase):
+
+    def test_agent_stream_emits_tool_and_token_events(self):
+        model = ScriptedChatModel(script=[
+            AIMessage(content="", tool_calls=[{"name": "lookup_balance", "args": {"query": "now"}, "id": "call-1"}]),
+            AIMessage(content="Your balance is ₹42"),
+        ])
+        agent = create_react_agent(model=model, tools=[lookup_balance], checkpointer=MemorySaver())
+
+        completed = []
+        events = parse(stream_agent_events(
+            agent, "balance?", {"configurable": {"thread_id": "test_user"}},
+            on_complete=lambda response, tools: completed.append((response, tools)),
+        ))
+        self.assertEqual(completed, [("Your balance is ₹42", ["lookup_balance"])])
+        names = [name for name, _ in events]
+        self.assertEqual(names[:2], ["tool_start", "tool_end"])
+        self.assertEqual(events[0][1], {"name": "lookup_balance", "args": {"query": "now"}})
+        self.assertIn("token", names)
+        self.assertEqual(events[-1], ("done", {"response": "Your balance is ₹42"}))
+
+    def test_async_agent_stream_keeps_user_per_task(self):
+        def script():
+            return ScriptedChatModel(script=[
+                AIMessage(content="", tool_calls=[{"name": "current_user", "args": {"query": "me"}, "id": "call-1"}]),
+                AIMessage(content="done"),
+            ])
+
+        async def run(user_id):
+            set_user_info(user_id, "token")
+            agent = create_react_agent(model=script(), tools=[current_user], checkpointer=MemorySaver())
+            frames = [frame async for frame in astream_agent_events(agent, "who?", {"configurable": {"thread_id": user_id}})]
+            state = await agent.aget_state({"configurable": {"thread_id": user_id}})
+            return parse(frames), state.values["messages"][2].content
+
+        async def main():
+            return await asyncio.gather(run("user_a"), run("user_b"))
+
+        (events_a, tool_a), (events_b, tool_b) = asyncio.run(main())
+        self.assertEqual((tool_a, tool_b), ("user_a", "user_b"))
+        self.assertEqual(events_a[0], ("tool_start", {"name": "current_user", "args": {"query": "me"}}))
+        self.assertEqual(events_b[-1], ("done", {"response": "done"}))
+
+    def test_agent_stream_refuses_a_busy_thread(self):
+        model = ScriptedChatModel(script=[AIMessage(content="Your balance is ₹42")])
+        agent = create_react_agent(model=model, tools=[lookup_balance], checkpointer=MemorySaver())
+        lock = ThreadRunLock(mongomock.MongoClient()["test"]["AgentThreadLocks"], wait_seconds=0)
+        config = {"configurable": {"thread_id": "test_user"}}
+
+        with lock.hold("test_user"):
+            events = parse(stream_agent_events(agent, "balance?", config, thread_lock=lock))
+        self.assertEqual(events, [("error", {"error": "Your previous message is still being answered. Please try again in a moment."})])
+        self.assertEqual(model.position, 0)
+
+        events = parse(stream_agent_events(agent, "balance?", config, thread_lock=lock))
+        self.assertEqual(events[-1], ("done", {"response": "Your balance is ₹42"}))
+        self.assertEqual(lock.collection.count_documents({}), 0)
+
+if __name__ == '__main__':
+    unittest.main()
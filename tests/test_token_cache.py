@@ -0,0 +1,70 @@
+import threading
+import unittest
+from api.utils.token_cache import VerifiedTokenCache
+
+class FakeClock:
+    def __init__(self, now=1000):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class TestVerifiedTokenCache(unittest.TestCase):
+
+    def test_hit_after_put(self):
+        cache = VerifiedTokenCache(clock=FakeClock())
+        self.assertIsNone(cache.get("token-a"))
+        cache.put("token-a", {"uid": "u1", "exp": 2000})
+        self.assertEqual(cache.get("token-a")["uid"], "u1")
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_entry_expires_at_exp_claim(self):
+        clock = FakeClock()
+        cache = VerifiedTokenCache(clock=clock)
+        cache.put("token-a", {"uid": "u1", "exp": 1500})
+        clock.now = 1500
+        self.assertIsNone(cache.get("token-a"))
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_already_expired_token_not_cached(self):
+        cache = VerifiedTokenCache(clock=FakeClock())
+        cache.put("token-a", {"uid": "u1", "exp": 999})
+        cache.put("token-b", {"uid": "u2"})  # no exp claim
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_lru_eviction(self):
+        cache = VerifiedTokenCache(maxsize=2, clock=FakeClock())
+        cache.put("a", {"uid": "a", "exp": 2000})
+        cache.put("b", {"uid": "b", "exp": 2000})
+        cache.get("a")
+        cache.put("c", {"uid": "c", "exp": 2000})
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_raw_token_not_stored(self):
+        cache = VerifiedTokenCache(clock=FakeClock())
+        cache.put("secret-token", {"uid": "u1", "exp": 2000})
+        self.assertNotIn("secret-token", cache._entries)
+
+    def test_concurrent_access(self):
+        cache = VerifiedTokenCache(maxsize=50, clock=FakeClock())
+
+        def worker(n):
+            for i in range(200):
+                token = f"t{(n * 7 + i) % 80}"
+                if cache.get(token) is None:
+                    cache.put(token, {"uid": token, "exp": 2000})
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats = cache.stats()
+        self.assertLessEqual(stats["size"], 50)
+        self.assertEqual(stats["hits"] + stats["misses"], 8 * 200)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.prebuilt import create_react_agent
+from api.utils import tracing
+from api.utils.mongo import command_metrics
+from api.langchainAgent.instrumentation import TracingCallbackHandler
+from test_streaming import ScriptedChatModel
+
+def mongo_find():
+    # What pymongo's command listener sees for one find on the Expense collection
+    event = SimpleNamespace(
+        command_name="find", command={"find": "Expense"}, database_name="expensestracker",
+        connection_id=("localhost", 27017), request_id=7, duration_micros=2500,
+    )
+    command_metrics.started(event)
+    command_metrics.succeeded(event)
+
+@tool
+def fetch_history(query: str) -> str:
+    """Reads the user's transactions."""
+    with tracing.span("http", "GET /expenses/"):
+        pass
+    mongo_find()
+    return "history"
+
+def agent_with(handler):
+    model = ScriptedChatModel(script=[
+        AIMessage(content="", tool_calls=[{"name": "fetch_history", "args": {"query": "q"}, "id": "call-1"}]),
+        AIMessage(content="done"),
+    ], callbacks=[handler])
+    return create_react_agent(model=model, tools=[fetch_history], checkpointer=MemorySaver())
+
+def shape(span):
+    return (span["kind"], span["name"], [shape(child) for child in span["children"]])
+
+EXPECTED = ("request", "POST /ai/agent/", [
+    ("llm", "chat_model", []),
+    ("tool", "fetch_history", [("http", "GET /expenses/", []), ("db", "find expensestracker.Expense", [])]),
+    ("llm", "chat_model", []),
+])
+
+class TestAgentTracing(unittest.TestCase):
+
+    def setUp(self):
+        tracing.clear_traces()
+        handler = TracingCallbackHandler()
+        fetch_history.callbacks = [handler]
+        self.addCleanup(setattr, fetch_history, "callbacks", None)
+        self.agent = agent_with(handler)
+        self.config = {"configurable": {"thread_id": "t"}}
+
+    def test_request_span_tree_nests_db_and_http_calls_under_the_tool(self):
+        root = tracing.start_trace("POST /ai/agent/")
+        self.agent.invoke({"messages": [{"role": "user", "content": "go"}]}, config=self.config)
+        trace = tracing.finish_trace(root)
+
+        self.assertEqual(shape(trace), EXPECTED)
+        self.assertEqual(tracing.recent_traces(), [trace])
+        tool_span = trace["children"][1]
+        self.assertEqual(tool_span["children"][1]["attributes"], {"server_ms": 2.5})
+        self.assertTrue(all(child["wall_ms"] is not None for child in tool_span["children"]))
+
+    def test_async_runs_are_traced_the_same_way(self):
+        async def request():
+            root = tracing.start_trace("POST /ai/agent/")
+            await self.agent.ainvoke({"messages": [{"role": "user", "content": "go"}]}, config=self.config)
+            return tracing.finish_trace(root)
+
+        self.assertEqual(shape(asyncio.run(request())), EXPECTED)
+
+    def test_nothing_is_recorded_outside_a_traced_request(self):
+        tracing.set_current_span(None)
+        self.agent.invoke({"messages": [{"role": "user", "content": "go"}]}, config=self.config)
+        with tracing.span("http", "GET /") as span:
+            self.assertIsNone(span)
+        self.assertEqual(tracing.recent_traces(), [])
+
+class TestTraceExport(unittest.TestCase):
+
+    def setUp(self):
+        tracing.clear_traces()
+
+    def test_ring_buffer_filters_and_orders_traces(self):
+        for name, wall_ms in (("fast", 5.0), ("slow", 900.0), ("medium", 50.0)):
+            root = tracing.start_trace(name)
+            root.finish()
+            root.wall_ms = wall_ms
+            tracing.finish_trace(root)
+        self.assertEqual([t["name"] for t in tracing.recent_traces()], ["medium", "slow", "fast"])
+        self.assertEqual([t["name"] for t in tracing.recent_traces(slowest=True, limit=2)], ["slow", "medium"])
+        self.assertEqual([t["name"] for t in tracing.recent_traces(min_ms=40)], ["medium", "slow"])
+
+    def test_traces_are_appended_to_the_trace_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "traces.jsonl")
+            with patch.object(tracing, "TRACE_FILE", path):
+                for _ in range(2):
+                    tracing.finish_trace(tracing.start_trace("POST /ai/agent/"))
+            with open(path, encoding="utf-8") as file:
+                lines = [json.loads(line) for line in file]
+        self.assertEqual([line["name"] for line in lines], ["POST /ai/agent/"] * 2)
+        self.assertNotEqual(lines[0]["trace_id"], lines[1]["trace_id"])
+
+if __name__ == '__main__':
+    unittest.main()
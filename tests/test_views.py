@@ -0,0 +1,123 @@
+import json
+import os
+import unittest
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "expensetracker.settings")
+os.environ.setdefault("DJANGO_SECRET_KEY", "test-secret")
+os.environ.setdefault("FIREBASE_CREDENTIALS_JSON", "{}")  # parsed at import, only used to verify tokens
+os.environ.setdefault("GOOGLE_API_KEY_1", "test-key")
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017/?serverSelectionTimeoutMS=100")
+
+import django
+django.setup()
+
+# settings.py registered the MongoEngine connection; drop it so the other test modules
+# keep seeing "outside Django" (repository.is_available() is False) and never wait on a server
+from mongoengine import disconnect_all
+disconnect_all()
+
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from django.test import override_settings
+from langchain_core.messages import AIMessage
+from django.test import RequestFactory
+from rest_framework.test import APIRequestFactory
+from api import views
+from expensetracker import urls
+
+class TestTransactionListPayload(unittest.TestCase):
+
+    @patch('api.views.repository')
+    def test_user_history_is_paged_by_default(self, mock_repo):
+        mock_repo.DEFAULT_PAGE_SIZE = 50
+        mock_repo.page_transactions.return_value = {"results": [], "next_cursor": None}
+
+        payload = views.transaction_list_payload({}, "expenses", "user-1")
+        self.assertEqual(payload, {"results": [], "next_cursor": None})
+        mock_repo.page_transactions.assert_called_once_with("expenses", "user-1", limit=50, cursor=None, fields=None)
+        mock_repo.list_user_transactions.assert_not_called()
+
+    @patch('api.views.repository')
+    def test_all_opts_out_to_a_bare_array(self, mock_repo):
+        mock_repo.list_user_transactions.return_value = [{"Amount": "10.00"}]
+
+        payload = views.transaction_list_payload({"all": "true", "fields": "Amount"}, "incomes", "user-1")
+        self.assertEqual(payload, [{"Amount": "10.00"}])
+        mock_repo.list_user_transactions.assert_called_once_with("incomes", "user-1", fields=["Amount"])
+        mock_repo.page_transactions.assert_not_called()
+
+    @patch('api.views.repository')
+    def test_all_is_refused_for_every_users_transactions(self, mock_repo):
+        with self.assertRaises(ValueError):
+            views.transaction_list_payload({"all": "true"}, "expenses")
+        mock_repo.list_user_transactions.assert_not_called()
+
+@patch('api.views.data_version')
+@patch('api.views.get_thread_lock')
+@patch('api.views.get_response_cache')
+@patch('api.views.get_agent')
+@patch('api.views.verify_id_token', return_value={"uid": "user-1", "exp": time.time() + 3600})
+class TestAgentRouting(unittest.TestCase):
+
+    def setUp(self):
+        no_ratelimit = override_settings(RATELIMIT_ENABLE=False)
+        no_ratelimit.enable()
+        self.addCleanup(no_ratelimit.disable)
+
+    def post(self, query):
+        request = APIRequestFactory().post("/ai/agent/", {"query": query}, format="json", HTTP_AUTHORIZATION="Bearer token-1")
+        return views.LangChainAgentView.as_view()(request)
+
+    def test_greeting_with_a_request_goes_to_the_agent(self, _, mock_get_agent, mock_get_cache, *mocks):
+        mock_get_cache.return_value.lookup.return_value = SimpleNamespace(response=None, vector=None)
+        mock_get_agent.return_value.invoke.return_value = {"messages": [AIMessage(content="You spent ₹500 in March.")]}
+
+        for query in ("hi, show my March expenses", "ok add 200 for lunch"):
+            response = self.post(query)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data, {"response": "You spent ₹500 in March."})
+            sent = mock_get_agent.return_value.invoke.call_args[0][0]
+            self.assertEqual(sent["messages"][0]["content"], query)
+        self.assertEqual(mock_get_agent.return_value.invoke.call_count, 2)
+
+    def test_pure_small_talk_is_canned(self, _, mock_get_agent, *mocks):
+        response = self.post("hi")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("What would you like to do?", response.data["response"])
+        mock_get_agent.assert_not_called()
+
+class TestMetricsAccess(unittest.TestCase):
+
+    def get(self, view, remote_addr="203.0.113.5", **headers):
+        return view(RequestFactory().get("/", REMOTE_ADDR=remote_addr, **headers))
+
+    def test_metrics_are_closed_without_a_token(self):
+        with override_settings(METRICS_TOKEN="", DEBUG=False):
+            self.assertEqual(self.get(urls.metrics).status_code, 404)
+            self.assertEqual(self.get(urls.metrics, remote_addr="127.0.0.1").status_code, 404)
+        with override_settings(METRICS_TOKEN="", DEBUG=True):
+            self.assertEqual(self.get(urls.metrics).status_code, 404)
+            self.assertEqual(self.get(urls.metrics, remote_addr="127.0.0.1").status_code, 200)
+
+    def test_metrics_need_the_configured_token(self):
+        with override_settings(METRICS_TOKEN="scrape-token", DEBUG=True):
+            self.assertEqual(self.get(urls.metrics, remote_addr="127.0.0.1").status_code, 401)
+            self.assertEqual(self.get(urls.metrics, HTTP_AUTHORIZATION="Bearer wrong").status_code, 401)
+            response = self.get(urls.metrics, HTTP_AUTHORIZATION="Bearer scrape-token")
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response["Content-Type"].startswith("text/plain"))
+
+    def test_traces_share_the_metrics_gate(self):
+        with override_settings(METRICS_TOKEN="", DEBUG=False):
+            self.assertEqual(self.get(urls.traces).status_code, 404)
+        with override_settings(METRICS_TOKEN="", DEBUG=True):
+            self.assertEqual(self.get(urls.traces, remote_addr="::1").status_code, 200)
+        with override_settings(METRICS_TOKEN="scrape-token"):
+            self.assertEqual(self.get(urls.traces).status_code, 401)
+            response = self.get(urls.traces, HTTP_AUTHORIZATION="Bearer scrape-token")
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("traces", json.loads(response.content))
+
+if __name__ == '__main__':
+    unittest.main()